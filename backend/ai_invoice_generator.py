@@ -9,11 +9,13 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
 from dataclasses import dataclass
+import numpy as np
 from models import Order, Customer, Invoice, Settings, db
+from price_index import price_index
+from notes_parser import garments_in, parse_notes
+from settings_store import settings_store
 import uuid
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -50,6 +52,40 @@ class AIInvoiceGenerator:
             "services": ["tailoring", "alteration", "embroidery", "dyeing", "cleaning", "repair"]
         }
         
+        # Share of order value charged per unit of an extra service found in notes;
+        # tailoring/stitching are already covered by the labour line
+        self.service_price_ratios = {
+            "embroidery": 0.2,
+            "alteration": 0.1,
+            "dyeing": 0.1,
+            "repair": 0.05,
+            "hemming": 0.05,
+            "lining": 0.1,
+            "piping": 0.05,
+            "fall_pico": 0.05,
+            "cleaning": 0.05
+        }
+        
+        # Unit price of an extra garment found in notes when the price index has no band for it
+        self.garment_base_prices = {
+            "shirt": 800, "pant": 900, "suit": 6000, "dress": 1500, "saree": 700,
+            "kurta": 900, "salwar": 700, "blouse": 600, "lehenga": 5000, "sherwani": 7000,
+            "jacket": 2500, "blazer": 3500, "waistcoat": 1200, "skirt": 700, "uniform": 800
+        }
+        self.default_garment_price = 1000
+        
+        self.service_labels = {
+            "embroidery": "Custom Embroidery Work",
+            "alteration": "Alteration Services",
+            "dyeing": "Dyeing Services",
+            "repair": "Repair Work",
+            "hemming": "Hemming",
+            "lining": "Lining Work",
+            "piping": "Piping Work",
+            "fall_pico": "Fall & Pico Work",
+            "cleaning": "Cleaning Services"
+        }
+        
         self.tax_rates = {
             "fabric": 0.05,
             "readymade": 0.12,
@@ -59,16 +95,20 @@ class AIInvoiceGenerator:
 
     def analyze_order_content(self, order: Order) -> Dict:
         """Analyze order content using AI-like pattern matching"""
+        return self.analyze_text(order.order_type, order.fabric, order.notes)
+
+    def analyze_text(self, order_type: Optional[str], fabric: Optional[str], notes: Optional[str]) -> Dict:
+        """Analyze raw order fields; shared by per-order analysis and batch jobs"""
         analysis = {
             "category": "general",
             "complexity": "standard",
-            "tax_rate": 0.18,
+            "tax_rate": settings_store.tax_rate(),
             "estimated_hours": 2,
             "material_cost_ratio": 0.6,
             "labor_cost_ratio": 0.4
         }
         
-        order_text = f"{order.order_type} {order.fabric} {order.notes}".lower()
+        order_text = f"{order_type} {fabric} {notes}".lower()
         
         # Analyze fabric type
         for fabric in self.textile_patterns["fabric_types"]:
@@ -125,35 +165,59 @@ class AIInvoiceGenerator:
                 quantity=1,
                 unit_price=base_price * analysis["labor_cost_ratio"],
                 total_price=base_price * analysis["labor_cost_ratio"],
-                tax_rate=0.18
+                tax_rate=settings_store.tax_rate()
             )
             items.append(labor_item)
         
-        # Additional services based on notes
+        # Additional garments and services extracted from notes
         if order.notes:
-            notes_lower = order.notes.lower()
-            if "embroidery" in notes_lower:
-                embr_item = InvoiceItem(
-                    description="Custom Embroidery Work",
-                    quantity=1,
-                    unit_price=base_price * 0.2,
-                    total_price=base_price * 0.2,
-                    tax_rate=0.18
-                )
-                items.append(embr_item)
-            
-            if "alteration" in notes_lower:
-                alt_item = InvoiceItem(
-                    description="Alteration Services",
-                    quantity=1,
-                    unit_price=base_price * 0.1,
-                    total_price=base_price * 0.1,
-                    tax_rate=0.18
-                )
-                items.append(alt_item)
+            items.extend(self.items_from_notes(order, parse_notes(order.notes)))
+        
+        return items
+
+    def items_from_notes(self, order: Order, parsed_notes: Dict) -> List[InvoiceItem]:
+        """Turn parsed note lines into priced candidate invoice items"""
+        items = []
+        base_price = order.order_value
+        order_garments = garments_in(order.order_type)
+        
+        for line in parsed_notes["lines"]:
+            if line["kind"] == "service":
+                ratio = self.service_price_ratios.get(line["service"])
+                if ratio is None:
+                    continue
+                description = self.service_labels[line["service"]]
+                if line["detail"]:
+                    description += f" - {line['detail'].title()}"
+                if line["garment"]:
+                    description += f" ({line['garment'].title()})"
+                items.append(InvoiceItem(
+                    description=description,
+                    quantity=line["quantity"],
+                    unit_price=base_price * ratio,
+                    total_price=base_price * ratio * line["quantity"],
+                    tax_rate=self.tax_rates.get(line["service"], settings_store.tax_rate())
+                ))
+            elif line["extra"] or line["garment"] not in order_garments:
+                unit_price = self.garment_unit_price(line["garment"], order.fabric)
+                items.append(InvoiceItem(
+                    description=f"Additional {line['garment'].title()} - {order.fabric} ({order.color})",
+                    quantity=line["quantity"],
+                    unit_price=unit_price,
+                    total_price=unit_price * line["quantity"],
+                    tax_rate=self.tax_rates["tailoring"]
+                ))
         
         return items
 
+    def garment_unit_price(self, garment: str, fabric: Optional[str]) -> float:
+        """Median past unit price for this garment type (not the order's main garment), else its base price"""
+        band = price_index.lookup(garment, fabric) if price_index.ready else None
+        # lookup() falls back to the all-orders band, which would price a shirt like a suit
+        if band and band["order_type"] == garment:
+            return band["recommended"]["mid"]
+        return float(self.garment_base_prices.get(garment, self.default_garment_price))
+
     def calculate_intelligent_pricing(self, items: List[InvoiceItem]) -> Tuple[float, float, float]:
         """Calculate intelligent pricing with tax optimization"""
         subtotal = sum(item.total_price for item in items)
@@ -167,6 +231,45 @@ class AIInvoiceGenerator:
         
         return subtotal, tax_amount, total_amount
 
+    def calculate_batch_pricing(self, quantities, unit_prices, tax_rates) -> Dict:
+        """Vectorized pricing for column arrays of quantity, unit price and tax rate"""
+        quantity = np.asarray(quantities, dtype=np.float64)
+        unit_price = np.asarray(unit_prices, dtype=np.float64)
+        tax_rate = np.broadcast_to(np.asarray(tax_rates, dtype=np.float64), quantity.shape)
+        
+        line_totals = quantity * unit_price
+        line_tax = line_totals * tax_rate
+        
+        # Group lines into GST slabs by rate
+        rates, slab_index = np.unique(tax_rate, return_inverse=True)
+        slab_taxable = np.bincount(slab_index, weights=line_totals, minlength=len(rates))
+        slab_tax = np.bincount(slab_index, weights=line_tax, minlength=len(rates))
+        slab_lines = np.bincount(slab_index, minlength=len(rates))
+        
+        subtotal = float(line_totals.sum())
+        tax_amount = float(line_tax.sum())
+        
+        return {
+            "lines": {
+                "total_price": line_totals.tolist(),
+                "tax_amount": line_tax.tolist(),
+                "line_total": (line_totals + line_tax).tolist()
+            },
+            "tax_slabs": [
+                {
+                    "tax_rate": float(rate) * 100,
+                    "line_count": int(count),
+                    "taxable_amount": float(taxable),
+                    "tax_amount": float(tax)
+                }
+                for rate, count, taxable, tax in zip(rates, slab_lines, slab_taxable, slab_tax)
+            ],
+            "subtotal": subtotal,
+            "tax_amount": tax_amount,
+            "total_amount": subtotal + tax_amount,
+            "line_count": int(quantity.size)
+        }
+
     def generate_ai_notes(self, order: Order, analysis: Dict) -> str:
         """Generate intelligent notes based on order analysis"""
         notes = []
@@ -224,7 +327,7 @@ class AIInvoiceGenerator:
                 subtotal, tax_amount, total_amount = self.calculate_intelligent_pricing(items)
             else:
                 subtotal = order.order_value
-                tax_amount = subtotal * 0.18
+                tax_amount = subtotal * settings_store.tax_rate()
                 total_amount = subtotal + tax_amount
                 # Adjust items to match order value
                 if items:
@@ -347,8 +450,13 @@ def get_invoice_suggestions(order_id: int) -> Dict:
     analysis = ai_invoice_generator.analyze_order_content(order)
     items = ai_invoice_generator.generate_smart_invoice_items(order, analysis)
     
+    # Historical band for comparable orders (None until the index is built)
+    price_band = price_index.lookup(order.order_type, order.fabric, analysis["complexity"], order.quantity)
+    
     return {
         "analysis": analysis,
+        "price_band": price_band,
+        "notes_extraction": parse_notes(order.notes),
         "suggested_items": [
             {
                 "description": item.description,
@@ -0,0 +1,238 @@
+"""
+TEX-SARTHI API Keys
+Long-lived keys for POS tablets and integrations: stored as an HMAC-SHA256 of the
+key, looked up by their public prefix, cached per worker, scoped per blueprint
+and accepted next to JWTs through the X-API-Key header
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import create_access_token
+from sqlalchemy import select, update
+
+from models import ApiKey, db
+
+KEY_TAG = 'tsk'
+HEADER = 'X-API-Key'
+DEFAULT_CACHE_TTL = 60
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+DEFAULT_CACHE_MAX_NEGATIVE = 256
+
+# Blueprints that manage credentials never accept API keys
+EXCLUDED_BLUEPRINTS = ('auth', 'api_keys')
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ApiKeyError(Exception):
+    """Raised for a missing, malformed, unknown, expired or revoked key"""
+
+    def __init__(self, message: str, status: int = 401):
+        super().__init__(message)
+        self.status = status
+
+
+# ---------------------------------------------------------------------------
+# Keys and scopes
+# ---------------------------------------------------------------------------
+
+def key_digest(key: str) -> str:
+    """HMAC-SHA256 of a whole key under API_KEY_SECRET (SECRET_KEY by default)"""
+    secret = current_app.config.get('API_KEY_SECRET') or current_app.config['SECRET_KEY']
+    return hmac.new(secret.encode('utf-8'), key.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def generate_key() -> Tuple[str, str]:
+    """New key and its prefix: tsk_<12 hex>_<43 url-safe chars>"""
+    prefix = secrets.token_hex(6)
+    return f'{KEY_TAG}_{prefix}_{secrets.token_urlsafe(32)}', prefix
+
+
+def key_prefix(key: str) -> Optional[str]:
+    parts = key.split('_', 2)
+    if len(parts) != 3 or parts[0] != KEY_TAG or len(parts[1]) != 12 or not parts[2]:
+        return None
+    return parts[1]
+
+
+def scope_names() -> list:
+    """Every grantable scope: '*', and read/write/* per blueprint"""
+    names = ['*']
+    for blueprint in sorted(current_app.blueprints):
+        if blueprint not in EXCLUDED_BLUEPRINTS:
+            names.extend(f'{blueprint}:{action}' for action in ('read', 'write', '*'))
+    return names
+
+
+def parse_scopes(scopes: Iterable[str]) -> list:
+    """Validated, de-duplicated scopes; raises ValueError on unknown ones"""
+    known = set(scope_names())
+    result = []
+    for scope in scopes:
+        scope = str(scope).strip()
+        if scope not in known:
+            raise ValueError(f'Unknown scope: {scope}')
+        if scope not in result:
+            result.append(scope)
+    if not result:
+        raise ValueError('At least one scope is required')
+    return result
+
+
+def scope_allows(scopes: FrozenSet[str], blueprint: str, method: str) -> bool:
+    """Write scopes include read; '<blueprint>:*' and '*' include both"""
+    if '*' in scopes or f'{blueprint}:*' in scopes or f'{blueprint}:write' in scopes:
+        return True
+    return method in READ_METHODS and f'{blueprint}:read' in scopes
+
+
+# ---------------------------------------------------------------------------
+# Verification cache
+# ---------------------------------------------------------------------------
+
+class KeyEntry:
+    """What a worker needs to check a key without the database"""
+
+    __slots__ = ('id', 'prefix', 'key_hash', 'scopes', 'user_id', 'expires_at', 'token')
+
+    def __init__(self, row: ApiKey, token: str):
+        self.id = row.id
+        self.prefix = row.prefix
+        self.key_hash = row.key_hash
+        self.scopes = frozenset(row.scopes.split(',')) if row.scopes else frozenset()
+        self.user_id = row.user_id
+        self.expires_at = row.expires_at
+        # Short-lived JWT for the key's user, so @jwt_required views accept the request
+        self.token = token
+
+
+class ApiKeyCache:
+    """LRU of active keys by prefix, re-read after `ttl` seconds. Unknown or inactive prefixes
+    are remembered in a smaller LRU of their own, so made-up keys can neither grow the cache
+    without bound nor push real keys out"""
+
+    def __init__(self, ttl: float = DEFAULT_CACHE_TTL, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+                 max_negative: int = DEFAULT_CACHE_MAX_NEGATIVE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_negative = max_negative
+        self._entries: 'OrderedDict[str, Tuple[float, KeyEntry]]' = OrderedDict()
+        self._negative: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, prefix: str) -> Optional[KeyEntry]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(prefix)
+            if cached is not None and cached[0] > now:
+                self._entries.move_to_end(prefix)
+                self.hits += 1
+                return cached[1]
+            expires = self._negative.get(prefix)
+            if expires is not None and expires > now:
+                self.hits += 1
+                return None
+            self.misses += 1
+
+        entry = self._load(prefix)
+        with self._lock:
+            if entry is None:
+                self._entries.pop(prefix, None)
+                self._store(self._negative, prefix, now + self.ttl, self.max_negative)
+            else:
+                self._negative.pop(prefix, None)
+                self._store(self._entries, prefix, (now + self.ttl, entry), self.max_entries)
+        return entry
+
+    @staticmethod
+    def _store(entries: OrderedDict, prefix: str, value, limit: int):
+        entries[prefix] = value
+        entries.move_to_end(prefix)
+        while len(entries) > limit:
+            entries.popitem(last=False)
+
+    def _load(self, prefix: str) -> Optional[KeyEntry]:
+        row = db.session.execute(select(ApiKey).where(ApiKey.prefix == prefix)).scalar_one_or_none()
+        now = datetime.utcnow()
+        if row is None or row.revoked_at is not None or (row.expires_at and row.expires_at <= now):
+            return None
+        token = create_access_token(
+            identity=str(row.user_id),
+            additional_claims={'api_key': row.prefix},
+            expires_delta=timedelta(seconds=self.ttl * 2 + 60)
+        )
+        entry = KeyEntry(row, token)
+        # Usage is recorded once per reload, not per request
+        db.session.execute(update(ApiKey).where(ApiKey.id == row.id).values(last_used_at=now))
+        db.session.commit()
+        return entry
+
+    def invalidate(self, prefix: str):
+        with self._lock:
+            self._entries.pop(prefix, None)
+            self._negative.pop(prefix, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._negative.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'negative_entries': len(self._negative),
+                    'hits': self.hits, 'misses': self.misses}
+
+
+api_key_cache = ApiKeyCache()
+
+
+def verify_key(key: str) -> KeyEntry:
+    """Entry of a valid key; raises ApiKeyError otherwise"""
+    prefix = key_prefix(key)
+    if prefix is None:
+        raise ApiKeyError('Malformed API key')
+    entry = api_key_cache.get(prefix)
+    if entry is None or not hmac.compare_digest(entry.key_hash, key_digest(key)):
+        raise ApiKeyError('Invalid API key')
+    if entry.expires_at and entry.expires_at <= datetime.utcnow():
+        api_key_cache.invalidate(prefix)
+        raise ApiKeyError('API key expired')
+    return entry
+
+
+def _authenticate_request():
+    """Accept X-API-Key in place of a bearer token, within the key's scopes"""
+    key = request.headers.get(HEADER)
+    if not key or request.headers.get('Authorization') or request.blueprint is None:
+        return None
+    if request.blueprint in EXCLUDED_BLUEPRINTS:
+        return jsonify({'error': 'API keys cannot be used for this endpoint'}), 403
+    try:
+        entry = verify_key(key.strip())
+    except ApiKeyError as e:
+        return jsonify({'error': str(e)}), e.status
+    if not scope_allows(entry.scopes, request.blueprint, request.method):
+        action = 'read' if request.method in READ_METHODS else 'write'
+        return jsonify({'error': f'API key lacks scope {request.blueprint}:{action}'}), 403
+    g.api_key = entry
+    request.environ['HTTP_AUTHORIZATION'] = f'Bearer {entry.token}'
+    return None
+
+
+def init_api_keys(app):
+    """Check X-API-Key headers before every request and size the verification cache"""
+    api_key_cache.ttl = app.config.get('API_KEY_CACHE_TTL', DEFAULT_CACHE_TTL)
+    api_key_cache.max_entries = app.config.get('API_KEY_CACHE_MAX_ENTRIES', DEFAULT_CACHE_MAX_ENTRIES)
+    api_key_cache.max_negative = app.config.get('API_KEY_CACHE_MAX_NEGATIVE', DEFAULT_CACHE_MAX_NEGATIVE)
+    api_key_cache.clear()
+    app.before_request(_authenticate_request)
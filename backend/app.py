@@ -1,82 +1,149 @@
-from flask import Flask, request, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
-from flask_jwt_extended import JWTManager, jwt_required, create_access_token, get_jwt_identity
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from datetime import datetime, timedelta
+from datetime import datetime
+import logging
 import os
-from werkzeug.security import generate_password_hash, check_password_hash
-
-# Initialize Flask app
-app = Flask(__name__)
-
-# Configuration
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-this-in-production')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///tex_sarthi.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-string-change-this')
-app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)
-
-# Initialize database first
-from models import db, User, Order, Customer, InventoryItem, Invoice, Delivery, Settings
-db.init_app(app)
-
-# Initialize other extensions
-bcrypt = Bcrypt(app)
-jwt = JWTManager(app)
-CORS(app)
-
-# Import routes
-from routes.auth import auth_bp
-from routes.dashboard import dashboard_bp
-from routes.orders import orders_bp
-from routes.customers import customers_bp
-from routes.inventory import inventory_bp
-from routes.invoices import invoices_bp
-from routes.deliveries import deliveries_bp
-from routes.reports import reports_bp
-from routes.settings import settings_bp
-from routes.ai_invoices import ai_invoices_bp
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix='/api')
-app.register_blueprint(dashboard_bp, url_prefix='/api')
-app.register_blueprint(orders_bp, url_prefix='/api')
-app.register_blueprint(customers_bp, url_prefix='/api')
-app.register_blueprint(inventory_bp, url_prefix='/api')
-app.register_blueprint(invoices_bp, url_prefix='/api')
-app.register_blueprint(deliveries_bp, url_prefix='/api')
-app.register_blueprint(reports_bp, url_prefix='/api')
-app.register_blueprint(settings_bp, url_prefix='/api')
-app.register_blueprint(ai_invoices_bp, url_prefix='/api')
-
-# Error handlers
-@app.errorhandler(404)
-def not_found(error):
-    return jsonify({'error': 'Endpoint not found'}), 404
-
-@app.errorhandler(500)
-def internal_error(error):
-    return jsonify({'error': 'Internal server error'}), 500
-
-@app.errorhandler(400)
-def bad_request(error):
-    return jsonify({'error': 'Bad request'}), 400
-
-@app.errorhandler(401)
-def unauthorized(error):
-    return jsonify({'error': 'Unauthorized'}), 401
-
-# Health check endpoint
-@app.route('/api/health')
-def health_check():
-    return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
-
-# Initialize database
-def create_tables():
+import threading
+
+from config import config
+from models import db, User
+
+logger = logging.getLogger(__name__)
+
+jwt = JWTManager()
+
+def create_app(config_name=None):
+    """Build the app from a config.py profile (FLASK_CONFIG, default: development)"""
+    config_name = config_name or os.environ.get('FLASK_CONFIG') or 'default'
+    app = Flask(__name__)
+    app.config.from_object(config[config_name])
+    logging.basicConfig(level=app.config['LOG_LEVEL'])
+
+    # Pool settings do not apply to an in-memory SQLite database (one shared connection)
+    if ':memory:' in app.config['SQLALCHEMY_DATABASE_URI']:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {}
+
+    # Initialize database first; SQLite files get WAL, a read-only pool and one writer (SQLITE_WAL)
+    from sqlite_mode import configure_sqlite_mode, init_sqlite_mode
+    configure_sqlite_mode(app)
+    db.init_app(app)
+    init_sqlite_mode(app)
+
+    # Faster JSON encoding when orjson is installed
+    from serializers import init_json_provider
+    init_json_provider(app)
+
+    # Initialize other extensions
+    jwt.init_app(app)
+
+    # Password hashing pool and method
+    from passwords import init_passwords
+    init_passwords(app)
+
+    # Authenticated users served from a per-worker cache
+    from user_cache import init_user_cache
+    init_user_cache(app)
+
+    # X-API-Key accepted in place of a bearer token
+    from api_keys import init_api_keys
+    init_api_keys(app)
+    CORS(app)
+
+    # gzip/deflate responses and the table-versioned response cache
+    from compression import init_compression
+    from cache import init_cache
+    init_compression(app)
+    init_cache(app)
+
+    register_blueprints(app)
+    register_error_handlers(app)
+
+    # One SELECT of the stored schema version; upgrades only when it is behind
+    # (production reports it instead and runs `flask init-db` on deploy)
+    from migrations import check_schema
+    if check_schema(app, upgrade=app.config['SCHEMA_ON_STARTUP']):
+        create_default_admin(app)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables, columns and indexes and the default admin user"""
+        init_schema(app)
+
+    start_background_jobs_on_first_request(app)
+
+    return app
+
+def register_blueprints(app):
+    from routes.auth import auth_bp
+    from routes.dashboard import dashboard_bp
+    from routes.orders import orders_bp
+    from routes.customers import customers_bp
+    from routes.inventory import inventory_bp
+    from routes.invoices import invoices_bp
+    from routes.deliveries import deliveries_bp
+    from routes.reports import reports_bp
+    from routes.settings import settings_bp
+    from routes.ai_invoices import ai_invoices_bp
+    from routes.imports import imports_bp
+    from routes.reservations import reservations_bp
+    from routes.cutting import cutting_bp
+    from routes.sizes import sizes_bp
+    from routes.calendar import calendar_bp
+    from routes.api_keys import api_keys_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(orders_bp, url_prefix='/api')
+    app.register_blueprint(customers_bp, url_prefix='/api')
+    app.register_blueprint(inventory_bp, url_prefix='/api')
+    app.register_blueprint(invoices_bp, url_prefix='/api')
+    app.register_blueprint(deliveries_bp, url_prefix='/api')
+    app.register_blueprint(reports_bp, url_prefix='/api')
+    app.register_blueprint(settings_bp, url_prefix='/api')
+    app.register_blueprint(ai_invoices_bp, url_prefix='/api')
+    app.register_blueprint(imports_bp, url_prefix='/api')
+    app.register_blueprint(reservations_bp, url_prefix='/api')
+    app.register_blueprint(cutting_bp, url_prefix='/api')
+    app.register_blueprint(sizes_bp, url_prefix='/api')
+    app.register_blueprint(calendar_bp, url_prefix='/api')
+    app.register_blueprint(api_keys_bp, url_prefix='/api')
+
+def register_error_handlers(app):
+    from streaming import internal_error_payload
+
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({'error': 'Endpoint not found'}), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return jsonify(internal_error_payload()), 500
+
+    @app.errorhandler(400)
+    def bad_request(error):
+        return jsonify({'error': 'Bad request'}), 400
+
+    @app.errorhandler(401)
+    def unauthorized(error):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    # Health check endpoint
+    @app.route('/api/health')
+    def health_check():
+        return jsonify({'status': 'healthy', 'timestamp': datetime.utcnow().isoformat()})
+
+def init_schema(app):
+    """Create missing tables, apply additive migrations, record the schema version and create the default admin"""
+    from migrations import upgrade_schema
+    with app.app_context():
+        for change in upgrade_schema(db.engine):
+            logger.info(f"Applied schema change: {change}")
+
+    create_default_admin(app)
+
+def create_default_admin(app):
     with app.app_context():
-        db.create_all()
-        
         # Create default admin user if not exists
         admin_user = User.query.filter_by(email='admin@texsarthi.com').first()
         if not admin_user:
@@ -90,6 +157,42 @@ def create_tables():
             db.session.commit()
             print("Default admin user created: admin@texsarthi.com / admin123")
 
+def start_background_jobs(app):
+    from price_index import init_price_index
+    from stock_ledger import init_stock_snapshots
+    from size_clusters import init_size_clusters
+    from reorder_forecast import init_reorder_forecast
+    from sqlite_mode import init_sqlite_maintenance
+    init_price_index(app)
+    init_stock_snapshots(app)
+    init_size_clusters(app)
+    init_reorder_forecast(app)
+    init_sqlite_maintenance(app)
+
+def start_background_jobs_on_first_request(app):
+    """Start the background jobs in whichever process serves requests.
+    Threads do not survive fork, and their in-memory results (price index, size charts)
+    must live in the worker, so a preloading server's master never starts them.
+    Their modules (NumPy) are imported on a side thread so the first request does not wait."""
+    state = {'pid': None}
+    lock = threading.Lock()
+
+    @app.before_request
+    def _ensure_background_jobs():
+        if state['pid'] == os.getpid():
+            return
+        with lock:
+            if state['pid'] != os.getpid():
+                state['pid'] = os.getpid()
+                threading.Thread(target=_start_background_jobs_safely, args=(app,),
+                                 name='background-jobs', daemon=True).start()
+
+def _start_background_jobs_safely(app):
+    try:
+        start_background_jobs(app)
+    except Exception as e:
+        logger.error(f"Could not start background jobs: {str(e)}")
+
 if __name__ == '__main__':
-    create_tables()
-    app.run(debug=True, host='0.0.0.0', port=3000)
+    app = create_app()
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=3000)
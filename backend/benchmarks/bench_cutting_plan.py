@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Cutting-plan benchmark for TEX-SARTHI Backend
+Times piece generation and shelf packing for batches of a few thousand pieces
+Run from the backend directory: python benchmarks/bench_cutting_plan.py
+"""
+
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cutting_plan import plan_cutting
+
+ORDER_TYPES = ['shirt', 'kurta', 'pant', 'suit', 'blouse', 'dress']
+BATCHES = [50, 200, 500, 1000]
+
+def make_orders(count, rng):
+    return [
+        {
+            'id': i + 1,
+            'order_type': rng.choice(ORDER_TYPES),
+            'quantity': rng.randint(1, 2),
+            'measurements': json.dumps({
+                'chest': rng.randint(34, 46),
+                'waist': rng.randint(28, 40),
+                'length': rng.randint(27, 31),
+                'sleeve': rng.randint(22, 26)
+            })
+        }
+        for i in range(count)
+    ]
+
+def main():
+    rng = random.Random(42)
+    print("TEX-SARTHI cutting-plan benchmark (112 cm x 50 m rolls)")
+    print("=" * 72)
+    print(f"{'orders':>8} {'pieces':>8} {'rolls':>6} {'metres':>10} {'utilization':>12} {'time':>12}")
+    for count in BATCHES:
+        orders = make_orders(count, rng)
+        for rotation in (False, True):
+            start = time.perf_counter()
+            plan = plan_cutting(orders, 112, 50, allow_rotation=rotation)
+            elapsed = (time.perf_counter() - start) * 1000
+            summary = plan['summary']
+            label = f"{count}{'r' if rotation else ''}"
+            print(f"{label:>8} {summary['pieces']:>8} {summary['rolls']:>6} "
+                  f"{summary['metres_consumed']:>10.2f} {summary['utilization_percent']:>11.2f}% {elapsed:>9.1f} ms")
+
+if __name__ == '__main__':
+    main()
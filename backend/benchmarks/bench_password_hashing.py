@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Password hashing benchmark for TEX-SARTHI Backend
+Login verifications per second per core for each hash method, inline and through the hash pool
+Run from the backend directory: python benchmarks/bench_password_hashing.py [method ...]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import HashPool, _hash, _verify
+
+METHODS = ['pbkdf2:sha256:600000', 'pbkdf2:sha256:260000', 'scrypt:32768:8:1', 'bcrypt:12', 'bcrypt:10']
+PASSWORD = 'correct horse battery staple'
+
+def inline_rate(stored, seconds=2.0):
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        _verify(stored, PASSWORD)
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def pool_rate(stored, workers, logins):
+    # Four request threads per hash worker, like a burst of logins on a threaded server
+    pool = HashPool(workers, workers * 4)
+    with ThreadPoolExecutor(max_workers=workers * 4) as requests:
+        start = time.perf_counter()
+        list(requests.map(lambda _: pool.run(_verify, stored, PASSWORD), range(logins)))
+        return logins / (time.perf_counter() - start)
+
+def main():
+    methods = sys.argv[1:] or METHODS
+    cores = os.cpu_count() or 1
+    print(f"TEX-SARTHI password hashing benchmark ({cores} cores)")
+    print("=" * 72)
+    print(f"{'method':<24} {'verify ms':>10} {'inline/s':>10} {'pool/s':>10} {'per core/s':>12}")
+    for method in methods:
+        stored = _hash(PASSWORD, method)
+        inline = inline_rate(stored)
+        pooled = pool_rate(stored, cores, max(int(inline * cores * 2), cores * 4))
+        print(f"{method:<24} {1000 / inline:>10.1f} {inline:>10.1f} {pooled:>10.1f} {pooled / cores:>12.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Serializer microbenchmarks for TEX-SARTHI Backend
+Compares Model.to_dict() with the precompiled serializers (ORM objects and
+plain Row tuples) and the stdlib JSON encoder with orjson
+Run from the backend directory: python benchmarks/bench_serializers.py
+"""
+
+import json
+import os
+import sys
+import timeit
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, Customer, Order
+from serializers import compile_serializer, full_fieldset, required_columns, orjson
+
+PAGE_SIZE = 100
+REPEAT = 200
+
+def seed():
+    customer = Customer(name='Benchmark Customer', phone='9876543210', city='Mumbai')
+    db.session.add(customer)
+    db.session.flush()
+    for i in range(PAGE_SIZE):
+        db.session.add(Order(
+            order_number=f'ORD-BENCH-{i:05d}',
+            customer_id=customer.id,
+            customer_name=customer.name,
+            order_type='shirt',
+            fabric='Cotton',
+            color='White',
+            quantity=2,
+            measurements='{"chest": 40, "waist": 32, "length": 29, "sleeve": 24, "shoulder": 18}',
+            order_value=1500.0 + i,
+            advance_payment=500.0,
+            delivery_date=date.today() + timedelta(days=i % 14),
+            notes='2 extra kurtas, embroidery on collar, alteration of 1 pant ' * 4
+        ))
+    db.session.commit()
+
+def timed(label, fn):
+    per_call = min(timeit.repeat(fn, number=REPEAT, repeat=3)) / REPEAT * 1000
+    print(f"{label:<48} {per_call:>8.3f} ms / {PAGE_SIZE} rows")
+    return per_call
+
+def main():
+    print("TEX-SARTHI serializer benchmark")
+    print("=" * 72)
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        seed()
+
+        fields = full_fieldset(Order)
+        columns = [getattr(Order, name) for name in required_columns(Order, fields)]
+        objects = Order.query.order_by(Order.id).all()
+        rows = Order.query.with_entities(*columns).order_by(Order.id).all()
+        compiled = compile_serializer(Order, fields)
+        compiled_rows = compile_serializer(Order, fields, from_row=True)
+
+        assert [o.to_dict() for o in objects] == [compiled(o) for o in objects] == [compiled_rows(r) for r in rows]
+
+        print("Serialization only")
+        timed("  Order.to_dict()", lambda: [o.to_dict() for o in objects])
+        timed("  compiled serializer (ORM objects)", lambda: [compiled(o) for o in objects])
+        timed("  compiled serializer (Row tuples)", lambda: [compiled_rows(r) for r in rows])
+
+        print("Query + serialization")
+        db.session.expunge_all()
+        timed("  query.all() + to_dict()", lambda: [o.to_dict() for o in Order.query.order_by(Order.id).all()])
+        timed("  with_entities() + compiled row serializer",
+              lambda: [compiled_rows(r) for r in Order.query.with_entities(*columns).order_by(Order.id).all()])
+
+        payload = {'orders': [compiled(o) for o in objects]}
+        print("JSON encoding")
+        timed("  json.dumps(sort_keys=True)", lambda: json.dumps(payload, sort_keys=True))
+        if orjson is not None:
+            timed("  orjson.dumps(OPT_SORT_KEYS)", lambda: orjson.dumps(payload, option=orjson.OPT_SORT_KEYS))
+        else:
+            print("  orjson not installed, skipped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Server benchmark for TEX-SARTHI Backend
+Requests per second and latency of the old app.run() development server against
+gunicorn with gunicorn.conf.py, on the health check and an authenticated list endpoint
+Run from the backend directory: python benchmarks/bench_server.py [seconds]
+"""
+
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+CLIENTS = 16
+ORDERS = 200
+
+DEV_SERVER = (
+    "import sys; from app import create_app; app = create_app('development'); "
+    "app.run(host='127.0.0.1', port=int(sys.argv[1]), debug={debug}, use_reloader=False)"
+)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server on port {port} did not start')
+
+def seed(env):
+    """Schema, a few hundred orders and a token, written through the development profile"""
+    os.environ.update(env)
+    from app import create_app
+    from flask_jwt_extended import create_access_token
+    from models import db, Customer, Order
+
+    app = create_app('development')
+    with app.app_context():
+        customer = Customer(name='Benchmark Customer', phone='9876543210', city='Mumbai')
+        db.session.add(customer)
+        db.session.flush()
+        for i in range(ORDERS):
+            db.session.add(Order(
+                order_number=f'ORD-BENCH-{i:05d}', customer_id=customer.id, customer_name=customer.name,
+                order_type='shirt', fabric='Cotton', color='White', quantity=1, order_value=1500.0 + i,
+                advance_payment=500.0, status='pending'
+            ))
+        db.session.commit()
+        return create_access_token(identity='1')
+
+def load(port, path, headers, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        mine = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            mine.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(mine)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0.0
+    return len(latencies) / elapsed, pick(0.5), pick(0.99)
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    workdir = tempfile.mkdtemp(prefix='texsarthi-bench-')
+    env = {
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'PRICE_INDEX_REFRESH_SECONDS': '0',
+        'STOCK_SNAPSHOT_INTERVAL_HOURS': '0',
+        'SIZE_CLUSTER_REFRESH_SECONDS': '0',
+        'REORDER_FORECAST_INTERVAL_HOURS': '0',
+    }
+    token = seed(env)
+    server_env = dict(os.environ, **env)
+
+    servers = [
+        ('app.run debug (old run.py)', [sys.executable, '-c', DEV_SERVER.format(debug=True)]),
+        ('app.run', [sys.executable, '-c', DEV_SERVER.format(debug=False)]),
+        ('gunicorn gthread', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']),
+    ]
+    endpoints = [
+        ('health', '/api/health', {}),
+        ('orders', '/api/orders?per_page=50', {'Authorization': f'Bearer {token}'}),
+    ]
+
+    print(f"TEX-SARTHI server benchmark ({os.cpu_count()} cores, {CLIENTS} keep-alive clients, {seconds:.0f} s each)")
+    print("=" * 72)
+    print(f"{'server':<28} {'endpoint':<8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+    for label, command in servers:
+        port = free_port()
+        if 'gunicorn' in command:
+            command = command + ['--bind', f'127.0.0.1:{port}', '--error-logfile', os.devnull]
+        else:
+            command = command + [str(port)]
+        process = subprocess.Popen(command, cwd=BACKEND, env=server_env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_until_up(port)
+            for name, path, headers in endpoints:
+                rate, p50, p99 = load(port, path, headers, seconds)
+                print(f"{label:<28} {name:<8} {rate:>10.1f} {p50:>10.2f} {p99:>10.2f}")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Smart pricing benchmark for TEX-SARTHI Backend
+Compares the per-item InvoiceItem loop with the vectorized batch path
+Run from the backend directory: python benchmarks/bench_smart_pricing.py
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_invoice_generator import ai_invoice_generator, InvoiceItem
+
+SIZES = [3, 100, 1000, 10000]
+TAX_RATES = [0.05, 0.12, 0.18]
+
+def make_columns(n):
+    """Build a random quote with n lines"""
+    rng = random.Random(n)
+    return {
+        'quantity': [rng.randint(1, 50) for _ in range(n)],
+        'unit_price': [round(rng.uniform(100, 5000), 2) for _ in range(n)],
+        'tax_rate': [rng.choice(TAX_RATES) for _ in range(n)]
+    }
+
+def loop_pricing(columns):
+    """Current request path: one dataclass per line, then Python sums"""
+    items = []
+    for quantity, unit_price, tax_rate in zip(columns['quantity'], columns['unit_price'], columns['tax_rate']):
+        items.append(InvoiceItem(
+            description='',
+            quantity=int(quantity),
+            unit_price=float(unit_price),
+            total_price=float(quantity) * float(unit_price),
+            tax_rate=float(tax_rate)
+        ))
+    subtotal, tax_amount, total_amount = ai_invoice_generator.calculate_intelligent_pricing(items)
+    breakdown = [item.total_price * item.tax_rate for item in items]
+    return subtotal, tax_amount, total_amount, breakdown
+
+def batch_pricing(columns):
+    """Vectorized batch path"""
+    return ai_invoice_generator.calculate_batch_pricing(
+        columns['quantity'], columns['unit_price'], columns['tax_rate']
+    )
+
+def main():
+    print("TEX-SARTHI smart pricing benchmark")
+    print("=" * 60)
+    print(f"{'lines':>8} {'loop (ms)':>12} {'batch (ms)':>12} {'speedup':>10}")
+
+    for n in SIZES:
+        columns = make_columns(n)
+
+        # Both paths must agree before timing them
+        loop_result = loop_pricing(columns)
+        batch_result = batch_pricing(columns)
+        assert abs(loop_result[2] - batch_result['total_amount']) < 1e-6 * max(1, loop_result[2])
+
+        repeat = max(3, 20000 // n)
+        loop_ms = min(timeit.repeat(lambda: loop_pricing(columns), number=repeat, repeat=3)) / repeat * 1000
+        batch_ms = min(timeit.repeat(lambda: batch_pricing(columns), number=repeat, repeat=3)) / repeat * 1000
+        print(f"{n:>8} {loop_ms:>12.3f} {batch_ms:>12.3f} {loop_ms / batch_ms:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
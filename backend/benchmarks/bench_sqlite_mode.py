@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+SQLite mode benchmark for TEX-SARTHI Backend
+Mixed reads (order list) and writes (new customers) from concurrent clients against
+gunicorn on a SQLite file, with SQLITE_WAL off (rollback journal, shared pool) and on
+Run from the backend directory: python benchmarks/bench_sqlite_mode.py [seconds] [write %]
+"""
+
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from bench_server import BACKEND, free_port, seed, wait_until_up
+
+CLIENTS = 16
+WORKERS = 2
+
+def load(port, token, seconds, write_share):
+    results = {'read': [], 'write': []}
+    errors = {'read': 0, 'write': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+
+    def client(number):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        rng = random.Random(number)
+        mine = {'read': [], 'write': []}
+        failed = {'read': 0, 'write': 0}
+        sequence = 0
+        while time.perf_counter() < deadline:
+            kind = 'write' if rng.random() < write_share else 'read'
+            start = time.perf_counter()
+            try:
+                if kind == 'write':
+                    sequence += 1
+                    body = json.dumps({'name': f'Bench {number}-{sequence}', 'city': 'Mumbai'})
+                    conn.request('POST', '/api/customers', body=body, headers=headers)
+                else:
+                    # Distinct query strings keep the response cache out of the measurement
+                    conn.request('GET', f'/api/orders?per_page=20&page={rng.randint(1, 5)}&n={sequence}',
+                                 headers=headers)
+                    sequence += 1
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                failed[kind] += 1
+                continue
+            if response.status >= 500:
+                failed[kind] += 1
+            else:
+                mine[kind].append(time.perf_counter() - start)
+        with lock:
+            for kind in results:
+                results[kind].extend(mine[kind])
+                errors[kind] += failed[kind]
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    summary = {}
+    for kind, latencies in results.items():
+        latencies.sort()
+        pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0.0
+        summary[kind] = (len(latencies) / elapsed, pick(0.5), pick(0.99), errors[kind])
+    return summary
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    write_share = float(sys.argv[2]) / 100 if len(sys.argv) > 2 else 0.2
+    workdir = tempfile.mkdtemp(prefix='texsarthi-sqlite-')
+    env = {
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'PRICE_INDEX_REFRESH_SECONDS': '0',
+        'STOCK_SNAPSHOT_INTERVAL_HOURS': '0',
+        'SIZE_CLUSTER_REFRESH_SECONDS': '0',
+        'REORDER_FORECAST_INTERVAL_HOURS': '0',
+        'SQLITE_MAINTENANCE_SECONDS': '0',
+        'WEB_CONCURRENCY': str(WORKERS),
+        'LOG_LEVEL': 'WARNING',
+    }
+    token = seed(env)
+
+    print(f"TEX-SARTHI SQLite benchmark ({os.cpu_count()} cores, gunicorn {WORKERS} workers, "
+          f"{CLIENTS} clients, {write_share:.0%} writes, {seconds:.0f} s each)")
+    print("=" * 78)
+    print(f"{'mode':<12} {'kind':<6} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for label, wal in (('rollback', 'false'), ('WAL', 'true')):
+        if wal == 'false':
+            # Start from a rollback-journal file; WAL mode is persistent once set
+            subprocess.run([sys.executable, '-c', (
+                "import sqlite3, sys; c = sqlite3.connect(sys.argv[1]); c.execute('PRAGMA journal_mode=DELETE')"
+            ), os.path.join(workdir, 'bench.db')], check=True)
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app',
+             '--bind', f'127.0.0.1:{port}', '--error-logfile', os.devnull],
+            cwd=BACKEND, env=dict(os.environ, SQLITE_WAL=wal, **env),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_up(port)
+            for kind, (rate, p50, p99, failed) in load(port, token, seconds, write_share).items():
+                print(f"{label:<12} {kind:<6} {rate:>10.1f} {p50:>10.2f} {p99:>10.2f} {failed:>8}")
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for TEX-SARTHI Backend
+Cold-start time in fresh interpreters: `import app`, create_app() on a database whose
+schema version is current, and the first health-check and authenticated requests
+Run from the backend directory: python benchmarks/bench_startup.py [runs] [--record FILE]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = ('import', 'create_app', 'first_health', 'first_orders')
+
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app('development')
+built = time.perf_counter()
+client = app.test_client()
+assert client.get('/api/health').status_code == 200
+health = time.perf_counter()
+assert client.get('/api/orders', headers={'Authorization': 'Bearer ' + sys.argv[1]}).status_code == 200
+orders = time.perf_counter()
+print(json.dumps({
+    'import': imported - started, 'create_app': built - imported,
+    'first_health': health - built, 'first_orders': orders - health,
+    'heavy_modules': sorted(m for m in ('numpy', 'reportlab') if m in sys.modules)
+}))
+'''
+
+SETUP = r'''
+from app import create_app
+from flask_jwt_extended import create_access_token
+app = create_app('development')
+with app.app_context():
+    print(create_access_token(identity='1'))
+'''
+
+def run(code, env, *args):
+    result = subprocess.run([sys.executable, '-c', code, *args], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    args = sys.argv[1:]
+    record = None
+    if '--record' in args:
+        index = args.index('--record')
+        record = args[index + 1]
+        del args[index:index + 2]
+    runs = int(args[0]) if args else 10
+
+    workdir = tempfile.mkdtemp(prefix='texsarthi-startup-')
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+               LOG_LEVEL='WARNING',
+               PRICE_INDEX_REFRESH_SECONDS='0',
+               STOCK_SNAPSHOT_INTERVAL_HOURS='0',
+               SIZE_CLUSTER_REFRESH_SECONDS='0',
+               REORDER_FORECAST_INTERVAL_HOURS='0')
+
+    # The first boot creates the schema; every measured boot only checks its version
+    token = run(SETUP, env)
+
+    samples = {phase: [] for phase in PHASES}
+    heavy = set()
+    for _ in range(runs):
+        result = json.loads(run(PROBE, env, token))
+        for phase in PHASES:
+            samples[phase].append(result[phase] * 1000)
+        heavy.update(result['heavy_modules'])
+
+    medians = {phase: statistics.median(values) for phase, values in samples.items()}
+    total = sum(medians.values())
+
+    print(f"TEX-SARTHI startup benchmark ({runs} fresh interpreters, medians)")
+    print("=" * 48)
+    for phase in PHASES:
+        print(f"{phase:<16} {medians[phase]:>10.1f} ms")
+    print(f"{'total':<16} {total:>10.1f} ms")
+    print(f"heavy modules loaded by the first requests: {', '.join(sorted(heavy)) or 'none'}")
+
+    if record:
+        entry = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commit': git_commit(),
+            'runs': runs,
+            'python': sys.version.split()[0],
+            **{f'{phase}_ms': round(medians[phase], 1) for phase in PHASES},
+            'total_ms': round(total, 1)
+        }
+        with open(record, 'a') as handle:
+            handle.write(json.dumps(entry) + '\n')
+        print(f"recorded in {record}")
+
+if __name__ == '__main__':
+    main()
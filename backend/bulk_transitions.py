@@ -0,0 +1,127 @@
+"""
+TEX-SARTHI Bulk Status Transitions
+Set-based status changes for orders and deliveries: one SELECT and one UPDATE per chunk
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import update
+
+from models import Order, Delivery, db
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Allowed moves per current status; anything else is reported, not applied
+ORDER_TRANSITIONS = {
+    'pending': ['in_progress', 'completed', 'cancelled'],
+    'in_progress': ['pending', 'completed', 'cancelled'],
+    'completed': [],
+    'cancelled': ['pending']
+}
+
+DELIVERY_TRANSITIONS = {
+    'scheduled': ['in_transit', 'delivered', 'failed'],
+    'in_transit': ['delivered', 'failed'],
+    'failed': ['scheduled'],
+    'delivered': []
+}
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def allowed_sources(transitions: Dict[str, List[str]], new_status: str) -> List[str]:
+    """Statuses from which new_status may be reached"""
+    return [status for status, targets in transitions.items() if new_status in targets]
+
+
+def apply_transition(model, transitions: Dict[str, List[str]], new_status: str,
+                     ids: Optional[List[int]] = None, filters: Optional[List] = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """Move rows (by id list or SQL filter) to new_status and report an outcome per id (caller commits)"""
+    sources = allowed_sources(transitions, new_status)
+    results = []
+    updated_ids = []
+
+    if ids is None:
+        query = db.session.query(model.id)
+        for condition in filters or []:
+            query = query.filter(condition)
+        ids = [row.id for row in query.order_by(model.id)]
+
+    for chunk in _chunks(list(dict.fromkeys(ids)), chunk_size):
+        current = dict(db.session.query(model.id, model.status).filter(model.id.in_(chunk)))
+
+        outcomes = {}
+        candidates = []
+        for row_id in chunk:
+            status = current.get(row_id)
+            if row_id not in current:
+                outcomes[row_id] = {'id': row_id, 'outcome': 'not_found'}
+            elif status == new_status:
+                outcomes[row_id] = {'id': row_id, 'outcome': 'unchanged', 'from': status}
+            elif status not in sources:
+                outcomes[row_id] = {'id': row_id, 'outcome': 'invalid_transition', 'from': status}
+            else:
+                candidates.append(row_id)
+
+        if not candidates:
+            results.extend(outcomes[row_id] for row_id in chunk)
+            continue
+
+        # The status guard keeps concurrent writers from being overwritten
+        result = db.session.execute(
+            update(model)
+            .where(model.id.in_(candidates), model.status.in_(sources))
+            .values(status=new_status)
+            .execution_options(synchronize_session=False)
+        )
+
+        if result.rowcount == len(candidates):
+            applied = set(candidates)
+        else:
+            applied = {
+                row.id for row in db.session.query(model.id)
+                .filter(model.id.in_(candidates), model.status == new_status)
+            }
+
+        for row_id in candidates:
+            if row_id in applied:
+                outcomes[row_id] = {'id': row_id, 'outcome': 'updated', 'from': current[row_id]}
+                updated_ids.append(row_id)
+            else:
+                outcomes[row_id] = {'id': row_id, 'outcome': 'conflict', 'from': current[row_id]}
+
+        results.extend(outcomes[row_id] for row_id in chunk)
+
+    summary = {}
+    for result in results:
+        summary[result['outcome']] = summary.get(result['outcome'], 0) + 1
+
+    return {'results': results, 'summary': summary, 'updated_ids': updated_ids}
+
+
+def complete_orders_for_deliveries(delivery_ids: List[int], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Rollup for delivered deliveries: mark their orders completed in one pass per batch.
+    Runs in the same transaction as the delivery update (caller commits)."""
+    if not delivery_ids:
+        return 0
+
+    order_ids = set()
+    for chunk in _chunks(delivery_ids, chunk_size):
+        order_ids.update(
+            row.order_id for row in db.session.query(Delivery.order_id).filter(Delivery.id.in_(chunk))
+        )
+
+    completed = 0
+    for chunk in _chunks(sorted(order_ids), chunk_size):
+        completed += db.session.execute(
+            update(Order)
+            .where(Order.id.in_(chunk), Order.status != 'completed')
+            .values(status='completed')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    return completed
@@ -0,0 +1,273 @@
+"""
+TEX-SARTHI Response Cache
+Per-table version counters bumped on commit, and an in-process cache of rendered
+GET responses that keeps compressed variants next to the identity body
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import current_app, make_response, request
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+
+from compression import COMPRESSIBLE_MIMETYPES, DEFAULT_LEVEL, DEFAULT_MIN_SIZE, compress, negotiate_encoding
+from models import TableVersion, db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 300
+
+versions_table = TableVersion.__table__
+
+# Headers rebuilt for every cached hit instead of being replayed
+_SKIPPED_HEADERS = {'content-length', 'content-type', 'content-encoding', 'etag', 'vary'}
+
+
+# ---------------------------------------------------------------------------
+# Table versions
+# ---------------------------------------------------------------------------
+
+def _changed_tables(session) -> set:
+    return session.info.setdefault('changed_tables', set())
+
+
+def mark_changed(session, *tables: str):
+    """Record writes the session cannot see (raw connection or COPY)"""
+    _changed_tables(session).update(tables)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    changed = _changed_tables(session)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(type(obj), '__table__', None)
+        if table is not None and table is not versions_table:
+            changed.add(table.name)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_statement(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table is not versions_table:
+            _changed_tables(orm_execute_state.session).add(table.name)
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_on_commit(session):
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    changed = session.info.pop('changed_tables', None)
+    if changed:
+        # Same transaction as the writes, so readers never see new data under an old version
+        bump_versions(session.connection(), changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('changed_tables', None)
+
+
+def bump_versions(connection, tables: Iterable[str]):
+    """Increment the version of each table, creating missing rows"""
+    names = sorted(tables)  # fixed lock order
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        statement = insert(versions_table).values([{'name': name, 'version': 1} for name in names])
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[versions_table.c.name],
+            set_={'version': versions_table.c.version + 1}
+        ))
+        return
+
+    connection.execute(
+        update(versions_table)
+        .where(versions_table.c.name.in_(names))
+        .values(version=versions_table.c.version + 1)
+    )
+    existing = set(connection.execute(
+        select(versions_table.c.name).where(versions_table.c.name.in_(names))
+    ).scalars())
+    missing = [{'name': name, 'version': 1} for name in names if name not in existing]
+    if missing:
+        connection.execute(versions_table.insert(), missing)
+
+
+def table_versions(tables: Iterable[str]) -> Tuple[int, ...]:
+    """Current version of each table in one SELECT (0 for never-written tables)"""
+    names = list(tables)
+    rows = dict(db.session.execute(
+        select(versions_table.c.name, versions_table.c.version).where(versions_table.c.name.in_(names))
+    ).all())
+    return tuple(rows.get(name, 0) for name in names)
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+class CachedResponse:
+    """A rendered 200 response plus lazily built encoded variants"""
+
+    __slots__ = ('body', 'mimetype', 'headers', 'etag', 'versions', 'expires', 'variants')
+
+    def __init__(self, body: bytes, mimetype: str, headers: list, versions: Tuple[int, ...], ttl: int):
+        self.body = body
+        self.mimetype = mimetype
+        self.headers = headers
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.versions = versions
+        self.expires = time.monotonic() + ttl
+        self.variants: Dict[str, bytes] = {}
+
+    def variant(self, encoding: str, level: int) -> bytes:
+        """Encoded body, compressed on first use only"""
+        data = self.variants.get(encoding)
+        if data is None:
+            data = self.variants[encoding] = compress(self.body, encoding, level)
+        return data
+
+
+class ResponseCache:
+    """Thread-safe LRU of CachedResponse entries keyed by request path and query"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, CachedResponse]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.versions != versions or entry.expires < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedResponse):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'compressed_variants': sum(len(entry.variants) for entry in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+response_cache = ResponseCache()
+
+
+def _respond(entry: CachedResponse):
+    config = current_app.config
+    body, etag, encoding = entry.body, entry.etag, None
+
+    if entry.mimetype in COMPRESSIBLE_MIMETYPES and len(body) >= config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE):
+        level = config.get('COMPRESS_LEVEL', DEFAULT_LEVEL)
+        encoding = negotiate_encoding() if level > 0 else None
+        if encoding:
+            body = entry.variant(encoding, level)
+            etag = f'{etag}-{encoding}'
+
+    response = current_app.response_class(body, status=200, mimetype=entry.mimetype)
+    response.headers.extend(entry.headers)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response.make_conditional(request)
+
+
+def cached_response(*tables: str):
+    """Serve a GET endpoint from the response cache until one of `tables` is written"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or not current_app.config.get('RESPONSE_CACHE_ENABLED', True):
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            # Read versions before rendering: a write in between only makes the entry stale sooner
+            versions = table_versions(tables)
+            entry = response_cache.get(key, versions)
+
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+                    return response
+                headers = [(k, v) for k, v in response.headers.items() if k.lower() not in _SKIPPED_HEADERS]
+                entry = CachedResponse(response.get_data(), response.mimetype, headers, versions,
+                                       current_app.config.get('RESPONSE_CACHE_TTL', DEFAULT_TTL))
+                response_cache.put(key, entry)
+
+            return _respond(entry)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Memoized queries
+# ---------------------------------------------------------------------------
+
+DEFAULT_MEMO_ENTRIES = 32
+
+
+def memoize_versions(*tables: str, max_entries: int = DEFAULT_MEMO_ENTRIES):
+    """Memoize a query function per argument tuple until one of `tables` is written.
+    A hit costs the table_versions lookup only; results are shared, so callers must not mutate them."""
+    def decorator(fn):
+        entries: 'OrderedDict[tuple, Tuple[Tuple[int, ...], object]]' = OrderedDict()
+        lock = threading.Lock()
+
+        @wraps(fn)
+        def wrapper(*args):
+            # Read versions before querying: a write in between only makes the entry stale sooner
+            versions = table_versions(tables)
+            with lock:
+                entry = entries.get(args)
+                if entry is not None and entry[0] == versions:
+                    entries.move_to_end(args)
+                    return entry[1]
+
+            value = fn(*args)
+            with lock:
+                entries[args] = (versions, value)
+                entries.move_to_end(args)
+                while len(entries) > max_entries:
+                    entries.popitem(last=False)
+            return value
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+    return decorator
+
+
+def init_cache(app):
+    """Size the response cache (the version table is created with the schema, see migrations.check_schema)"""
+    response_cache.max_entries = app.config.get('RESPONSE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
@@ -0,0 +1,74 @@
+"""
+TEX-SARTHI Response Compression
+Negotiated gzip/deflate encoding for JSON and PDF responses above a size threshold
+"""
+
+import gzip
+import zlib
+from typing import Optional
+
+from flask import current_app, request
+
+SUPPORTED_ENCODINGS = ['gzip', 'deflate']
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/pdf', 'text/csv', 'text/html', 'text/plain'}
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVEL = 6
+
+
+def negotiate_encoding() -> Optional[str]:
+    """Best Content-Encoding the client accepts (gzip preferred on ties), or None"""
+    return request.accept_encodings.best_match(SUPPORTED_ENCODINGS)
+
+
+def compress(data: bytes, encoding: str, level: int = DEFAULT_LEVEL) -> bytes:
+    """Encode a body; HTTP "deflate" is the zlib format"""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output byte-identical for identical input
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == 'deflate':
+        return zlib.compress(data, level)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+
+def is_compressible(response) -> bool:
+    """Buffered, successful, not yet encoded and of a type worth compressing"""
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    return response.mimetype in COMPRESSIBLE_MIMETYPES
+
+
+def compress_response(response):
+    """after_request hook: compress eligible responses for clients that accept it"""
+    if not is_compressible(response):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < current_app.config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE):
+        return response
+
+    encoding = negotiate_encoding()
+    if not encoding:
+        return response
+
+    response.set_data(compress(data, encoding, current_app.config.get('COMPRESS_LEVEL', DEFAULT_LEVEL)))
+    response.headers['Content-Encoding'] = encoding
+
+    # Each encoding is a different representation, so it needs its own ETag
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f'{etag}-{encoding}', weak=weak)
+
+    return response
+
+
+def init_compression(app):
+    """Compress responses unless COMPRESS_LEVEL is 0"""
+    if app.config.get('COMPRESS_LEVEL', DEFAULT_LEVEL) > 0:
+        app.after_request(compress_response)
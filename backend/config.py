@@ -1,3 +1,4 @@
+import json
 import os
 from datetime import timedelta
 
@@ -8,6 +9,90 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string-change-this'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
+    DEBUG = False
+    
+    # Upgrade tables/columns/indexes when the stored schema version is behind migrations.SCHEMA_VERSION;
+    # when off, the app only reports it and `flask --app wsgi init-db` runs once per deploy
+    SCHEMA_ON_STARTUP = True
+    
+    # Root log level, configured when the app is built rather than at import time
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    
+    # Historical price index refresh interval (seconds, 0 disables the background job)
+    PRICE_INDEX_REFRESH_SECONDS = int(os.environ.get('PRICE_INDEX_REFRESH_SECONDS', 300))
+    
+    # Stock snapshot interval for point-in-time stock (hours, 0 disables the background job)
+    STOCK_SNAPSHOT_INTERVAL_HOURS = int(os.environ.get('STOCK_SNAPSHOT_INTERVAL_HOURS', 24))
+    
+    # Reorder forecast interval (hours, 0 disables the background job), default supplier lead time (days)
+    # and per-supplier lead times, e.g. '{"Raymond Mills": 10}'
+    REORDER_FORECAST_INTERVAL_HOURS = int(os.environ.get('REORDER_FORECAST_INTERVAL_HOURS', 6))
+    REORDER_LEAD_TIME_DAYS = int(os.environ.get('REORDER_LEAD_TIME_DAYS', 7))
+    SUPPLIER_LEAD_TIMES = json.loads(os.environ.get('SUPPLIER_LEAD_TIMES', '{}'))
+    
+    # Metres of fabric per garment for reservations, e.g. '{"shirt": 2.25}' (overrides the defaults)
+    FABRIC_CONSUMPTION = json.loads(os.environ.get('FABRIC_CONSUMPTION', '{}'))
+    
+    # Default roll size for cutting plans (44" fabric, 50 m rolls)
+    CUTTING_ROLL_WIDTH_CM = float(os.environ.get('CUTTING_ROLL_WIDTH_CM', 112))
+    CUTTING_ROLL_LENGTH_M = float(os.environ.get('CUTTING_ROLL_LENGTH_M', 50))
+    
+    # Most stops per delivery run, and the pincode runs start from (empty: the nearest stop)
+    DELIVERY_RUN_CAPACITY = int(os.environ.get('DELIVERY_RUN_CAPACITY', 30))
+    DELIVERY_DEPOT_PINCODE = os.environ.get('DELIVERY_DEPOT_PINCODE', '')
+    
+    # Standard sizes proposed per order type, and how often size charts are recomputed (0 disables)
+    SIZE_CHART_SIZES = int(os.environ.get('SIZE_CHART_SIZES', 5))
+    SIZE_CLUSTER_REFRESH_SECONDS = int(os.environ.get('SIZE_CLUSTER_REFRESH_SECONDS', 900))
+    
+    # Seconds each worker serves its in-memory settings before checking the settings version (0: every read)
+    SETTINGS_CHECK_SECONDS = float(os.environ.get('SETTINGS_CHECK_SECONDS', 2))
+    
+    # Password hash method (werkzeug method string or "bcrypt:<rounds>"); older hashes are upgraded on login.
+    # Hashes run on PASSWORD_HASH_WORKERS threads (0: one per CPU) with at most PASSWORD_HASH_MAX_PENDING
+    # waiting (0: four per worker); a request waiting longer than PASSWORD_HASH_WAIT_SECONDS gets a 503
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0))
+    PASSWORD_HASH_WAIT_SECONDS = float(os.environ.get('PASSWORD_HASH_WAIT_SECONDS', 5))
+    
+    # Seconds a worker trusts its cached copy of a user (writes in the same worker apply at once)
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 30))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 1024))
+    
+    # API keys are stored as HMAC-SHA256 under API_KEY_SECRET (default SECRET_KEY; changing it voids all keys)
+    # and re-read from the database every API_KEY_CACHE_TTL seconds per worker; unknown prefixes
+    # are remembered separately (API_KEY_CACHE_MAX_NEGATIVE) so junk keys cannot evict real ones
+    API_KEY_SECRET = os.environ.get('API_KEY_SECRET')
+    API_KEY_CACHE_TTL = float(os.environ.get('API_KEY_CACHE_TTL', 60))
+    API_KEY_CACHE_MAX_ENTRIES = int(os.environ.get('API_KEY_CACHE_MAX_ENTRIES', 1024))
+    API_KEY_CACHE_MAX_NEGATIVE = int(os.environ.get('API_KEY_CACHE_MAX_NEGATIVE', 256))
+    
+    # Rows validated and inserted per batch by the bulk import endpoints
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 500))
+    
+    # List pages larger than this many rows are streamed instead of built in memory
+    STREAMING_THRESHOLD = int(os.environ.get('STREAMING_THRESHOLD', 500))
+    
+    # Responses smaller than COMPRESS_MIN_SIZE bytes are sent uncompressed; level 0 disables compression
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+    
+    # Cached report/list/PDF responses (also invalidated whenever their tables are written)
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    
+    # SQLite file databases: WAL with tuning pragmas, a read-only pool and one queued writer per process
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'false').lower() in ['true', 'on', '1']
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 16384))  # per connection
+    SQLITE_READ_POOL_SIZE = int(os.environ.get('SQLITE_READ_POOL_SIZE', 8))
+    SQLITE_WRITE_QUEUE_TIMEOUT = int(os.environ.get('SQLITE_WRITE_QUEUE_TIMEOUT', 30))
+    
+    # ANALYZE and WAL checkpoint interval (seconds, 0 disables); ANALYZE samples this many rows per index
+    SQLITE_MAINTENANCE_SECONDS = int(os.environ.get('SQLITE_MAINTENANCE_SECONDS', 900))
+    SQLITE_ANALYSIS_LIMIT = int(os.environ.get('SQLITE_ANALYSIS_LIMIT', 1000))
     
     # CORS settings
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000,http://127.0.0.1:3000').split(',')
@@ -25,19 +110,35 @@ class Config:
 
 class DevelopmentConfig(Config):
     """Development configuration"""
-    DEBUG = True
+    DEBUG = os.environ.get('FLASK_DEBUG', 'true').lower() in ['true', 'on', '1']
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///tex_sarthi_dev.db'
 
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///tex_sarthi.db'
+    SCHEMA_ON_STARTUP = os.environ.get('SCHEMA_ON_STARTUP', 'false').lower() in ['true', 'on', '1']
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'true').lower() in ['true', 'on', '1']
+    
+    # Per worker process (SQLite WAL mode replaces this with one writer and a read-only pool): each gthread worker shares one pool between its threads
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 5)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': True
+    }
 
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+    PRICE_INDEX_REFRESH_SECONDS = 0
+    STOCK_SNAPSHOT_INTERVAL_HOURS = 0
+    SIZE_CLUSTER_REFRESH_SECONDS = 0
+    REORDER_FORECAST_INTERVAL_HOURS = 0
 
 # Configuration dictionary
 config = {
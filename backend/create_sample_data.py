@@ -246,8 +246,9 @@ def create_sample_data():
 
 if __name__ == "__main__":
     # This script can be run independently to create sample data
-    from app import app
+    from app import create_app
     
+    app = create_app()
     with app.app_context():
         result = create_sample_data()
         print("Sample Data Creation Results:")
@@ -0,0 +1,262 @@
+"""
+TEX-SARTHI Cutting Plans
+Garment pieces derived from order measurements, packed onto fixed-width rolls
+with a first-fit decreasing-height shelf heuristic
+"""
+
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+INCH = 2.54
+SEAM = 1.5  # cm of seam allowance on every edge
+
+# Body measurements (inches) used when an order does not give them
+DEFAULT_MEASUREMENTS = {
+    'chest': 40, 'waist': 34, 'hip': 40, 'shoulder': 18, 'sleeve': 24, 'neck': 15.5, 'inseam': 31
+}
+
+# Other spellings seen in Order.measurements
+ALIASES = {'bust': 'chest', 'hips': 'hip', 'blouse_size': 'chest'}
+
+Piece = Tuple[str, int, Callable[[Dict], float], Callable[[Dict], float]]
+
+# name, count, width across the roll (cm), length along the roll (cm); m holds measurements in cm
+_SHIRT: List[Piece] = [
+    ('front', 2, lambda m: m['chest'] / 4 + 6, lambda m: m.get('length', 29 * INCH) + 4),
+    ('back', 1, lambda m: m['chest'] / 2 + 8, lambda m: m.get('length', 29 * INCH) + 4),
+    ('sleeve', 2, lambda m: m['chest'] / 3 + 6, lambda m: m['sleeve'] + 3),
+    ('collar', 2, lambda m: m['neck'] + 6, lambda m: 10),
+    ('cuff', 2, lambda m: 26, lambda m: 12)
+]
+_KURTA: List[Piece] = [
+    ('front', 1, lambda m: m['chest'] / 2 + 10, lambda m: m.get('length', 40 * INCH) + 4),
+    ('back', 1, lambda m: m['chest'] / 2 + 10, lambda m: m.get('length', 40 * INCH) + 4),
+    ('sleeve', 2, lambda m: m['chest'] / 3 + 6, lambda m: m['sleeve'] + 3),
+    ('placket', 1, lambda m: 8, lambda m: 30)
+]
+_PANT: List[Piece] = [
+    ('front', 2, lambda m: m['hip'] / 4 + 6, lambda m: m.get('length', m['inseam'] + 10 * INCH) + 4),
+    ('back', 2, lambda m: m['hip'] / 4 + 10, lambda m: m.get('length', m['inseam'] + 10 * INCH) + 6),
+    ('waistband', 1, lambda m: m['waist'] + 10, lambda m: 10)
+]
+_JACKET: List[Piece] = [
+    ('jacket front', 2, lambda m: m['chest'] / 4 + 9, lambda m: 30 * INCH + 4),
+    ('jacket back', 2, lambda m: m['chest'] / 4 + 6, lambda m: 30 * INCH + 4),
+    ('jacket sleeve', 2, lambda m: m['chest'] / 3 + 8, lambda m: m['sleeve'] + 4),
+    ('lapel', 2, lambda m: 14, lambda m: 45)
+]
+_BLOUSE: List[Piece] = [
+    ('front', 1, lambda m: m['chest'] / 2 + 6, lambda m: 40),
+    ('back', 1, lambda m: m['chest'] / 2 + 6, lambda m: 40),
+    ('sleeve', 2, lambda m: m['chest'] / 3 + 4, lambda m: 25)
+]
+_DRESS: List[Piece] = [
+    ('front', 1, lambda m: m['hip'] / 2 + 12, lambda m: m.get('length', 42 * INCH) + 5),
+    ('back', 1, lambda m: m['hip'] / 2 + 12, lambda m: m.get('length', 42 * INCH) + 5),
+    ('sleeve', 2, lambda m: m['chest'] / 3 + 4, lambda m: 25)
+]
+
+TEMPLATES: Dict[str, List[Piece]] = {
+    'shirt': _SHIRT,
+    'kurta': _KURTA,
+    'pant': _PANT,
+    'trouser': _PANT,
+    'pyjama': _PANT,
+    'salwar': _PANT,
+    'jacket': _JACKET,
+    'blazer': _JACKET,
+    'suit': _JACKET + _PANT,
+    'sherwani': _KURTA + _PANT,
+    'blouse': _BLOUSE,
+    'dress': _DRESS,
+    'lehenga': [('skirt panel', 6, lambda m: m['hip'] / 3 + 8, lambda m: m.get('length', 40 * INCH) + 6)] + _BLOUSE,
+    # A saree is one full-width length
+    'saree': [('saree', 1, lambda m: 0, lambda m: 550)]
+}
+
+
+def body_measurements(raw, fill_defaults: bool = True) -> Dict[str, float]:
+    """Order.measurements (JSON text or dict, inches unless marked cm) as cm, with defaults filled in"""
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw) if raw.strip() else {}
+        except ValueError:
+            raw = {}
+    if not isinstance(raw, dict):
+        raw = {}
+
+    values = {}
+    for key, value in raw.items():
+        key = ALIASES.get(str(key).strip().lower(), str(key).strip().lower())
+        if isinstance(value, dict):
+            number, unit = value.get('value'), value.get('unit', 'in')
+        else:
+            number, unit = value, 'in'
+        try:
+            number = float(number)
+        except (TypeError, ValueError):
+            continue  # e.g. "6_yards"
+        if number > 0:
+            values[key] = number if unit == 'cm' else number * INCH
+
+    if fill_defaults:
+        for key, inches in DEFAULT_MEASUREMENTS.items():
+            values.setdefault(key, inches * INCH)
+    return values
+
+
+def garment_pieces(order_type: Optional[str], measurements, quantity: int, roll_width: float) -> List[Tuple[str, float, float]]:
+    """(piece name, width cm, length cm) for every piece of an order, seam allowance included"""
+    template = TEMPLATES.get((order_type or '').strip().lower(), _SHIRT)
+    m = body_measurements(measurements)
+    pieces = []
+    for name, count, width, length in template:
+        w = width(m) or roll_width - 2 * SEAM  # width 0 means "full roll width"
+        piece = (name, round(w + 2 * SEAM, 1), round(length(m) + 2 * SEAM, 1))
+        pieces.extend([piece] * (count * max(int(quantity or 1), 1)))
+    return pieces
+
+
+def pack(pieces: List[Dict], roll_width: float, roll_length: float, allow_rotation: bool = False,
+         include_layout: bool = False) -> Dict:
+    """First-fit decreasing-height shelf packing of pieces ({width, length, ...} in cm) onto rolls.
+    Shelves run across the roll; a shelf is as long as its first (longest) piece."""
+    placed = []
+    oversize = []
+    for piece in pieces:
+        w, h = piece['width'], piece['length']
+        rotated = False
+        if allow_rotation:
+            # Lay the longer side along the roll when it fits; fewer, shorter shelves otherwise
+            if max(w, h) <= roll_width and w > h:
+                w, h, rotated = h, w, True
+            elif w > roll_width and h <= roll_width:
+                w, h, rotated = h, w, True
+        if w > roll_width or h > roll_length:
+            oversize.append(piece)
+            continue
+        placed.append((h, w, rotated, piece))
+
+    placed.sort(key=lambda p: (-p[0], -p[1]))
+
+    # Shelves are created in non-increasing height order, so only the free width decides the fit
+    n = len(placed)
+    free = np.zeros(n, dtype=float)
+    shelf_roll = np.zeros(n, dtype=int)
+    shelf_y = np.zeros(n, dtype=float)
+    shelves = 0
+    roll_used = [0.0]
+    roll_area = [0.0]
+    roll_pieces = [0]
+    layout = []
+
+    for h, w, rotated, piece in placed:
+        fits = np.flatnonzero(free[:shelves] >= w - 1e-9)
+        if fits.size:
+            shelf = fits[0]
+        else:
+            if roll_used[-1] + h > roll_length:
+                roll_used.append(0.0)
+                roll_area.append(0.0)
+                roll_pieces.append(0)
+            shelf = shelves
+            shelves += 1
+            free[shelf] = roll_width
+            shelf_roll[shelf] = len(roll_used) - 1
+            shelf_y[shelf] = roll_used[-1]
+            roll_used[-1] += h
+        x = roll_width - free[shelf]
+        free[shelf] -= w
+        if include_layout:
+            layout.append({
+                'roll': int(shelf_roll[shelf]) + 1,
+                'x_cm': round(float(x), 1),
+                'y_cm': round(float(shelf_y[shelf]), 1),
+                'width_cm': w,
+                'length_cm': h,
+                'rotated': rotated,
+                'order_id': piece.get('order_id'),
+                'piece': piece.get('name')
+            })
+        roll = int(shelf_roll[shelf])
+        roll_area[roll] += w * h
+        roll_pieces[roll] += 1
+        piece['_roll'] = roll
+
+    rolls = []
+    for index, used in enumerate(roll_used):
+        if not used:
+            continue
+        area = roll_area[index]
+        used_area = used * roll_width
+        rolls.append({
+            'roll': index + 1,
+            'metres_used': round(used / 100, 3),
+            'metres_remaining': round((roll_length - used) / 100, 3),
+            'pieces': roll_pieces[index],
+            'shelves': int(np.count_nonzero(shelf_roll[:shelves] == index)),
+            'piece_area_m2': round(area / 10000, 3),
+            'waste_m2': round((used_area - area) / 10000, 3),
+            'waste_percent': round((used_area - area) / used_area * 100, 2) if used_area else 0.0
+        })
+
+    result = {'rolls': rolls, 'oversize': oversize}
+    if include_layout:
+        result['layout'] = layout
+    return result
+
+
+def plan_cutting(orders: List[Dict], roll_width_cm: float, roll_length_m: float,
+                 allow_rotation: bool = False, include_layout: bool = False) -> Dict:
+    """Cutting plan for one fabric/colour batch of orders ({id, order_type, quantity, measurements})"""
+    pieces = []
+    for order in orders:
+        for name, width, length in garment_pieces(order['order_type'], order['measurements'],
+                                                  order['quantity'], roll_width_cm):
+            pieces.append({'order_id': order['id'], 'name': name, 'width': width, 'length': length})
+
+    packed = pack(pieces, roll_width_cm, roll_length_m * 100, allow_rotation, include_layout)
+
+    metres = sum(roll['metres_used'] for roll in packed['rolls'])
+    piece_area = sum(roll['piece_area_m2'] for roll in packed['rolls'])
+    used_area = metres * roll_width_cm / 100
+
+    # Share of consumed metres per order, in proportion to its piece area
+    order_area = {}
+    order_pieces = {}
+    for piece in pieces:
+        if '_roll' in piece:
+            order_area[piece['order_id']] = order_area.get(piece['order_id'], 0.0) + piece['width'] * piece['length'] / 10000
+            order_pieces[piece['order_id']] = order_pieces.get(piece['order_id'], 0) + 1
+
+    result = {
+        'orders': [
+            {
+                'order_id': order['id'],
+                'pieces': order_pieces.get(order['id'], 0),
+                'piece_area_m2': round(order_area.get(order['id'], 0.0), 3),
+                'metres': round(metres * order_area.get(order['id'], 0.0) / piece_area, 3) if piece_area else 0.0
+            }
+            for order in orders
+        ],
+        'rolls': packed['rolls'],
+        'summary': {
+            'pieces': len(pieces),
+            'rolls': len(packed['rolls']),
+            'metres_consumed': round(metres, 3),
+            'piece_area_m2': round(piece_area, 3),
+            'waste_m2': round(used_area - piece_area, 3),
+            'utilization_percent': round(piece_area / used_area * 100, 2) if used_area else 0.0,
+            'roll_width_cm': roll_width_cm,
+            'roll_length_m': roll_length_m
+        },
+        'oversize_pieces': [
+            {'order_id': p['order_id'], 'piece': p['name'], 'width_cm': p['width'], 'length_cm': p['length']}
+            for p in packed['oversize']
+        ]
+    }
+    if include_layout:
+        result['layout'] = packed['layout']
+    return result
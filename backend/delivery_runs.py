@@ -0,0 +1,364 @@
+"""
+TEX-SARTHI Delivery Runs
+Group a day's scheduled deliveries into pincode zones, split them into balanced
+runs per delivery person and order each run's stops nearest-neighbour first
+"""
+
+import math
+import re
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import case, delete, insert, select, update
+
+from models import Customer, Delivery, DeliveryRun, DeliveryRunStop, PincodeDistance, db
+
+# Estimated km between two pincodes by the number of leading digits they share
+# (6 = same post office, 3 = same sorting district, 1 = same postal region)
+SHARED_PREFIX_KM = np.array([300.0, 100.0, 30.0, 10.0, 5.0, 2.0, 0.0])
+
+# Between two stops at the same pincode
+SAME_PINCODE_KM = 0.5
+
+# A run may end this share of its target size early or late to avoid splitting a zone
+ZONE_SNAP = 0.2
+
+_PINCODE = re.compile(r'\b(\d{6})\b')
+
+# Run statuses a run may move to; anything past 'planned' is locked against replanning
+RUN_TRANSITIONS = {
+    'planned': ('dispatched',),
+    'dispatched': ('completed',),
+    'completed': ()
+}
+
+
+def normalize_pincode(pincode: Optional[str], address: Optional[str] = None) -> Optional[str]:
+    """Six-digit pincode from the customer record, else the first one in the delivery address"""
+    digits = re.sub(r'\D', '', pincode or '')
+    if len(digits) == 6:
+        return digits
+    match = _PINCODE.search(address or '')
+    return match.group(1) if match else None
+
+
+def zone_of(pincode: Optional[str], city: Optional[str]) -> str:
+    """Sorting district (first three pincode digits), else the city"""
+    if pincode:
+        return pincode[:3]
+    return f"city:{(city or '').strip().lower() or 'unknown'}"
+
+
+class DistanceTable:
+    """Distances between a set of pincodes: PincodeDistance rows where known, estimated otherwise"""
+
+    def __init__(self, pincodes: Sequence[str]):
+        self.pincodes = list(pincodes)
+        self.index = {pincode: i for i, pincode in enumerate(self.pincodes)}
+        codes = np.array([int(p) for p in self.pincodes], dtype=np.int64)
+
+        shared = np.zeros((len(codes), len(codes)), dtype=np.int64)
+        for digits in range(1, 7):
+            prefix = codes // 10 ** (6 - digits)
+            shared += prefix[:, None] == prefix[None, :]
+        self.matrix = SHARED_PREFIX_KM[shared]
+
+        if self.pincodes:
+            known = db.session.execute(
+                select(PincodeDistance.from_pincode, PincodeDistance.to_pincode, PincodeDistance.distance_km)
+                .where(PincodeDistance.from_pincode.in_(self.pincodes), PincodeDistance.to_pincode.in_(self.pincodes))
+            ).all()
+            for a, b, km in known:
+                i, j = self.index[a], self.index[b]
+                self.matrix[i, j] = self.matrix[j, i] = km
+
+    def from_point(self, pincode: Optional[str]) -> np.ndarray:
+        """Distances from a depot pincode (which need not be a stop) to every pincode"""
+        if not pincode:
+            return np.zeros(len(self.pincodes))
+        if pincode in self.index:
+            return self.matrix[self.index[pincode]].copy()
+        code = int(pincode)
+        codes = np.array([int(p) for p in self.pincodes], dtype=np.int64)
+        shared = sum((codes // 10 ** (6 - d)) == code // 10 ** (6 - d) for d in range(1, 7))
+        return SHARED_PREFIX_KM[shared]
+
+
+def nearest_neighbour(matrix: np.ndarray, members: List[int], start_costs: np.ndarray) -> Tuple[List[int], float]:
+    """Visit `members` (indices into matrix) closest-first from a start; returns order and km travelled"""
+    if not members:
+        return [], 0.0
+    members = np.asarray(members)
+    sub = matrix[np.ix_(members, members)]
+    visited = np.zeros(len(members), dtype=bool)
+
+    costs = start_costs[members].astype(float)
+    current = int(costs.argmin())
+    distance = float(costs[current])
+    order = [current]
+    visited[current] = True
+    for _ in range(len(members) - 1):
+        row = np.where(visited, np.inf, sub[current])
+        current = int(row.argmin())
+        distance += float(row[current])
+        order.append(current)
+        visited[current] = True
+    return [int(members[i]) for i in order], distance
+
+
+def load_stops(run_date: date) -> List[Dict]:
+    """Scheduled deliveries of the day that are not on a dispatched or completed run"""
+    locked = select(DeliveryRunStop.delivery_id).join(DeliveryRun, DeliveryRun.id == DeliveryRunStop.run_id) \
+        .where(DeliveryRun.status != 'planned')
+    rows = db.session.execute(
+        select(Delivery.id, Delivery.delivery_address, Customer.pincode, Customer.city)
+        .join(Customer, Customer.id == Delivery.customer_id)
+        .where(Delivery.delivery_date == run_date, Delivery.status == 'scheduled', Delivery.id.notin_(locked))
+        .order_by(Delivery.id)
+    ).all()
+
+    stops = []
+    for delivery_id, address, pincode, city in rows:
+        pincode = normalize_pincode(pincode, address)
+        stops.append({'delivery_id': delivery_id, 'pincode': pincode, 'zone': zone_of(pincode, city)})
+    return stops
+
+
+def _cut_points(zone_ends: List[int], total: int, runs: int, capacity: int) -> List[int]:
+    """End positions of each run over the zone-ordered stop sequence: balanced sizes,
+    moved to a zone boundary when one is close, never above capacity"""
+    cuts = []
+    start = 0
+    for remaining_runs in range(runs, 0, -1):
+        left = total - start
+        if left <= 0:
+            break
+        target = min(capacity, math.ceil(left / remaining_runs))
+        low = start + max(1, int(target * (1 - ZONE_SNAP)))
+        high = start + min(capacity, int(math.ceil(target * (1 + ZONE_SNAP))))
+        # Ending early must not push stops past the remaining runs' capacity
+        boundaries = [end for end in zone_ends
+                      if low <= end <= high and total - end <= capacity * (remaining_runs - 1)]
+        end = min(boundaries, key=lambda e: abs(e - start - target)) if boundaries else start + target
+        end = min(end, total)
+        cuts.append(end)
+        start = end
+    return cuts
+
+
+def plan_runs(stops: List[Dict], delivery_persons: List[str], capacity: int,
+              depot: Optional[str] = None) -> Dict:
+    """Balanced, capacity-limited runs; stops beyond the total capacity are left unassigned"""
+    located = [stop for stop in stops if stop['pincode']]
+    unlocated = [stop for stop in stops if not stop['pincode']]
+
+    table = DistanceTable(sorted({stop['pincode'] for stop in located}))
+    at_pincode: Dict[int, List[Dict]] = {}
+    for stop in located:
+        at_pincode.setdefault(table.index[stop['pincode']], []).append(stop)
+
+    # Sweep zones nearest-first from the depot, and the pincodes of each zone likewise
+    zone_members: Dict[str, List[int]] = {}
+    for i, pincode in enumerate(table.pincodes):
+        zone_members.setdefault(pincode[:3], []).append(i)
+    position = table.from_point(depot)
+    sequence: List[Dict] = []
+    zone_ends: List[int] = []
+    pending = dict(zone_members)
+    while pending:
+        zone = min(pending, key=lambda z: position[pending[z]].min())
+        order, _ = nearest_neighbour(table.matrix, pending.pop(zone), position)
+        for i in order:
+            sequence.extend(at_pincode[i])
+        zone_ends.append(len(sequence))
+        position = table.matrix[order[-1]]
+
+    # Stops without a pincode go last, grouped by city
+    for zone in sorted({stop['zone'] for stop in unlocated}):
+        sequence.extend(stop for stop in unlocated if stop['zone'] == zone)
+        zone_ends.append(len(sequence))
+
+    total = min(len(sequence), capacity * len(delivery_persons))
+    cuts = _cut_points(zone_ends, total, len(delivery_persons), capacity)
+
+    start_costs = table.from_point(depot)
+    runs = []
+    start = 0
+    for person, end in zip(delivery_persons, cuts):
+        chunk = sequence[start:end]
+        start = end
+        members = sorted({table.index[stop['pincode']] for stop in chunk if stop['pincode']})
+        order, distance = nearest_neighbour(table.matrix, members, start_costs)
+
+        in_chunk = {stop['delivery_id'] for stop in chunk}
+        ordered = [stop for i in order for stop in at_pincode[i] if stop['delivery_id'] in in_chunk]
+        distance += SAME_PINCODE_KM * (len(ordered) - len(order))
+        ordered.extend(stop for stop in chunk if not stop['pincode'])
+
+        zones = []
+        for stop in ordered:
+            if stop['zone'] not in zones:
+                zones.append(stop['zone'])
+        runs.append({
+            'delivery_person': person,
+            'zones': zones,
+            'stop_count': len(ordered),
+            'distance_km': round(distance, 1),
+            'stops': [
+                {'sequence': n + 1, 'delivery_id': stop['delivery_id'], 'pincode': stop['pincode']}
+                for n, stop in enumerate(ordered)
+            ]
+        })
+
+    return {
+        'runs': runs,
+        'unassigned': [stop['delivery_id'] for stop in sequence[start:]],
+        'zones': len(zone_ends)
+    }
+
+
+def save_runs(run_date: date, runs: List[Dict]) -> List[int]:
+    """Replace the day's planned runs and set each delivery's delivery_person, in one transaction.
+    Deliveries that were on a replaced run but are not in the new plan lose their delivery_person."""
+    planned = select(DeliveryRun.id).where(DeliveryRun.run_date == run_date, DeliveryRun.status == 'planned')
+    previous = set(db.session.execute(
+        select(DeliveryRunStop.delivery_id).where(DeliveryRunStop.run_id.in_(planned))
+    ).scalars())
+    db.session.execute(delete(DeliveryRunStop).where(DeliveryRunStop.run_id.in_(planned)))
+    db.session.execute(delete(DeliveryRun).where(DeliveryRun.run_date == run_date, DeliveryRun.status == 'planned'))
+
+    run_ids = []
+    stops = []
+    assignments = {}
+    for run in runs:
+        if not run['stops']:
+            continue
+        record = DeliveryRun(
+            run_date=run_date,
+            delivery_person=run['delivery_person'],
+            zones=','.join(run['zones'])[:255],
+            stop_count=run['stop_count'],
+            distance_km=run['distance_km']
+        )
+        db.session.add(record)
+        db.session.flush()
+        run['id'] = record.id
+        run_ids.append(record.id)
+        for stop in run['stops']:
+            stops.append(dict(stop, run_id=record.id))
+            assignments[stop['delivery_id']] = run['delivery_person']
+
+    if stops:
+        db.session.execute(insert(DeliveryRunStop), stops)
+        db.session.execute(
+            update(Delivery)
+            .where(Delivery.id.in_(list(assignments)))
+            .values(delivery_person=case(assignments, value=Delivery.id))
+            .execution_options(synchronize_session=False)
+        )
+    dropped = previous - set(assignments)
+    if dropped:
+        # Over capacity or their person left the plan: unassigned until the next plan
+        db.session.execute(
+            update(Delivery)
+            .where(Delivery.id.in_(list(dropped)), Delivery.status == 'scheduled')
+            .values(delivery_person=None)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return run_ids
+
+
+def plan_day(run_date: date, delivery_persons: Optional[List[str]] = None, capacity: Optional[int] = None,
+             dry_run: bool = False) -> Dict:
+    """Plan (and unless dry_run, save) the runs of a day"""
+    capacity = capacity or current_app.config.get('DELIVERY_RUN_CAPACITY', 30)
+    stops = load_stops(run_date)
+
+    if not delivery_persons:
+        delivery_persons = sorted(set(db.session.execute(
+            select(Delivery.delivery_person).distinct()
+            .where(Delivery.delivery_date == run_date, Delivery.delivery_person.isnot(None),
+                   Delivery.delivery_person != '')
+        ).scalars()))
+    if not delivery_persons:
+        raise ValueError('delivery_persons is required (no delivery person is assigned on this date)')
+
+    result = plan_runs(stops, delivery_persons, capacity, current_app.config.get('DELIVERY_DEPOT_PINCODE') or None)
+    if not dry_run:
+        save_runs(run_date, result['runs'])
+
+    result.update({
+        'date': run_date.isoformat(),
+        'dry_run': dry_run,
+        'capacity': capacity,
+        'stops': len(stops),
+        'assigned': sum(run['stop_count'] for run in result['runs'])
+    })
+    return result
+
+
+def set_run_status(run_id: int, status: str) -> Optional[DeliveryRun]:
+    """Move a run along RUN_TRANSITIONS (None if it does not exist; ValueError if not allowed).
+    Dispatching puts the run's scheduled deliveries in transit, so replanning leaves them alone."""
+    run = db.session.get(DeliveryRun, run_id)
+    if run is None:
+        return None
+    if status not in RUN_TRANSITIONS:
+        raise ValueError(f'Invalid status. Must be one of: {", ".join(RUN_TRANSITIONS)}')
+    if status not in RUN_TRANSITIONS[run.status]:
+        raise ValueError(f'A {run.status} run cannot become {status}')
+
+    run.status = status
+    if status == 'dispatched':
+        on_run = select(DeliveryRunStop.delivery_id).where(DeliveryRunStop.run_id == run_id)
+        db.session.execute(
+            update(Delivery)
+            .where(Delivery.id.in_(on_run), Delivery.status == 'scheduled')
+            .values(status='in_transit')
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return run
+
+
+def runs_with_stops(run_date: Optional[date] = None, delivery_person: Optional[str] = None,
+                    run_id: Optional[int] = None) -> List[Dict]:
+    """Saved runs with their ordered stops and delivery details, in two queries"""
+    query = select(DeliveryRun)
+    if run_id is not None:
+        query = query.where(DeliveryRun.id == run_id)
+    if run_date is not None:
+        query = query.where(DeliveryRun.run_date == run_date)
+    if delivery_person:
+        query = query.where(DeliveryRun.delivery_person == delivery_person)
+    runs = db.session.execute(query.order_by(DeliveryRun.run_date, DeliveryRun.delivery_person)).scalars().all()
+    if not runs:
+        return []
+
+    result = {run.id: dict(run.to_dict(), stops=[]) for run in runs}
+    rows = db.session.execute(
+        select(
+            DeliveryRunStop.run_id, DeliveryRunStop.sequence, DeliveryRunStop.pincode,
+            Delivery.id, Delivery.delivery_number, Delivery.delivery_address, Delivery.status,
+            Customer.name, Customer.phone
+        )
+        .join(Delivery, Delivery.id == DeliveryRunStop.delivery_id)
+        .join(Customer, Customer.id == Delivery.customer_id)
+        .where(DeliveryRunStop.run_id.in_(list(result)))
+        .order_by(DeliveryRunStop.run_id, DeliveryRunStop.sequence)
+    ).all()
+    for run_id_, sequence, pincode, delivery_id, number, address, status, name, phone in rows:
+        result[run_id_]['stops'].append({
+            'sequence': sequence,
+            'delivery_id': delivery_id,
+            'delivery_number': number,
+            'customer_name': name,
+            'customer_phone': phone,
+            'delivery_address': address,
+            'pincode': pincode,
+            'status': status
+        })
+    return list(result.values())
@@ -0,0 +1,262 @@
+"""
+TEX-SARTHI Fabric Reservations
+Match open orders to fabric stock by fabric and colour, reserve the metres they
+need in one pass, and turn reservations into ledger movements when cutting starts
+"""
+
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+
+from models import FabricReservation, InventoryItem, Order, db
+from notes_parser import garments_in
+from stock_ledger import apply_movements
+
+# Metres of fabric per garment; FABRIC_CONSUMPTION in the app config overrides entries
+DEFAULT_CONSUMPTION = {
+    'shirt': 2.5,
+    'pant': 1.5,
+    'trouser': 1.5,
+    'kurta': 2.75,
+    'pyjama': 2.0,
+    'suit': 3.5,
+    'blazer': 2.0,
+    'jacket': 2.0,
+    'sherwani': 4.0,
+    'dress': 3.0,
+    'blouse': 1.0,
+    'saree': 5.5,
+    'lehenga': 6.0,
+    'salwar': 2.5,
+    'default': 2.5
+}
+
+OPEN_STATUSES = ('pending', 'in_progress')
+ACTIVE_STATUSES = ('reserved', 'allocated')
+
+# Inventory colours that match any requested colour
+WILDCARD_COLORS = {'', 'various', 'assorted', 'multi', 'multicolor', 'any'}
+
+_WORD = re.compile(r'[a-z]+')
+
+
+def consumption_table() -> Dict[str, float]:
+    table = dict(DEFAULT_CONSUMPTION)
+    table.update({k.lower(): float(v) for k, v in current_app.config.get('FABRIC_CONSUMPTION', {}).items()})
+    return table
+
+
+def required_metres(order_type: Optional[str], quantity: Optional[int], table: Dict[str, float]) -> float:
+    """Metres an order needs: per-garment consumption times quantity. Order types are matched
+    as written first, then by the canonical garments they name ("Men's Shirts" -> shirt);
+    a set such as "Suit and Shirt" needs the fabric of each"""
+    per_garment = table.get((order_type or '').strip().lower())
+    if per_garment is None:
+        garments = [garment for garment in garments_in(order_type) if garment in table]
+        per_garment = sum(table[garment] for garment in garments) if garments else table['default']
+    return round(per_garment * max(int(quantity or 1), 1), 2)
+
+
+class FabricMatcher:
+    """Token index over fabric items; candidates are cached per (fabric, colour)"""
+
+    def __init__(self, items):
+        self.by_token: Dict[str, List[Tuple[int, str]]] = {}
+        for item_id, item_name, color in items:
+            entry = (item_id, (color or '').strip().lower())
+            for token in set(_WORD.findall((item_name or '').lower())):
+                self.by_token.setdefault(token, []).append(entry)
+        self._cache: Dict[Tuple[str, str], Tuple[List[int], List[int]]] = {}
+
+    def candidates(self, fabric: Optional[str], color: Optional[str]) -> Tuple[List[int], List[int]]:
+        """(items in the requested colour, items of any colour) whose name mentions every fabric word"""
+        key = ((fabric or '').strip().lower(), (color or '').strip().lower())
+        if key not in self._cache:
+            words = _WORD.findall(key[0])
+            matched = None
+            for word in words:
+                ids = {entry for entry in self.by_token.get(word, [])}
+                matched = ids if matched is None else matched & ids
+            matched = sorted(matched or [])
+            exact = [item_id for item_id, item_color in matched if key[1] and item_color == key[1]]
+            wildcard = [item_id for item_id, item_color in matched if item_color in WILDCARD_COLORS or not key[1]]
+            self._cache[key] = (exact, wildcard)
+        return self._cache[key]
+
+
+def lock_fabric_stock():
+    """Take the fabric rows FOR UPDATE (in SQLite WAL mode, the writer's lock) until commit"""
+    db.session.execute(
+        select(InventoryItem.id).where(func.lower(InventoryItem.type) == 'fabric').with_for_update()
+    ).all()
+
+
+def release_closed_orders() -> int:
+    """Release reservations whose orders are no longer open"""
+    closed = select(Order.id).where(Order.status.notin_(OPEN_STATUSES))
+    return db.session.execute(
+        update(FabricReservation)
+        .where(FabricReservation.status == 'reserved', FabricReservation.order_id.in_(closed))
+        .values(status='released')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def availability(item_ids: Optional[List[int]] = None) -> Dict[int, Dict]:
+    """Stock, reserved metres and free metres per fabric item, in two queries"""
+    items_query = select(InventoryItem.id, InventoryItem.item_name, InventoryItem.color, InventoryItem.current_stock) \
+        .where(func.lower(InventoryItem.type) == 'fabric')
+    reserved_query = select(FabricReservation.item_id, func.sum(FabricReservation.quantity)) \
+        .where(FabricReservation.status == 'reserved').group_by(FabricReservation.item_id)
+    if item_ids:
+        items_query = items_query.where(InventoryItem.id.in_(item_ids))
+        reserved_query = reserved_query.where(FabricReservation.item_id.in_(item_ids))
+
+    reserved = dict(db.session.execute(reserved_query).all())
+    result = {}
+    for item_id, item_name, color, stock in db.session.execute(items_query):
+        held = float(reserved.get(item_id) or 0)
+        result[item_id] = {
+            'item_id': item_id,
+            'item_name': item_name,
+            'color': color,
+            'current_stock': stock or 0,
+            'reserved': round(held, 2),
+            'available': round((stock or 0) - held, 2)
+        }
+    return result
+
+
+def run_reservations(order_ids: Optional[List[int]] = None, dry_run: bool = False) -> Dict:
+    """Reserve fabric for every open order without one, earliest delivery first.
+    Orders are reserved whole or not at all; the rest are reported as shortages.
+    A real run locks the fabric rows first, so overlapping runs take turns instead of
+    reserving from the same free stock; the unique index on active reservations per
+    order is the backstop (IntegrityError, rolled back by the caller)."""
+    if not dry_run:
+        lock_fabric_stock()
+    released = 0 if dry_run else release_closed_orders()
+
+    stock = availability()
+    available = {item_id: entry['available'] for item_id, entry in stock.items()}
+    matcher = FabricMatcher((entry['item_id'], entry['item_name'], entry['color']) for entry in stock.values())
+    table = consumption_table()
+
+    already = set(db.session.execute(
+        select(FabricReservation.order_id).where(FabricReservation.status.in_(ACTIVE_STATUSES))
+    ).scalars())
+
+    orders_query = select(Order.id, Order.order_type, Order.fabric, Order.color, Order.quantity) \
+        .where(Order.status.in_(OPEN_STATUSES)) \
+        .order_by(Order.delivery_date.is_(None), Order.delivery_date, Order.created_at, Order.id)
+    if order_ids:
+        orders_query = orders_query.where(Order.id.in_(order_ids))
+
+    reservations = []
+    shortages: Dict[int, Dict] = {}
+    unmatched: Dict[Tuple[str, str], Dict] = {}
+    skipped = 0
+
+    for order_id, order_type, fabric, color, quantity in db.session.execute(orders_query):
+        if order_id in already:
+            skipped += 1
+            continue
+
+        need = required_metres(order_type, quantity, table)
+        exact, wildcard = matcher.candidates(fabric, color)
+        if not exact and not wildcard:
+            key = ((fabric or '').strip().lower(), (color or '').strip().lower())
+            group = unmatched.setdefault(key, {'fabric': key[0], 'color': key[1], 'metres': 0.0, 'order_ids': []})
+            group['metres'] = round(group['metres'] + need, 2)
+            group['order_ids'].append(order_id)
+            continue
+
+        # Same colour first, then wildcard colours; within a group, the item with most free stock
+        pick = None
+        for group in (exact, wildcard):
+            fits = [item_id for item_id in group if available[item_id] >= need]
+            if fits:
+                pick = max(fits, key=lambda item_id: available[item_id])
+                break
+
+        if pick is None:
+            short_item = max(exact or wildcard, key=lambda item_id: available[item_id])
+            entry = shortages.setdefault(short_item, {
+                'item_id': short_item,
+                'item_name': stock[short_item]['item_name'],
+                'color': stock[short_item]['color'],
+                'requested': 0.0,
+                'order_ids': []
+            })
+            entry['requested'] = round(entry['requested'] + need, 2)
+            entry['order_ids'].append(order_id)
+            continue
+
+        available[pick] = round(available[pick] - need, 2)
+        reservations.append({'order_id': order_id, 'item_id': pick, 'quantity': need, 'status': 'reserved'})
+
+    for entry in shortages.values():
+        entry['available'] = max(available[entry['item_id']], 0)
+        entry['shortage'] = round(entry['requested'] - entry['available'], 2)
+
+    if not dry_run:
+        if reservations:
+            db.session.execute(insert(FabricReservation), reservations)
+        db.session.commit()
+
+    return {
+        'dry_run': dry_run,
+        'reserved_orders': len(reservations),
+        'reserved_metres': round(sum(r['quantity'] for r in reservations), 2),
+        'already_reserved': skipped,
+        'released': released,
+        'reservations': reservations,
+        'shortages': sorted(shortages.values(), key=lambda e: -e['shortage']),
+        'unmatched': list(unmatched.values())
+    }
+
+
+def allocate_reservations(order_ids: List[int], user_id: Optional[int] = None) -> Dict:
+    """Consume reserved fabric for orders going to cutting: one ledger batch, whole metres rounded up"""
+    rows = db.session.execute(
+        select(FabricReservation.id, FabricReservation.order_id, FabricReservation.item_id, FabricReservation.quantity)
+        .where(FabricReservation.status == 'reserved', FabricReservation.order_id.in_(order_ids))
+        .order_by(FabricReservation.id)
+    ).all()
+    if not rows:
+        return {'allocated': 0, 'items': []}
+
+    balances = apply_movements([
+        {
+            'item_id': item_id,
+            'delta': -math.ceil(quantity),
+            'reason': 'cutting',
+            'order_id': order_id,
+            'note': f'Fabric reservation {reservation_id}'
+        }
+        for reservation_id, order_id, item_id, quantity in rows
+    ], user_id=user_id)
+
+    db.session.execute(
+        update(FabricReservation)
+        .where(FabricReservation.id.in_([row[0] for row in rows]))
+        .values(status='allocated')
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return {'allocated': len(rows), 'items': list(balances.values())}
+
+
+def release_reservations(order_ids: List[int]) -> int:
+    """Give reserved fabric back to the pool"""
+    released = db.session.execute(
+        update(FabricReservation)
+        .where(FabricReservation.status == 'reserved', FabricReservation.order_id.in_(order_ids))
+        .values(status='released')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return released
@@ -0,0 +1,39 @@
+"""
+TEX-SARTHI Gunicorn Configuration
+Threaded workers with the app preloaded in the master, recycled after a bounded
+number of requests; every value can be overridden from the environment
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 3000)}")
+
+# gthread: requests mostly wait on the database, so a few processes with several threads each
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Import the app once in the master; workers fork with routes, serializers and config ready
+preload_app = True
+
+# Recycle workers to bound memory growth; jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG')  # e.g. '-' for stdout
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """Drop database connections and password-hash threads inherited from the master;
+    the worker opens its own"""
+    from passwords import reset_pool_after_fork
+    from sqlite_mode import dispose_engines
+    dispose_engines(worker.app.wsgi(), close=False)
+    reset_pool_after_fork()
@@ -4,11 +4,14 @@ Database initialization script for TEX-SARTHI Backend
 Run this to initialize the database with sample data
 """
 
-from app import app, db
-from models import User, Customer, InventoryItem, Order, Invoice, Delivery, Settings
+from app import create_app
+from migrations import upgrade_schema
+from models import db, User, Customer, InventoryItem, Order, Invoice, Delivery, Settings
 from datetime import datetime, date, timedelta
 import uuid
 
+app = create_app()
+
 def generate_order_number():
     """Generate unique order number"""
     return f"ORD-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
@@ -28,7 +31,7 @@ def init_database():
         print("Dropping existing tables...")
         db.drop_all()
         print("Creating new tables...")
-        db.create_all()
+        upgrade_schema(db.engine)
         
         # Create admin user
         print("Creating admin user...")
@@ -0,0 +1,142 @@
+"""
+TEX-SARTHI Schema Migrations
+Idempotent, additive changes for databases created before a column or index
+existed (db.create_all() only creates missing tables, never missing columns),
+skipped entirely when the stored schema version is current
+"""
+
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import func, inspect, select, update
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateColumn
+
+from models import Delivery, FabricReservation, InventoryItem, Order, SchemaVersion, db
+from stock_ledger import low_stock_flag, stock_status
+
+logger = logging.getLogger(__name__)
+
+
+# Bump whenever a model, COLUMNS or INDEXES changes, so existing databases are upgraded on next start
+SCHEMA_VERSION = 2
+
+
+def _backfill_stock_state(connection):
+    table = InventoryItem.__table__
+    stock = func.coalesce(table.c.current_stock, 0)
+    connection.execute(update(table).values(
+        status=stock_status(stock, table.c.min_stock),
+        is_low_stock=low_stock_flag(stock, table.c.min_stock),
+        updated_at=table.c.updated_at  # a backfill is not an edit
+    ))
+
+
+def _release_duplicate_reservations(connection):
+    # Keep the oldest active reservation of each order; later duplicates go back to the pool
+    table = FabricReservation.__table__
+    active = table.c.status.in_(('reserved', 'allocated'))
+    keep = select(func.min(table.c.id)).where(active).group_by(table.c.order_id)
+    connection.execute(update(table).where(active, table.c.status == 'reserved', table.c.id.notin_(keep))
+                       .values(status='released'))
+
+
+# (column, backfill run once when the column is added), in the order they were introduced
+COLUMNS = [
+    (InventoryItem.__table__.c.is_low_stock, _backfill_stock_state),
+]
+
+_INDEX_NAMES = (
+    'ix_inventory_items_low_stock',
+    'ix_orders_delivery_date_status',
+    'ix_deliveries_delivery_date_status',
+    'ux_fabric_reservations_active_order',
+)
+
+INDEXES = [
+    index
+    for table in (InventoryItem.__table__, Order.__table__, Delivery.__table__, FabricReservation.__table__)
+    for index in table.indexes if index.name in _INDEX_NAMES
+]
+
+# Run before a unique index is created, so existing rows satisfy it
+INDEX_PREPARE = {
+    'ux_fabric_reservations_active_order': _release_duplicate_reservations,
+}
+
+
+def run_migrations(engine) -> list:
+    """Add missing columns and indexes; returns what was applied"""
+    applied = []
+
+    with engine.begin() as connection:
+        # Inspect on the same connection: a single-writer pool has no second one to lend
+        inspector = inspect(connection)
+        for column, backfill in COLUMNS:
+            table = column.table.name
+            if not inspector.has_table(table):
+                continue  # create_all() will create it complete
+            if column.name in {c['name'] for c in inspector.get_columns(table)}:
+                continue
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            connection.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {ddl}')
+            if backfill:
+                backfill(connection)
+            applied.append(f'{table}.{column.name}')
+
+        for index in INDEXES:
+            if inspector.has_table(index.table.name):
+                existing = {i['name'] for i in inspector.get_indexes(index.table.name)}
+                if index.name not in existing:
+                    if index.name in INDEX_PREPARE:
+                        INDEX_PREPARE[index.name](connection)
+                    index.create(connection)
+                    applied.append(index.name)
+
+    return applied
+
+
+def stored_version(engine) -> Optional[int]:
+    """Schema version recorded in the database (None before the first upgrade); one SELECT"""
+    with engine.connect() as connection:
+        try:
+            return connection.execute(select(SchemaVersion.version).where(SchemaVersion.id == 1)).scalar()
+        except (OperationalError, ProgrammingError):
+            return None  # no schema_version table yet
+
+
+def upgrade_schema(engine) -> list:
+    """Create missing tables, apply COLUMNS and INDEXES and record SCHEMA_VERSION"""
+    db.metadata.create_all(engine)
+    applied = run_migrations(engine)
+    table = SchemaVersion.__table__
+    with engine.begin() as connection:
+        if connection.execute(update(table).where(table.c.id == 1).values(
+                version=SCHEMA_VERSION, applied_at=datetime.utcnow())).rowcount == 0:
+            connection.execute(table.insert().values(id=1, version=SCHEMA_VERSION, applied_at=datetime.utcnow()))
+    return applied
+
+
+def check_schema(app, upgrade: bool = True) -> bool:
+    """Compare the stored schema version with SCHEMA_VERSION and upgrade when behind (if allowed).
+    Returns True when an upgrade ran."""
+    with app.app_context():
+        try:
+            version = stored_version(db.engine)
+            if version == SCHEMA_VERSION:
+                return False
+            if version is not None and version > SCHEMA_VERSION:
+                logger.warning(f"Database schema version {version} is newer than this code ({SCHEMA_VERSION})")
+                return False
+            if not upgrade:
+                logger.error(f"Database schema version {version} is behind {SCHEMA_VERSION}; "
+                             f"run `flask --app wsgi init-db`")
+                return False
+            for change in upgrade_schema(db.engine):
+                logger.info(f"Applied schema change: {change}")
+            logger.info(f"Database schema at version {SCHEMA_VERSION}")
+            return True
+        except Exception as e:
+            logger.error(f"Schema migration failed: {str(e)}")
+            return False
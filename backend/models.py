@@ -1,8 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import hash_password, verify_password
+from sqlite_mode import RoutingSession
 
-db = SQLAlchemy()
+# RoutingSession only changes anything when SQLite WAL mode is on (see sqlite_mode.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -16,10 +19,10 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def set_password(self, password):
-        self.password = generate_password_hash(password)
+        self.password = hash_password(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
     
     def to_dict(self):
         return {
@@ -31,6 +34,33 @@ class User(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class ApiKey(db.Model):
+    __tablename__ = 'api_keys'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    prefix = db.Column(db.String(16), unique=True, nullable=False, index=True)  # public part of the key
+    key_hash = db.Column(db.String(64), nullable=False)  # HMAC-SHA256 hex of the whole key
+    scopes = db.Column(db.String(500), nullable=False, default='')  # comma-separated, e.g. reports:read
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # requests act as this user
+    expires_at = db.Column(db.DateTime)
+    revoked_at = db.Column(db.DateTime)
+    last_used_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'prefix': self.prefix,
+            'scopes': self.scopes.split(',') if self.scopes else [],
+            'user_id': self.user_id,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+            'revoked_at': self.revoked_at.isoformat() if self.revoked_at else None,
+            'last_used_at': self.last_used_at.isoformat() if self.last_used_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 class Customer(db.Model):
     __tablename__ = 'customers'
     
@@ -85,7 +115,8 @@ class InventoryItem(db.Model):
     min_stock = db.Column(db.Integer, default=0)
     cost_per_unit = db.Column(db.Float, default=0.0)
     supplier = db.Column(db.String(100))
-    status = db.Column(db.String(20), default='in_stock')
+    status = db.Column(db.String(20), default='in_stock')  # derived from stock, see refresh_stock_state()
+    is_low_stock = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -93,6 +124,17 @@ class InventoryItem(db.Model):
     def total_value(self):
         return self.current_stock * self.cost_per_unit
     
+    def refresh_stock_state(self):
+        """Derive status and is_low_stock from current_stock and min_stock"""
+        stock = self.current_stock or 0
+        self.is_low_stock = stock <= (self.min_stock or 0)
+        if stock <= 0:
+            self.status = 'out_of_stock'
+        elif self.is_low_stock:
+            self.status = 'low_stock'
+        else:
+            self.status = 'in_stock'
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -105,12 +147,144 @@ class InventoryItem(db.Model):
             'total_value': self.total_value,
             'supplier': self.supplier,
             'status': self.status,
+            'is_low_stock': self.is_low_stock,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+# Low-stock lists and counts read only this partial index
+db.Index(
+    'ix_inventory_items_low_stock',
+    InventoryItem.current_stock,
+    postgresql_where=InventoryItem.is_low_stock == True,
+    sqlite_where=InventoryItem.is_low_stock == True
+)
+
+@event.listens_for(InventoryItem, 'before_insert')
+def _stock_state_on_insert(mapper, connection, target):
+    target.refresh_stock_state()
+
+@event.listens_for(InventoryItem, 'before_update')
+def _stock_state_on_update(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.current_stock.history.has_changes() or state.attrs.min_stock.history.has_changes():
+        target.refresh_stock_state()
+
+class StockMovement(db.Model):
+    __tablename__ = 'stock_movements'
+    __table_args__ = (
+        db.Index('ix_stock_movements_item_created', 'item_id', 'created_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    balance_after = db.Column(db.Integer)
+    reason = db.Column(db.String(30), nullable=False, default='adjustment')  # purchase, cutting, sale, return, wastage, adjustment, initial
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    note = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'item_id': self.item_id,
+            'delta': self.delta,
+            'balance_after': self.balance_after,
+            'reason': self.reason,
+            'order_id': self.order_id,
+            'user_id': self.user_id,
+            'note': self.note,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class StockSnapshot(db.Model):
+    __tablename__ = 'stock_snapshots'
+    __table_args__ = (
+        db.Index('ix_stock_snapshots_item_taken', 'item_id', 'taken_at'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    last_movement_id = db.Column(db.Integer, nullable=False, default=0)  # ledger high-water mark at snapshot time
+    taken_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class FabricReservation(db.Model):
+    __tablename__ = 'fabric_reservations'
+    __table_args__ = (
+        db.Index('ix_fabric_reservations_item_status', 'item_id', 'status'),
+        db.Index('ix_fabric_reservations_order_status', 'order_id', 'status'),
+        # At most one active reservation per order, however many runs overlap
+        db.Index('ux_fabric_reservations_active_order', 'order_id', unique=True,
+                 sqlite_where=db.text("status IN ('reserved', 'allocated')"),
+                 postgresql_where=db.text("status IN ('reserved', 'allocated')")),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), nullable=False)
+    quantity = db.Column(db.Float, nullable=False)  # metres
+    status = db.Column(db.String(20), nullable=False, default='reserved')  # reserved, allocated, released
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'order_id': self.order_id,
+            'item_id': self.item_id,
+            'quantity': self.quantity,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+class ReorderSuggestion(db.Model):
+    __tablename__ = 'reorder_suggestions'
+    
+    # Rewritten as a whole by each forecasting run (see reorder_forecast.py)
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('inventory_items.id'), nullable=False, unique=True)
+    supplier = db.Column(db.String(100))
+    current_stock = db.Column(db.Integer, nullable=False, default=0)
+    min_stock = db.Column(db.Integer, nullable=False, default=0)
+    reserved = db.Column(db.Float, nullable=False, default=0.0)
+    daily_usage = db.Column(db.Float, nullable=False, default=0.0)  # smoothed units per day
+    usage_std = db.Column(db.Float, nullable=False, default=0.0)
+    lead_time_days = db.Column(db.Integer, nullable=False)
+    reorder_point = db.Column(db.Integer, nullable=False)
+    reorder_quantity = db.Column(db.Integer, nullable=False, default=0)
+    days_of_cover = db.Column(db.Float)  # None when nothing is consumed
+    needs_reorder = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    estimated_cost = db.Column(db.Float, nullable=False, default=0.0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def to_dict(self):
+        return {
+            'item_id': self.item_id,
+            'supplier': self.supplier,
+            'current_stock': self.current_stock,
+            'min_stock': self.min_stock,
+            'reserved': self.reserved,
+            'daily_usage': self.daily_usage,
+            'usage_std': self.usage_std,
+            'lead_time_days': self.lead_time_days,
+            'reorder_point': self.reorder_point,
+            'reorder_quantity': self.reorder_quantity,
+            'days_of_cover': self.days_of_cover,
+            'needs_reorder': self.needs_reorder,
+            'estimated_cost': self.estimated_cost,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
+
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        # Covers the calendar's GROUP BY delivery_date, status with its sums
+        db.Index('ix_orders_delivery_date_status', 'delivery_date', 'status', 'order_value', 'advance_payment'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -191,6 +365,9 @@ class Invoice(db.Model):
 
 class Delivery(db.Model):
     __tablename__ = 'deliveries'
+    __table_args__ = (
+        db.Index('ix_deliveries_delivery_date_status', 'delivery_date', 'status'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     delivery_number = db.Column(db.String(50), unique=True, nullable=False)
@@ -221,6 +398,55 @@ class Delivery(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class DeliveryRun(db.Model):
+    __tablename__ = 'delivery_runs'
+    __table_args__ = (
+        db.Index('ix_delivery_runs_date_person', 'run_date', 'delivery_person'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_date = db.Column(db.Date, nullable=False)
+    delivery_person = db.Column(db.String(100), nullable=False)
+    zones = db.Column(db.String(255))  # comma-separated zone keys, in visiting order
+    stop_count = db.Column(db.Integer, nullable=False, default=0)
+    distance_km = db.Column(db.Float, nullable=False, default=0.0)  # estimated
+    status = db.Column(db.String(20), nullable=False, default='planned')  # planned, dispatched, completed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    stops = db.relationship('DeliveryRunStop', backref='run', lazy=True, order_by='DeliveryRunStop.sequence')
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'run_date': self.run_date.isoformat() if self.run_date else None,
+            'delivery_person': self.delivery_person,
+            'zones': self.zones.split(',') if self.zones else [],
+            'stop_count': self.stop_count,
+            'distance_km': self.distance_km,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class DeliveryRunStop(db.Model):
+    __tablename__ = 'delivery_run_stops'
+    __table_args__ = (
+        db.Index('ix_delivery_run_stops_run_sequence', 'run_id', 'sequence'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('delivery_runs.id'), nullable=False)
+    delivery_id = db.Column(db.Integer, db.ForeignKey('deliveries.id'), nullable=False, index=True)
+    sequence = db.Column(db.Integer, nullable=False)
+    pincode = db.Column(db.String(10))
+
+class PincodeDistance(db.Model):
+    __tablename__ = 'pincode_distances'
+    
+    # Known road distances between neighbouring pincodes; anything else is estimated (see delivery_runs.py)
+    from_pincode = db.Column(db.String(10), primary_key=True)
+    to_pincode = db.Column(db.String(10), primary_key=True)
+    distance_km = db.Column(db.Float, nullable=False)
+
 class Settings(db.Model):
     __tablename__ = 'settings'
     
@@ -240,3 +466,18 @@ class Settings(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+class TableVersion(db.Model):
+    __tablename__ = 'table_versions'
+    
+    # Bumped in the same transaction as every write to the named table (see cache.py)
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class SchemaVersion(db.Model):
+    __tablename__ = 'schema_version'
+    
+    # Single row: the migrations.SCHEMA_VERSION the database was last brought up to
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
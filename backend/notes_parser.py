@@ -0,0 +1,161 @@
+"""
+TEX-SARTHI Order Notes Parser
+Extracts garments, services, quantities and measurements from free-text order notes
+"""
+
+import re
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+GARMENTS = {
+    "shirt": "shirt", "pant": "pant", "trouser": "pant", "suit": "suit", "dress": "dress",
+    "saree": "saree", "sari": "saree", "kurta": "kurta", "salwar": "salwar", "blouse": "blouse",
+    "lehenga": "lehenga", "sherwani": "sherwani", "jacket": "jacket", "blazer": "blazer",
+    "waistcoat": "waistcoat", "skirt": "skirt", "uniform": "uniform"
+}
+
+SERVICES = {
+    "alteration": "alteration", "alter": "alteration", "altered": "alteration",
+    "embroidery": "embroidery", "embroider": "embroidery", "embroidered": "embroidery",
+    "stitching": "stitching", "stitch": "stitching",
+    "dyeing": "dyeing", "dye": "dyeing", "dyed": "dyeing",
+    "repair": "repair", "darning": "repair",
+    "hemming": "hemming", "hem": "hemming", "hemmed": "hemming",
+    "lining": "lining", "lined": "lining", "piping": "piping",
+    "fall": "fall_pico", "pico": "fall_pico",
+    "cleaning": "cleaning", "dry clean": "cleaning",
+    "tailoring": "tailoring"
+}
+
+MEASUREMENTS = ("chest", "waist", "length", "sleeve", "inseam", "shoulder", "hip", "neck")
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "single": 1, "two": 2, "pair": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "dozen": 12
+}
+
+EXTRA_WORDS = ("extra", "additional", "more", "another", "spare")
+
+Patterns = namedtuple("Patterns", "segment measurement garment service quantity extra detail")
+
+
+@lru_cache(maxsize=None)
+def get_patterns() -> Patterns:
+    """Compile the extraction patterns once per process"""
+    def alternation(words):
+        # Longest first so "dry clean" wins over "clean", "embroidery" over "embroider"
+        return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+    return Patterns(
+        segment=re.compile(r"[,;\n+]+|\band\b|&(?!\s*pico)", re.IGNORECASE),
+        measurement=re.compile(
+            rf"\b({alternation(MEASUREMENTS)})\s*[:=\-]?\s*(\d+(?:\.\d+)?)\s*(inches|inch|in|cm|\")?",
+            re.IGNORECASE
+        ),
+        garment=re.compile(rf"\b({alternation(GARMENTS)})(?:e?s)?\b", re.IGNORECASE),
+        service=re.compile(rf"\b({alternation(SERVICES)})(?:s|ed|ing)?\b", re.IGNORECASE),
+        quantity=re.compile(rf"\b(\d+|{alternation(NUMBER_WORDS)})\b\s*(?:x\b|nos?\b\.?|pcs?\b|pieces?\b)?", re.IGNORECASE),
+        extra=re.compile(rf"\b({alternation(EXTRA_WORDS)})\b", re.IGNORECASE),
+        detail=re.compile(r"\b(?:on|at|near|around|in)\s+(?:the\s+)?([a-z]+(?:\s+[a-z]+)?)", re.IGNORECASE)
+    )
+
+
+def _quantity(text: str, patterns: Patterns) -> Optional[int]:
+    match = patterns.quantity.search(text)
+    if not match:
+        return None
+    token = match.group(1).lower()
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _parse_segment(segment: str, patterns: Patterns) -> List[Dict]:
+    """One line per service named in the segment ("stitch 3 kurtas with lining" gives two),
+    or a single garment line when it names none"""
+    garment_match = patterns.garment.search(segment)
+    services = []
+    for match in patterns.service.finditer(segment):
+        service = SERVICES[match.group(1).lower()]
+        if service not in services:
+            services.append(service)
+    if not garment_match and not services:
+        return []
+
+    garment = GARMENTS[garment_match.group(1).lower()] if garment_match else None
+
+    detail = None
+    detail_match = patterns.detail.search(segment)
+    if detail_match:
+        words = [w for w in detail_match.group(1).lower().split()
+                 if not patterns.garment.fullmatch(w) and not patterns.service.fullmatch(w)]
+        detail = " ".join(words) or None
+
+    quantity = _quantity(segment, patterns)
+    extra = bool(patterns.extra.search(segment))
+    return [
+        {
+            "kind": "service" if service else "garment",
+            "service": service,
+            "garment": garment,
+            "quantity": quantity or 1,
+            "explicit_quantity": quantity is not None,
+            "extra": extra,
+            "detail": detail,
+            "text": segment
+        }
+        for service in services or [None]
+    ]
+
+
+@lru_cache(maxsize=4096)
+def _parse_cached(notes: str) -> Dict:
+    patterns = get_patterns()
+
+    measurements = {}
+    for name, value, unit in patterns.measurement.findall(notes):
+        measurements[name.lower()] = {
+            "value": float(value),
+            "unit": "cm" if unit.lower() == "cm" else "in"
+        }
+    # Measurement numbers must not be read as quantities
+    stripped = patterns.measurement.sub(" ", notes)
+
+    lines = []
+    for segment in patterns.segment.split(stripped):
+        segment = segment.strip(" .")
+        if segment:
+            lines.extend(_parse_segment(segment, patterns))
+
+    return {"lines": lines, "measurements": measurements}
+
+
+def parse_notes(notes: Optional[str]) -> Dict:
+    """Parse one order's notes into candidate invoice lines and measurements"""
+    if not notes or not notes.strip():
+        return {"lines": [], "measurements": {}}
+    result = _parse_cached(notes.strip())
+    # Hand out copies so callers cannot mutate the cached result
+    return {
+        "lines": [dict(line) for line in result["lines"]],
+        "measurements": {k: dict(v) for k, v in result["measurements"].items()}
+    }
+
+
+@lru_cache(maxsize=1024)
+def garments_in(text: Optional[str]) -> frozenset:
+    """Canonical garments named in a short text such as an order type ("Pants" -> {"pant"})"""
+    if not text:
+        return frozenset()
+    return frozenset(GARMENTS[match.lower()] for match in get_patterns().garment.findall(text))
+
+
+def parse_notes_batch(notes_list: Iterable[Optional[str]]) -> List[Dict]:
+    """Parse many notes in one call; identical notes are parsed once"""
+    parsed = {}
+    results = []
+    for notes in notes_list:
+        key = (notes or "").strip()
+        if key not in parsed:
+            parsed[key] = parse_notes(key)
+        results.append(parsed[key])
+    return results
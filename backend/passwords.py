@@ -0,0 +1,238 @@
+"""
+TEX-SARTHI Password Hashing
+Configurable hash method, verification on a bounded thread pool so login bursts
+cannot take every CPU, and re-hashing of outdated hashes after a good login
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+# Werkzeug method string ("pbkdf2:sha256:600000", "scrypt:32768:8:1") or "bcrypt:<rounds>"
+DEFAULT_METHOD = 'pbkdf2:sha256:600000'
+DEFAULT_WAIT_SECONDS = 5
+
+
+class HashPoolBusy(Exception):
+    """Raised when a hash could not start, or finish, within PASSWORD_HASH_WAIT_SECONDS"""
+
+
+def _config(name: str, default):
+    return current_app.config.get(name, default) if has_app_context() else default
+
+
+# ---------------------------------------------------------------------------
+# Hash formats
+# ---------------------------------------------------------------------------
+
+def _bcrypt_rounds(method: str) -> int:
+    _, _, rounds = method.partition(':')
+    return int(rounds or 12)
+
+
+def _hash(password: str, method: str) -> str:
+    if method.startswith('bcrypt'):
+        import bcrypt
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(_bcrypt_rounds(method))).decode('ascii')
+    return generate_password_hash(password, method=method)
+
+
+def _verify(stored: str, password: str) -> bool:
+    if stored.startswith('$2'):
+        import bcrypt
+        try:
+            return bcrypt.checkpw(password.encode('utf-8'), stored.encode('ascii'))
+        except ValueError:
+            return False
+    return check_password_hash(stored, password)
+
+
+_canonical_methods = {}
+
+
+def _canonical(method: str) -> str:
+    """Parameters a new hash would carry, e.g. "pbkdf2:sha256" -> "pbkdf2:sha256:600000" """
+    prefix = _canonical_methods.get(method)
+    if prefix is None:
+        sample = _hash('', method)
+        prefix = sample[:7] if method.startswith('bcrypt') else sample.split('$', 1)[0]
+        _canonical_methods[method] = prefix
+    return prefix
+
+
+def current_method() -> str:
+    return _config('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+
+
+def needs_rehash(stored: Optional[str]) -> bool:
+    """True when a hash was made with another algorithm or cost than the configured one"""
+    if not stored:
+        return True
+    prefix = _canonical(current_method())
+    if stored.startswith('$2'):
+        return not stored.startswith(prefix[:4]) or stored[4:7] != prefix[4:7]
+    return stored.split('$', 1)[0] != prefix
+
+
+# ---------------------------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------------------------
+
+class HashPool:
+    """Runs hashes on a few threads (hashlib and bcrypt release the GIL) behind a
+    semaphore, so at most `workers` hashes run and `max_pending` wait at any time.
+    Threads do not survive fork: get_pool() replaces a pool made in another process."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def run(self, fn, *args, timeout: float = DEFAULT_WAIT_SECONDS):
+        if not self._slots.acquire(timeout=timeout):
+            raise HashPoolBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+            try:
+                return future.result(timeout=timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise HashPoolBusy()
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[HashPool] = None
+_pool_lock = threading.Lock()
+
+
+def _default_workers() -> int:
+    return max(os.cpu_count() or 1, 1)
+
+
+def get_pool() -> HashPool:
+    global _pool
+    pool = _pool
+    if pool is None or pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                if _pool is not None:
+                    # Inherited through fork: same size, new threads
+                    _pool = HashPool(_pool.workers, _pool.max_pending)
+                else:
+                    workers = _config('PASSWORD_HASH_WORKERS', 0) or _default_workers()
+                    _pool = HashPool(workers, _config('PASSWORD_HASH_MAX_PENDING', 0) or workers * 4)
+            pool = _pool
+    return pool
+
+
+def reset_pool_after_fork():
+    """Give a forked process its own hash threads (also run from gunicorn's post_fork)"""
+    global _pool_lock
+    # The parent may have held the lock at fork time
+    _pool_lock = threading.Lock()
+    if _pool is not None:
+        get_pool()
+
+
+os.register_at_fork(after_in_child=reset_pool_after_fork)
+
+
+def _run(fn, *args):
+    return get_pool().run(fn, *args, timeout=_config('PASSWORD_HASH_WAIT_SECONDS', DEFAULT_WAIT_SECONDS))
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def hash_password(password: str) -> str:
+    """Hash with the configured method on the pool"""
+    return _run(_hash, password, current_method())
+
+
+def verify_password(stored: Optional[str], password: str) -> bool:
+    """Check a password on the pool; a missing hash still costs one verification
+    so unknown emails take as long as wrong passwords"""
+    if not stored:
+        _run(_verify, _dummy_hash(current_method()), password)
+        return False
+    return bool(_run(_verify, stored, password))
+
+
+_dummy_hashes = {}
+
+
+def _dummy_hash(method: str) -> str:
+    stored = _dummy_hashes.get(method)
+    if stored is None:
+        stored = _dummy_hashes[method] = _hash(os.urandom(16).hex(), method)
+    return stored
+
+
+def check_and_upgrade(user, password: str) -> bool:
+    """Verify a user's password and, when it matches, re-hash it with the current
+    parameters if it was made with older ones (caller commits)"""
+    if not verify_password(user.password if user else None, password):
+        return False
+    if needs_rehash(user.password):
+        try:
+            user.password = hash_password(password)
+        except HashPoolBusy:
+            # The login itself succeeded; upgrade on a later one
+            logger.info(f"Deferred password re-hash for user {user.id}")
+    return True
+
+
+def init_passwords(app):
+    """Size the hash pool from the app config and check the configured method"""
+    global _pool
+    workers = app.config.get('PASSWORD_HASH_WORKERS') or _default_workers()
+    max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING') or workers * 4
+    with _pool_lock:
+        if _pool is not None and _pool.pid == os.getpid():
+            _pool.shutdown()
+        _pool = HashPool(workers, max_pending)
+    method = app.config.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+    try:
+        _check_method(method)
+    except Exception as e:
+        raise ValueError(f"Unsupported PASSWORD_HASH_METHOD {method!r}: {str(e)}")
+    # Full-cost sample hashes are made off the startup path; the first login makes them if this has not
+    threading.Thread(target=_warm_up, args=(method,), name='password-warm-up', daemon=True).start()
+
+
+def _check_method(method: str):
+    """Cheap validation of a method string, without paying for a full-cost hash"""
+    kind, _, params = method.partition(':')
+    if kind == 'bcrypt':
+        import bcrypt  # noqa: F401
+        _bcrypt_rounds(method)
+    elif kind == 'pbkdf2':
+        # Same digest, one iteration
+        _hash('', f"pbkdf2:{params.split(':', 1)[0] or 'sha256'}:1")
+    elif kind == 'scrypt':
+        _hash('', 'scrypt:1024:8:1')
+    else:
+        raise ValueError(f'unknown algorithm {kind!r}')
+
+
+def _warm_up(method: str):
+    try:
+        _canonical(method)
+        _dummy_hash(method)
+    except Exception as e:
+        logger.error(f"Password hash warm-up failed: {str(e)}")
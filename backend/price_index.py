@@ -0,0 +1,260 @@
+"""
+TEX-SARTHI Historical Price Index
+Precomputed price bands from past orders, keyed by (order_type, fabric, complexity)
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from models import Order, db
+
+logger = logging.getLogger(__name__)
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+QUANTILE_LABELS = ('p10', 'p25', 'p50', 'p75', 'p90')
+WILDCARD = '*'
+
+# A key needs at least this many orders before it is trusted over its parent
+MIN_SAMPLES = 3
+
+# Orders in these statuses never contribute to the index
+EXCLUDED_STATUSES = ('cancelled',)
+
+Key = Tuple[str, str, str]
+
+
+def normalize_key(order_type: Optional[str], fabric: Optional[str], complexity: Optional[str]) -> Key:
+    """Normalize raw order fields into an index key"""
+    return (
+        (order_type or '').strip().lower() or WILDCARD,
+        (fabric or '').strip().lower() or WILDCARD,
+        (complexity or '').strip().lower() or WILDCARD
+    )
+
+
+def _parent_keys(key: Key) -> List[Key]:
+    """Keys an order contributes to: exact, order type only, and global"""
+    return [key, (key[0], WILDCARD, WILDCARD), (WILDCARD, WILDCARD, WILDCARD)]
+
+
+def grouped_quantiles(groups: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """Quantiles of values per group id in one sort (linear interpolation, like np.quantile)"""
+    qs = np.asarray(QUANTILES)
+    order = np.lexsort((values, groups))
+    sorted_values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = starts[:, None] + (counts[:, None] - 1) * qs[None, :]
+    lo = np.floor(positions).astype(np.int64)
+    hi = np.ceil(positions).astype(np.int64)
+    frac = positions - lo
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * frac
+
+
+def _band(key: Key, count: int, value_q, unit_q, qty_q) -> Dict:
+    return {
+        'order_type': key[0],
+        'fabric': key[1],
+        'complexity': key[2],
+        'sample_size': int(count),
+        'order_value': {label: round(float(v), 2) for label, v in zip(QUANTILE_LABELS, value_q)},
+        'unit_value': {label: round(float(v), 2) for label, v in zip(QUANTILE_LABELS, unit_q)},
+        'quantity': {label: round(float(v), 2) for label, v in zip(QUANTILE_LABELS, qty_q)}
+    }
+
+
+class PriceIndex:
+    """In-memory price index; lookups never touch the database"""
+
+    def __init__(self):
+        self._bands: Dict[Key, Dict] = {}
+        # order_id -> (key, order_value, quantity); kept for incremental refreshes
+        self._rows: Dict[int, Tuple[Key, float, float]] = {}
+        self._members: Dict[Key, set] = {}
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self.built_at: Optional[datetime] = None
+        self.refreshed_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    def _classify(self, order_types: Iterable, fabrics: Iterable, notes: Iterable) -> List[Key]:
+        from ai_invoice_generator import ai_invoice_generator
+
+        keys = []
+        cache = {}
+        for order_type, fabric, note in zip(order_types, fabrics, notes):
+            text_key = (order_type, fabric, note)
+            complexity = cache.get(text_key)
+            if complexity is None:
+                complexity = ai_invoice_generator.analyze_text(order_type, fabric, note)['complexity']
+                cache[text_key] = complexity
+            keys.append(normalize_key(order_type, fabric, complexity))
+        return keys
+
+    def _fetch(self, since: Optional[datetime] = None):
+        query = db.session.query(
+            Order.id, Order.order_type, Order.fabric, Order.notes,
+            Order.order_value, Order.quantity, Order.status, Order.updated_at
+        )
+        if since is not None:
+            query = query.filter(Order.updated_at > since)
+        return query.all()
+
+    def build(self) -> int:
+        """Rebuild the whole index from the orders table"""
+        rows = [r for r in self._fetch() if r.status not in EXCLUDED_STATUSES]
+        keys = self._classify((r.order_type for r in rows), (r.fabric for r in rows), (r.notes for r in rows))
+
+        values = np.fromiter((r.order_value or 0 for r in rows), dtype=np.float64, count=len(rows))
+        quantities = np.fromiter((max(r.quantity or 1, 1) for r in rows), dtype=np.float64, count=len(rows))
+        unit_values = values / quantities
+
+        bands: Dict[Key, Dict] = {}
+        members: Dict[Key, set] = {}
+        if rows:
+            for level in range(3):
+                level_keys = [_parent_keys(k)[level] for k in keys]
+                uniques, groups = np.unique(np.array(['\x1f'.join(k) for k in level_keys]), return_inverse=True)
+                groups = groups.astype(np.int64)
+                n_groups = len(uniques)
+                counts = np.bincount(groups, minlength=n_groups)
+                value_q = grouped_quantiles(groups, values, n_groups)
+                unit_q = grouped_quantiles(groups, unit_values, n_groups)
+                qty_q = grouped_quantiles(groups, quantities, n_groups)
+                for g, joined in enumerate(uniques):
+                    key = tuple(joined.split('\x1f'))
+                    bands[key] = _band(key, counts[g], value_q[g], unit_q[g], qty_q[g])
+
+        order_rows = {}
+        for r, key, value, qty in zip(rows, keys, values, quantities):
+            order_rows[r.id] = (key, float(value), float(qty))
+            for parent in _parent_keys(key):
+                members.setdefault(parent, set()).add(r.id)
+
+        watermark = max((r.updated_at for r in rows if r.updated_at), default=None)
+        with self._lock:
+            self._bands = bands
+            self._rows = order_rows
+            self._members = members
+            self._watermark = watermark
+            self.built_at = self.refreshed_at = datetime.utcnow()
+
+        logger.info(f"Price index built from {len(rows)} orders ({len(bands)} bands)")
+        return len(rows)
+
+    def refresh(self) -> int:
+        """Fold orders changed since the last build/refresh into the index and drop deleted ones"""
+        if not self.ready:
+            return self.build()
+
+        changed = self._fetch(since=self._watermark)
+        # Deleted orders never show up as changed; diff against the ids that still exist
+        live = {order_id for (order_id,) in db.session.query(Order.id)}
+        deleted = [order_id for order_id in list(self._rows) if order_id not in live]
+        if not changed and not deleted:
+            self.refreshed_at = datetime.utcnow()
+            return 0
+
+        keys = self._classify((r.order_type for r in changed), (r.fabric for r in changed), (r.notes for r in changed))
+        with self._lock:
+            dirty = set()
+            for order_id in deleted:
+                previous = self._rows.pop(order_id, None)
+                if previous:
+                    for parent in _parent_keys(previous[0]):
+                        self._members.get(parent, set()).discard(order_id)
+                        dirty.add(parent)
+            for r, key in zip(changed, keys):
+                previous = self._rows.pop(r.id, None)
+                if previous:
+                    for parent in _parent_keys(previous[0]):
+                        self._members.get(parent, set()).discard(r.id)
+                        dirty.add(parent)
+                if r.status in EXCLUDED_STATUSES:
+                    continue
+                self._rows[r.id] = (key, float(r.order_value or 0), float(max(r.quantity or 1, 1)))
+                for parent in _parent_keys(key):
+                    self._members.setdefault(parent, set()).add(r.id)
+                    dirty.add(parent)
+
+            for key in dirty:
+                ids = self._members.get(key)
+                if not ids:
+                    self._bands.pop(key, None)
+                    continue
+                values = np.fromiter((self._rows[i][1] for i in ids), dtype=np.float64, count=len(ids))
+                quantities = np.fromiter((self._rows[i][2] for i in ids), dtype=np.float64, count=len(ids))
+                self._bands[key] = _band(
+                    key, len(ids),
+                    np.quantile(values, QUANTILES),
+                    np.quantile(values / quantities, QUANTILES),
+                    np.quantile(quantities, QUANTILES)
+                )
+
+            stamps = [r.updated_at for r in changed if r.updated_at]
+            if self._watermark:
+                stamps.append(self._watermark)
+            self._watermark = max(stamps, default=None)
+            self.refreshed_at = datetime.utcnow()
+
+        logger.info(f"Price index refreshed with {len(changed)} changed and {len(deleted)} deleted orders")
+        return len(changed) + len(deleted)
+
+    def lookup(self, order_type: Optional[str], fabric: Optional[str] = None,
+               complexity: Optional[str] = None, quantity: Optional[int] = None) -> Optional[Dict]:
+        """Return the most specific band with enough samples, plus a recommended price range"""
+        for key in _parent_keys(normalize_key(order_type, fabric, complexity)):
+            band = self._bands.get(key)
+            if band and band['sample_size'] >= MIN_SAMPLES:
+                break
+        else:
+            return None
+
+        qty = max(int(quantity or 1), 1)
+        unit = band['unit_value']
+        return dict(band, recommended={
+            'quantity': qty,
+            'low': round(unit['p25'] * qty, 2),
+            'mid': round(unit['p50'] * qty, 2),
+            'high': round(unit['p75'] * qty, 2)
+        })
+
+    def stats(self) -> Dict:
+        return {
+            'ready': self.ready,
+            'orders_indexed': len(self._rows),
+            'bands': len(self._bands),
+            'built_at': self.built_at.isoformat() if self.built_at else None,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
+
+
+price_index = PriceIndex()
+
+
+def init_price_index(app):
+    """Build the index off the request path and keep it fresh in a daemon thread"""
+    interval = app.config.get('PRICE_INDEX_REFRESH_SECONDS', 300)
+    if not interval:
+        return
+
+    def worker():
+        while True:
+            try:
+                with app.app_context():
+                    price_index.refresh()
+                    db.session.remove()
+            except Exception as e:
+                logger.error(f"Price index refresh failed: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=worker, name='price-index-refresh', daemon=True)
+    thread.start()
@@ -0,0 +1,211 @@
+"""
+TEX-SARTHI Reorder Forecasting
+Consumption rates per inventory item from the stock ledger (exponentially
+smoothed, all items at once), scaled by recent order volume, turned into
+reorder points and quantities stored in reorder_suggestions
+"""
+
+import logging
+import math
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from models import FabricReservation, InventoryItem, Order, ReorderSuggestion, StockMovement, db
+
+logger = logging.getLogger(__name__)
+
+# Ledger reasons whose decreases count as consumption (purchases and returns do not).
+# Stock edited on the inventory screen is recorded as 'adjustment', so its decreases are usage too.
+CONSUMPTION_REASONS = ('cutting', 'sale', 'wastage', 'adjustment')
+
+HISTORY_DAYS = 90
+
+# EWMA span in days: alpha = 2 / (span + 1)
+SMOOTHING_SPAN_DAYS = 14
+
+# Order volume of the last RECENT_DAYS against the whole history scales usage, within TREND_BOUNDS
+RECENT_DAYS = 30
+TREND_BOUNDS = (0.5, 2.0)
+
+# Safety stock covers demand up to this quantile over the lead time (1.65 ~ 95% service level)
+SERVICE_Z = 1.65
+
+# Stock to cover after a delivery arrives, on top of the reorder point
+REVIEW_DAYS = 30
+
+
+def _day(value) -> date:
+    """func.date() gives a date on PostgreSQL and a string on SQLite; datetimes are truncated"""
+    if isinstance(value, datetime):
+        return value.date()
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def smoothed_usage(usage: np.ndarray, start: np.ndarray, span: int = SMOOTHING_SPAN_DAYS):
+    """EWMA mean and standard deviation of daily usage (items x days, oldest first).
+    Days before an item's `start` column are ignored rather than counted as zero usage."""
+    days = usage.shape[1]
+    alpha = 2 / (span + 1)
+    weights = alpha * (1 - alpha) ** np.arange(days - 1, -1, -1)
+    weights = np.where(np.arange(days)[None, :] >= start[:, None], weights[None, :], 0.0)
+    totals = weights.sum(axis=1, keepdims=True)
+    weights = np.divide(weights, totals, out=np.zeros_like(weights), where=totals > 0)
+
+    mean = (usage * weights).sum(axis=1)
+    variance = (((usage - mean[:, None]) ** 2) * weights).sum(axis=1)
+    return mean, np.sqrt(variance)
+
+
+def order_trend(today: date) -> float:
+    """Recent daily order volume relative to the history window, within TREND_BOUNDS.
+    Both rates are over the days that actually have orders, so a shop with a few weeks
+    of history is not read as a surge."""
+    since = datetime.combine(today - timedelta(days=HISTORY_DAYS), datetime.min.time())
+    recent_since = datetime.combine(today - timedelta(days=RECENT_DAYS), datetime.min.time())
+    total, recent, first = db.session.execute(
+        select(
+            func.count(Order.id),
+            func.count(Order.id).filter(Order.created_at >= recent_since),
+            func.min(Order.created_at)
+        ).where(Order.created_at >= since, Order.status != 'cancelled')
+    ).one()
+    if not total or not recent:
+        return 1.0
+    span = min(max((today - _day(first)).days, 1), HISTORY_DAYS)
+    ratio = (recent / min(RECENT_DAYS, span)) / (total / span)
+    return float(min(max(ratio, TREND_BOUNDS[0]), TREND_BOUNDS[1]))
+
+
+def lead_times() -> Dict[str, int]:
+    return {k.strip().lower(): int(v) for k, v in current_app.config.get('SUPPLIER_LEAD_TIMES', {}).items()}
+
+
+def compute_suggestions(today: Optional[date] = None) -> list:
+    """One suggestion row per inventory item, from three aggregate queries"""
+    today = today or datetime.utcnow().date()
+    first_day = today - timedelta(days=HISTORY_DAYS - 1)
+    since = datetime.combine(first_day, datetime.min.time())
+
+    items = db.session.execute(select(
+        InventoryItem.id, InventoryItem.supplier, InventoryItem.current_stock, InventoryItem.min_stock,
+        InventoryItem.cost_per_unit, InventoryItem.created_at
+    ).order_by(InventoryItem.id)).all()
+    if not items:
+        return []
+
+    item_ids = np.fromiter((row.id for row in items), dtype=np.int64, count=len(items))
+    stock = np.fromiter((row.current_stock or 0 for row in items), dtype=np.float64, count=len(items))
+    min_stock = np.fromiter((row.min_stock or 0 for row in items), dtype=np.float64, count=len(items))
+    start = np.fromiter(
+        (max((row.created_at.date() - first_day).days, 0) if row.created_at else 0 for row in items),
+        dtype=np.int64, count=len(items)
+    )
+
+    # Daily consumption matrix, items x days
+    usage = np.zeros((len(items), HISTORY_DAYS))
+    day = func.date(StockMovement.created_at)
+    consumed = db.session.execute(
+        select(StockMovement.item_id, day, func.sum(-StockMovement.delta))
+        .where(StockMovement.created_at >= since, StockMovement.delta < 0,
+               StockMovement.reason.in_(CONSUMPTION_REASONS))
+        .group_by(StockMovement.item_id, day)
+    ).all()
+    if consumed:
+        rows = np.searchsorted(item_ids, [r[0] for r in consumed])
+        cols = np.array([(_day(r[1]) - first_day).days for r in consumed])
+        keep = (rows < len(items)) & (cols >= 0) & (cols < HISTORY_DAYS)
+        np.add.at(usage, (rows[keep], cols[keep]), np.array([float(r[2]) for r in consumed])[keep])
+    has_history = usage.any(axis=1)
+
+    reserved = np.zeros(len(items))
+    held = db.session.execute(
+        select(FabricReservation.item_id, func.sum(FabricReservation.quantity))
+        .where(FabricReservation.status == 'reserved')
+        .group_by(FabricReservation.item_id)
+    ).all()
+    if held:
+        rows = np.searchsorted(item_ids, [r[0] for r in held])
+        keep = rows < len(items)
+        np.add.at(reserved, rows[keep], np.array([float(r[1] or 0) for r in held])[keep])
+
+    daily, std = smoothed_usage(usage, start)
+    trend = order_trend(today)
+    daily = daily * trend
+    std = std * trend
+
+    supplier_leads = lead_times()
+    default_lead = current_app.config.get('REORDER_LEAD_TIME_DAYS', 7)
+    lead = np.array([supplier_leads.get((row.supplier or '').strip().lower(), default_lead) for row in items],
+                    dtype=np.float64)
+
+    # Lead-time demand plus safety stock plus fabric already promised to open orders;
+    # items never consumed keep their hand-set min_stock
+    forecast_point = np.ceil(daily * lead + SERVICE_Z * std * np.sqrt(lead) + reserved)
+    reorder_point = np.where(has_history, forecast_point, np.maximum(min_stock, np.ceil(reserved)))
+    order_up_to = reorder_point + np.ceil(daily * REVIEW_DAYS)
+    needs_reorder = stock <= reorder_point
+    quantity = np.where(needs_reorder, np.maximum(order_up_to - stock, 0), 0)
+    quantity = np.where(needs_reorder & (quantity == 0), 1, quantity)
+    free = stock - reserved
+
+    computed_at = datetime.utcnow()
+    suggestions = []
+    for i, row in enumerate(items):
+        suggestions.append({
+            'item_id': int(row.id),
+            'supplier': row.supplier,
+            'current_stock': int(stock[i]),
+            'min_stock': int(min_stock[i]),
+            'reserved': round(float(reserved[i]), 2),
+            'daily_usage': round(float(daily[i]), 3),
+            'usage_std': round(float(std[i]), 3),
+            'lead_time_days': int(lead[i]),
+            'reorder_point': int(reorder_point[i]),
+            'reorder_quantity': int(quantity[i]),
+            'days_of_cover': round(float(free[i] / daily[i]), 1) if daily[i] > 0 else None,
+            'needs_reorder': bool(needs_reorder[i]),
+            'estimated_cost': round(float(quantity[i]) * (row.cost_per_unit or 0), 2),
+            'computed_at': computed_at
+        })
+    return suggestions
+
+
+def refresh_suggestions() -> int:
+    """Recompute and replace the whole reorder_suggestions table in one transaction"""
+    suggestions = compute_suggestions()
+    db.session.execute(delete(ReorderSuggestion))
+    if suggestions:
+        db.session.execute(insert(ReorderSuggestion), suggestions)
+    db.session.commit()
+    return len(suggestions)
+
+
+def init_reorder_forecast(app):
+    """Recompute suggestions every REORDER_FORECAST_INTERVAL_HOURS in a daemon thread (0 disables)"""
+    interval_hours = app.config.get('REORDER_FORECAST_INTERVAL_HOURS', 6)
+    if not interval_hours:
+        return
+    interval = timedelta(hours=interval_hours)
+
+    def worker():
+        while True:
+            try:
+                with app.app_context():
+                    # Several workers may run this loop; only recompute when the last run is due
+                    last = db.session.query(func.max(ReorderSuggestion.computed_at)).scalar()
+                    if last is None or datetime.utcnow() - last >= interval:
+                        count = refresh_suggestions()
+                        logger.info(f"Reorder suggestions computed for {count} items")
+                    db.session.remove()
+            except Exception as e:
+                logger.error(f"Reorder forecast failed: {str(e)}")
+            time.sleep(min(interval.total_seconds(), 3600))
+
+    thread = threading.Thread(target=worker, name='reorder-forecast', daemon=True)
+    thread.start()
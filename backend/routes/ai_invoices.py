@@ -6,11 +6,8 @@ Advanced AI-powered invoice generation endpoints
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import Order, Customer, Invoice, db
-from ai_invoice_generator import (
-    ai_invoice_generator, 
-    generate_ai_invoice, 
-    get_invoice_suggestions
-)
+from settings_store import settings_store
+from notes_parser import parse_notes_batch
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,6 +18,7 @@ ai_invoices_bp = Blueprint('ai_invoices', __name__)
 @jwt_required()
 def get_ai_invoice_suggestions(order_id):
     """Get AI suggestions for creating an invoice from an order"""
+    from ai_invoice_generator import get_invoice_suggestions
     try:
         suggestions = get_invoice_suggestions(order_id)
         
@@ -40,6 +38,7 @@ def get_ai_invoice_suggestions(order_id):
 @jwt_required()
 def generate_ai_invoice_from_order(order_id):
     """Generate an AI-powered invoice from an order"""
+    from ai_invoice_generator import ai_invoice_generator
     try:
         data = request.get_json() or {}
         save_to_db = data.get('save_to_db', True)
@@ -112,6 +111,7 @@ def generate_ai_invoice_from_order(order_id):
 @jwt_required()
 def bulk_generate_ai_invoices():
     """Generate AI invoices for multiple orders"""
+    from ai_invoice_generator import ai_invoice_generator
     try:
         data = request.get_json()
         
@@ -165,6 +165,7 @@ def bulk_generate_ai_invoices():
 @jwt_required()
 def analyze_order_for_invoice(order_id):
     """Analyze an order using AI for invoice generation insights"""
+    from ai_invoice_generator import ai_invoice_generator
     try:
         order = Order.query.get(order_id)
         if not order:
@@ -200,30 +201,45 @@ def analyze_order_for_invoice(order_id):
 @jwt_required()
 def calculate_smart_pricing():
     """Calculate smart pricing using AI for given items"""
+    from ai_invoice_generator import InvoiceItem, ai_invoice_generator
+    from price_index import price_index
     try:
         data = request.get_json()
         
+        if data and 'columns' in data:
+            return calculate_batch_pricing(data['columns'])
+        
         if not data or 'items' not in data:
-            return jsonify({'error': 'items is required'}), 400
+            return jsonify({'error': 'items or columns is required'}), 400
         
         items_data = data['items']
         
         # Convert to InvoiceItem objects
-        from ai_invoice_generator import InvoiceItem
         items = []
+        default_tax_rate = settings_store.tax_rate()
         for item_data in items_data:
             item = InvoiceItem(
                 description=item_data.get('description', ''),
                 quantity=int(item_data.get('quantity', 1)),
                 unit_price=float(item_data.get('unit_price', 0)),
                 total_price=float(item_data.get('total_price', 0)),
-                tax_rate=float(item_data.get('tax_rate', 0.18))
+                tax_rate=float(item_data.get('tax_rate', default_tax_rate))
             )
             items.append(item)
         
         # Calculate intelligent pricing
         subtotal, tax_amount, total_amount = ai_invoice_generator.calculate_intelligent_pricing(items)
         
+        # Recommended band from the historical price index (in-memory lookup)
+        price_band = None
+        if data.get('order_type'):
+            price_band = price_index.lookup(
+                data['order_type'],
+                data.get('fabric'),
+                data.get('complexity'),
+                data.get('quantity')
+            )
+        
         return jsonify({
             'pricing': {
                 'subtotal': subtotal,
@@ -236,7 +252,8 @@ def calculate_smart_pricing():
                         'tax_amount': item.total_price * item.tax_rate
                     }
                     for item in items
-                ]
+                ],
+                'price_band': price_band
             },
             'message': 'Smart pricing calculated successfully'
         }), 200
@@ -245,6 +262,120 @@ def calculate_smart_pricing():
         logger.error(f"Error calculating smart pricing: {str(e)}")
         return jsonify({'error': 'Failed to calculate smart pricing'}), 500
 
+def calculate_batch_pricing(columns):
+    """Batch path for large quotes: column arrays priced in one vectorized pass"""
+    if not isinstance(columns, dict):
+        return jsonify({'error': 'columns must be an object of arrays'}), 400
+    
+    quantities = columns.get('quantity')
+    unit_prices = columns.get('unit_price')
+    tax_rates = columns.get('tax_rate', settings_store.tax_rate())
+    
+    if not isinstance(quantities, list) or not isinstance(unit_prices, list):
+        return jsonify({'error': 'columns.quantity and columns.unit_price must be arrays'}), 400
+    
+    if len(quantities) != len(unit_prices) or (isinstance(tax_rates, list) and len(tax_rates) != len(quantities)):
+        return jsonify({'error': 'All column arrays must have the same length'}), 400
+    
+    from ai_invoice_generator import ai_invoice_generator
+    try:
+        pricing = ai_invoice_generator.calculate_batch_pricing(quantities, unit_prices, tax_rates)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Column arrays must contain numeric values'}), 400
+    
+    return jsonify({
+        'pricing': pricing,
+        'message': 'Smart pricing calculated successfully'
+    }), 200
+
+@ai_invoices_bp.route('/ai/invoices/parse-notes', methods=['POST'])
+@jwt_required()
+def parse_order_notes():
+    """Extract structured line items from the notes of many orders in one call"""
+    try:
+        data = request.get_json()
+        
+        if not data or ('order_ids' not in data and 'notes' not in data):
+            return jsonify({'error': 'order_ids or notes is required'}), 400
+        
+        if 'notes' in data:
+            if not isinstance(data['notes'], list):
+                return jsonify({'error': 'notes must be an array'}), 400
+            return jsonify({
+                'results': parse_notes_batch(data['notes']),
+                'message': 'Notes parsed successfully'
+            }), 200
+        
+        order_ids = data['order_ids']
+        if not isinstance(order_ids, list):
+            return jsonify({'error': 'order_ids must be an array'}), 400
+        
+        # Only the two columns we need, in one query
+        rows = db.session.query(Order.id, Order.notes).filter(Order.id.in_(order_ids)).all()
+        parsed = parse_notes_batch(row.notes for row in rows)
+        
+        return jsonify({
+            'results': [
+                dict(result, order_id=row.id)
+                for row, result in zip(rows, parsed)
+            ],
+            'message': 'Notes parsed successfully'
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error parsing order notes: {str(e)}")
+        return jsonify({'error': 'Failed to parse order notes'}), 500
+
+@ai_invoices_bp.route('/ai/invoices/price-index', methods=['GET'])
+@jwt_required()
+def get_price_index():
+    """Get historical price bands for an order type/fabric/complexity"""
+    from price_index import price_index
+    try:
+        order_type = request.args.get('order_type')
+        
+        if not order_type:
+            return jsonify({'index': price_index.stats()}), 200
+        
+        band = price_index.lookup(
+            order_type,
+            request.args.get('fabric'),
+            request.args.get('complexity'),
+            request.args.get('quantity', type=int)
+        )
+        
+        return jsonify({
+            'index': price_index.stats(),
+            'price_band': band
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error reading price index: {str(e)}")
+        return jsonify({'error': 'Failed to read price index'}), 500
+
+@ai_invoices_bp.route('/ai/invoices/price-index/refresh', methods=['POST'])
+@jwt_required()
+def refresh_price_index():
+    """Force an incremental (or full) rebuild of the historical price index"""
+    from price_index import price_index
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if data.get('full'):
+            processed = price_index.build()
+        else:
+            processed = price_index.refresh()
+        
+        return jsonify({
+            'index': price_index.stats(),
+            'processed_orders': processed,
+            'message': 'Price index refreshed successfully'
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error refreshing price index: {str(e)}")
+        return jsonify({'error': 'Failed to refresh price index'}), 500
+
 @ai_invoices_bp.route('/ai/invoices/templates', methods=['GET'])
 @jwt_required()
 def get_invoice_templates():
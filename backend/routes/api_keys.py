@@ -0,0 +1,119 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from models import ApiKey, User, db
+from api_keys import api_key_cache, generate_key, key_digest, parse_scopes, scope_names
+from user_cache import current_user
+from datetime import datetime, timedelta
+
+api_keys_bp = Blueprint('api_keys', __name__)
+
+def require_admin():
+    """Error response unless the caller is an admin"""
+    user = current_user()
+    if user is None or not user.has_role('admin'):
+        return jsonify({'error': 'Admin access required'}), 403
+    return None
+
+@api_keys_bp.route('/api-keys', methods=['GET'])
+@jwt_required()
+def get_api_keys():
+    try:
+        denied = require_admin()
+        if denied:
+            return denied
+
+        keys = ApiKey.query.order_by(ApiKey.created_at.desc()).all()
+
+        return jsonify({
+            'api_keys': [key.to_dict() for key in keys],
+            'scopes': scope_names()
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch API keys'}), 500
+
+@api_keys_bp.route('/api-keys', methods=['POST'])
+@jwt_required()
+def create_api_key():
+    """Issue a key; the plain key is only ever returned here"""
+    try:
+        denied = require_admin()
+        if denied:
+            return denied
+
+        data = request.get_json(silent=True) or {}
+        name = (data.get('name') or '').strip()
+        if not name:
+            return jsonify({'error': 'name is required'}), 400
+
+        scopes = data.get('scopes')
+        if not isinstance(scopes, list):
+            return jsonify({'error': 'scopes must be an array, e.g. ["reports:read"]'}), 400
+        try:
+            scopes = parse_scopes(scopes)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Requests made with the key act as this user (default: the admin creating it)
+        user_id = data.get('user_id')
+        if user_id is None:
+            user_id = current_user().id
+        elif isinstance(user_id, bool) or not isinstance(user_id, int) or user_id < 1:
+            return jsonify({'error': 'user_id must be a positive integer'}), 400
+        if not db.session.get(User, user_id):
+            return jsonify({'error': 'User not found'}), 404
+
+        expires_at = None
+        expires_in_days = data.get('expires_in_days')
+        if expires_in_days is not None:
+            if (isinstance(expires_in_days, bool) or not isinstance(expires_in_days, int)
+                    or not 1 <= expires_in_days <= 3650):
+                return jsonify({'error': 'expires_in_days must be an integer from 1 to 3650'}), 400
+            expires_at = datetime.utcnow() + timedelta(days=expires_in_days)
+
+        key, prefix = generate_key()
+        api_key = ApiKey(
+            name=name,
+            prefix=prefix,
+            key_hash=key_digest(key),
+            scopes=','.join(scopes),
+            user_id=user_id,
+            expires_at=expires_at
+        )
+        db.session.add(api_key)
+        db.session.commit()
+        api_key_cache.invalidate(prefix)
+
+        return jsonify({
+            'api_key': api_key.to_dict(),
+            'key': key,
+            'message': 'API key created; store it now, it cannot be shown again'
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to create API key'}), 500
+
+@api_keys_bp.route('/api-keys/<int:key_id>', methods=['DELETE'])
+@jwt_required()
+def revoke_api_key(key_id):
+    try:
+        denied = require_admin()
+        if denied:
+            return denied
+
+        api_key = db.session.get(ApiKey, key_id)
+        if not api_key:
+            return jsonify({'error': 'API key not found'}), 404
+
+        if api_key.revoked_at is None:
+            api_key.revoked_at = datetime.utcnow()
+            db.session.commit()
+        # Other workers drop the key within API_KEY_CACHE_TTL
+        api_key_cache.invalidate(api_key.prefix)
+
+        return jsonify({'api_key': api_key.to_dict(), 'message': 'API key revoked'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to revoke API key'}), 500
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 from models import User, db
-from werkzeug.security import generate_password_hash, check_password_hash
+from passwords import HashPoolBusy, check_and_upgrade, hash_password
+from user_cache import current_user, current_user_id
 import re
 import json
 from urllib.parse import parse_qs
@@ -54,10 +55,18 @@ def login():
         
         # Find user by email
         user = User.query.filter_by(email=email).first()
+        stored_hash = user.password if user else None
+        # No transaction or connection is held during the slow hash; the loaded user stays usable
+        db.session.close()
         
-        if not user or not user.check_password(password):
+        if not check_and_upgrade(user, password):
             return jsonify({'error': 'Invalid email or password'}), 401
         
+        # Hash was re-made with the current method
+        if user.password != stored_hash:
+            db.session.add(user)
+            db.session.commit()
+        
         # Create access token (ensure identity is a string for compatibility)
         access_token = create_access_token(identity=str(user.id))
         
@@ -67,6 +76,9 @@ def login():
             'message': 'Login successful'
         }), 200
         
+    except HashPoolBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Too many login attempts, please retry'}), 503, {'Retry-After': '1'}
     except Exception as e:
         # Provide more context during debugging
         return jsonify({'error': 'Login failed', 'details': str(e)}), 500
@@ -111,12 +123,14 @@ def signup():
         existing_user = User.query.filter_by(email=email).first()
         if existing_user:
             return jsonify({'error': 'User with this email already exists'}), 409
+        # End the read transaction before the slow hash
+        db.session.rollback()
         
         # Create new user
         user = User(
             name=name,
             email=email,
-            password=generate_password_hash(password),
+            password=hash_password(password),
             role='user'
         )
         
@@ -132,6 +146,9 @@ def signup():
             'message': 'User created successfully'
         }), 201
         
+    except HashPoolBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Too many signups, please retry'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Signup failed'}), 500
@@ -150,8 +167,7 @@ def logout():
 @jwt_required()
 def get_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -168,17 +184,25 @@ def get_profile():
 @jwt_required()
 def update_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
-        
         data = request.get_json()
         
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
+        # Hash before any query, so no transaction is open during the slow hash
+        password_hash = None
+        if 'password' in data and data['password']:
+            is_valid, message = validate_password(data['password'])
+            if not is_valid:
+                return jsonify({'error': message}), 400
+            password_hash = hash_password(data['password'])
+        
+        user_id = current_user_id()
+        user = db.session.get(User, user_id) if user_id is not None else None
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
         # Update allowed fields
         if 'name' in data:
             user.name = data['name'].strip()
@@ -195,11 +219,8 @@ def update_profile():
             
             user.email = email
         
-        if 'password' in data and data['password']:
-            is_valid, message = validate_password(data['password'])
-            if not is_valid:
-                return jsonify({'error': message}), 400
-            user.set_password(data['password'])
+        if password_hash:
+            user.password = password_hash
         
         db.session.commit()
         
@@ -208,6 +229,9 @@ def update_profile():
             'message': 'Profile updated successfully'
         }), 200
         
+    except HashPoolBusy:
+        db.session.rollback()
+        return jsonify({'error': 'Too many password changes, please retry'}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update profile'}), 500
@@ -216,8 +240,7 @@ def update_profile():
 @jwt_required()
 def verify_token():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user()
         
         if not user:
             return jsonify({'error': 'Invalid token'}), 401
@@ -0,0 +1,107 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from models import Order, Delivery
+from cache import cached_response
+from serializers import parse_fields, list_response
+from stats import calendar_days
+from datetime import datetime, date, timedelta
+
+calendar_bp = Blueprint('calendar', __name__)
+
+MAX_CALENDAR_DAYS = 366
+
+def month_bounds(today):
+    """First and last day of the month containing today"""
+    start = today.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+
+@calendar_bp.route('/calendar', methods=['GET'])
+@jwt_required(optional=True)
+@cached_response('orders', 'deliveries')
+def get_calendar():
+    """Orders due and deliveries booked per day and status (default: the current month)"""
+    try:
+        start, end = month_bounds(date.today())
+        if request.args.get('from'):
+            start = datetime.strptime(request.args['from'], '%Y-%m-%d').date()
+        if request.args.get('to'):
+            end = datetime.strptime(request.args['to'], '%Y-%m-%d').date()
+        
+        if end < start:
+            return jsonify({'error': 'to must not be before from'}), 400
+        if (end - start).days >= MAX_CALENDAR_DAYS:
+            return jsonify({'error': f'At most {MAX_CALENDAR_DAYS} days per request'}), 400
+        
+        days = calendar_days(start, end)
+        
+        return jsonify({
+            'from': start.isoformat(),
+            'to': end.isoformat(),
+            'days': days,
+            'totals': {
+                'orders': sum(day['orders']['total'] for day in days),
+                'order_value': round(sum(day['orders']['order_value'] for day in days), 2),
+                'balance_due': round(sum(day['orders']['balance_due'] for day in days), 2),
+                'deliveries': sum(day['deliveries']['total'] for day in days)
+            }
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch calendar'}), 500
+
+@calendar_bp.route('/calendar/<day>/orders', methods=['GET'])
+@jwt_required(optional=True)
+@cached_response('orders')
+def get_calendar_orders(day):
+    """Orders due on one day, paged"""
+    try:
+        due = parse_day(day)
+        status = request.args.get('status')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        fields = parse_fields(Order, request.args.get('fields'))
+        
+        query = Order.query.filter(Order.delivery_date == due)
+        if status:
+            query = query.filter(Order.status == status)
+        query = query.order_by(Order.status, Order.id)
+        
+        return list_response('orders', query, Order, fields, page, per_page), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch orders'}), 500
+
+@calendar_bp.route('/calendar/<day>/deliveries', methods=['GET'])
+@jwt_required(optional=True)
+@cached_response('deliveries')
+def get_calendar_deliveries(day):
+    """Deliveries booked on one day, paged"""
+    try:
+        booked = parse_day(day)
+        status = request.args.get('status')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        fields = parse_fields(Delivery, request.args.get('fields'))
+        
+        query = Delivery.query.filter(Delivery.delivery_date == booked)
+        if status:
+            query = query.filter(Delivery.status == status)
+        query = query.order_by(Delivery.status, Delivery.id)
+        
+        return list_response('deliveries', query, Delivery, fields, page, per_page), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch deliveries'}), 500
@@ -1,18 +1,22 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from models import Customer, Order, db
+from cache import cached_response
+from serializers import parse_fields, list_response
 from sqlalchemy import func
 
 customers_bp = Blueprint('customers', __name__)
 
 @customers_bp.route('/customers', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('customers', 'orders')
 def get_customers():
     try:
         # Get query parameters
         search = request.args.get('search')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        fields = parse_fields(Customer, request.args.get('fields'))
         
         # Build query
         query = Customer.query
@@ -31,25 +35,11 @@ def get_customers():
         # Order by name
         query = query.order_by(Customer.name)
         
-        # Paginate results
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        customers = pagination.items
-        
-        return jsonify({
-            'customers': [customer.to_dict() for customer in customers],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
-        }), 200
+        # Paginate and serialize (streamed for very large pages)
+        return list_response('customers', query, Customer, fields, page, per_page), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to fetch customers'}), 500
 
@@ -0,0 +1,77 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from models import Order, db
+
+cutting_bp = Blueprint('cutting', __name__)
+
+MAX_PLAN_ORDERS = 2000
+
+@cutting_bp.route('/cutting-plan', methods=['POST'])
+@jwt_required(optional=True)
+def create_cutting_plan():
+    """Pack the pieces of a batch of orders onto rolls, one plan per fabric/colour"""
+    from cutting_plan import plan_cutting
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        roll_width_cm = float(data.get('roll_width_cm') or current_app.config.get('CUTTING_ROLL_WIDTH_CM', 112))
+        roll_length_m = float(data.get('roll_length_m') or current_app.config.get('CUTTING_ROLL_LENGTH_M', 50))
+        if roll_width_cm <= 0 or roll_length_m <= 0:
+            return jsonify({'error': 'roll_width_cm and roll_length_m must be positive'}), 400
+        
+        query = db.session.query(
+            Order.id, Order.order_type, Order.fabric, Order.color, Order.quantity, Order.measurements
+        )
+        order_ids = data.get('order_ids')
+        if order_ids is not None:
+            if not isinstance(order_ids, list) or not order_ids or not all(isinstance(i, int) for i in order_ids):
+                return jsonify({'error': 'order_ids must be a non-empty array of integers'}), 400
+            query = query.filter(Order.id.in_(order_ids))
+        elif data.get('fabric'):
+            query = query.filter(
+                Order.status.in_(['pending', 'in_progress']),
+                db.func.lower(Order.fabric) == data['fabric'].strip().lower()
+            )
+            if data.get('color'):
+                query = query.filter(db.func.lower(Order.color) == data['color'].strip().lower())
+        else:
+            return jsonify({'error': 'order_ids or fabric is required'}), 400
+        
+        orders = query.order_by(Order.id).limit(MAX_PLAN_ORDERS + 1).all()
+        if not orders:
+            return jsonify({'error': 'No matching orders found'}), 404
+        if len(orders) > MAX_PLAN_ORDERS:
+            return jsonify({'error': f'At most {MAX_PLAN_ORDERS} orders per plan'}), 400
+        
+        # Pieces of different fabrics or colours never share a roll
+        batches = {}
+        for order in orders:
+            key = ((order.fabric or '').strip().lower(), (order.color or '').strip().lower())
+            batches.setdefault(key, []).append({
+                'id': order.id,
+                'order_type': order.order_type,
+                'quantity': order.quantity,
+                'measurements': order.measurements
+            })
+        
+        plans = []
+        for (fabric, color), batch in batches.items():
+            plan = plan_cutting(
+                batch,
+                roll_width_cm,
+                roll_length_m,
+                allow_rotation=bool(data.get('allow_rotation', False)),
+                include_layout=bool(data.get('include_layout', False))
+            )
+            plans.append(dict(plan, fabric=fabric, color=color))
+        
+        return jsonify({
+            'plans': plans,
+            'metres_consumed': round(sum(plan['summary']['metres_consumed'] for plan in plans), 3),
+            'message': f'{len(plans)} cutting plans generated'
+        }), 200
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': 'Invalid roll dimensions'}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to generate cutting plan'}), 500
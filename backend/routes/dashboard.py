@@ -13,10 +13,8 @@ def get_dashboard_stats():
         # Get total orders count
         total_orders = Order.query.count()
         
-        # Get low stock items (current_stock <= min_stock)
-        low_stock_items = InventoryItem.query.filter(
-            InventoryItem.current_stock <= InventoryItem.min_stock
-        ).count()
+        # Get low stock items (stored flag, counted from its partial index)
+        low_stock_items = InventoryItem.query.filter(InventoryItem.is_low_stock).count()
         
         # Get pending deliveries
         pending_deliveries = Delivery.query.filter(
@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from models import Delivery, Order, Customer, db
+from models import Delivery, DeliveryRunStop, Order, Customer, db
+from cache import cached_response
+from settings_store import settings_store
+from serializers import parse_fields, list_response
+from stats import delivery_stats
+from bulk_transitions import apply_transition, complete_orders_for_deliveries, DELIVERY_TRANSITIONS
 from datetime import datetime, date
 import uuid
 
@@ -8,10 +13,11 @@ deliveries_bp = Blueprint('deliveries', __name__)
 
 def generate_delivery_number():
     """Generate unique delivery number"""
-    return f"DEL-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+    return f"{settings_store.prefix('delivery')}-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
 
 @deliveries_bp.route('/deliveries', methods=['GET'])
 @jwt_required()
+@cached_response('deliveries')
 def get_deliveries():
     try:
         # Get query parameters
@@ -19,6 +25,7 @@ def get_deliveries():
         search = request.args.get('search')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        fields = parse_fields(Delivery, request.args.get('fields'))
         
         # Build query
         query = Delivery.query
@@ -40,25 +47,11 @@ def get_deliveries():
         # Order by delivery date
         query = query.order_by(Delivery.delivery_date.desc())
         
-        # Paginate results
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        deliveries = pagination.items
-        
-        return jsonify({
-            'deliveries': [delivery.to_dict() for delivery in deliveries],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
-        }), 200
+        # Paginate and serialize (streamed for very large pages)
+        return list_response('deliveries', query, Delivery, fields, page, per_page), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to fetch deliveries'}), 500
 
@@ -212,6 +205,62 @@ def update_delivery_status(delivery_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to update delivery status'}), 500
 
+@deliveries_bp.route('/deliveries/bulk-status', methods=['PUT'])
+@jwt_required()
+def bulk_update_delivery_status():
+    """Move many deliveries (by ids or filter) to a new status in set-based chunks"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if 'status' not in data:
+            return jsonify({'error': 'Status is required'}), 400
+        
+        if data['status'] not in DELIVERY_TRANSITIONS:
+            return jsonify({'error': f'Invalid status. Must be one of: {", ".join(DELIVERY_TRANSITIONS)}'}), 400
+        
+        ids = data.get('ids')
+        filters = None
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                return jsonify({'error': 'ids must be an array of integers'}), 400
+        elif isinstance(data.get('filter'), dict) and data['filter']:
+            criteria = data['filter']
+            filters = []
+            if criteria.get('status'):
+                filters.append(Delivery.status == criteria['status'])
+            if criteria.get('delivery_person'):
+                filters.append(Delivery.delivery_person == criteria['delivery_person'])
+            if criteria.get('delivery_date'):
+                filters.append(Delivery.delivery_date == datetime.strptime(criteria['delivery_date'], '%Y-%m-%d').date())
+            if not filters:
+                return jsonify({'error': 'filter must include status, delivery_person or delivery_date'}), 400
+        else:
+            return jsonify({'error': 'ids or filter is required'}), 400
+        
+        outcome = apply_transition(Delivery, DELIVERY_TRANSITIONS, data['status'], ids=ids, filters=filters)
+        
+        # If delivered, complete the orders once for the whole batch
+        completed_orders = 0
+        if data['status'] == 'delivered':
+            completed_orders = complete_orders_for_deliveries(outcome['updated_ids'])
+        
+        # Deliveries and their orders change together or not at all
+        db.session.commit()
+        
+        return jsonify({
+            'status': data['status'],
+            'summary': outcome['summary'],
+            'results': outcome['results'],
+            'completed_orders': completed_orders,
+            'message': f"{len(outcome['updated_ids'])} deliveries updated"
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update delivery statuses'}), 500
+
 @deliveries_bp.route('/deliveries/<int:delivery_id>', methods=['DELETE'])
 @jwt_required()
 def delete_delivery(delivery_id):
@@ -225,6 +274,7 @@ def delete_delivery(delivery_id):
         if delivery.status == 'delivered':
             return jsonify({'error': 'Cannot delete completed delivery'}), 400
         
+        DeliveryRunStop.query.filter_by(delivery_id=delivery_id).delete(synchronize_session=False)
         db.session.delete(delivery)
         db.session.commit()
         
@@ -238,46 +288,7 @@ def delete_delivery(delivery_id):
 @jwt_required()
 def get_delivery_stats():
     try:
-        from sqlalchemy import func
-        
-        # Get total deliveries count
-        total_deliveries = Delivery.query.count()
-        
-        # Get scheduled deliveries
-        scheduled_deliveries = Delivery.query.filter(Delivery.status == 'scheduled').count()
-        
-        # Get in transit deliveries
-        in_transit_deliveries = Delivery.query.filter(Delivery.status == 'in_transit').count()
-        
-        # Get delivered deliveries
-        delivered_deliveries = Delivery.query.filter(Delivery.status == 'delivered').count()
-        
-        # Get failed deliveries
-        failed_deliveries = Delivery.query.filter(Delivery.status == 'failed').count()
-        
-        # Get today's deliveries
-        today = date.today()
-        todays_deliveries = Delivery.query.filter(
-            Delivery.delivery_date == today
-        ).count()
-        
-        # Get overdue deliveries (scheduled for past dates but not delivered)
-        overdue_deliveries = Delivery.query.filter(
-            db.and_(
-                Delivery.delivery_date < today,
-                Delivery.status.in_(['scheduled', 'in_transit'])
-            )
-        ).count()
-        
-        return jsonify({
-            'totalDeliveries': total_deliveries,
-            'scheduledDeliveries': scheduled_deliveries,
-            'inTransitDeliveries': in_transit_deliveries,
-            'deliveredDeliveries': delivered_deliveries,
-            'failedDeliveries': failed_deliveries,
-            'todaysDeliveries': todays_deliveries,
-            'overdueDeliveries': overdue_deliveries
-        }), 200
+        return jsonify(delivery_stats(date.today())), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to fetch delivery stats'}), 500
@@ -299,3 +310,99 @@ def get_todays_deliveries():
         
     except Exception as e:
         return jsonify({'error': 'Failed to fetch today\'s deliveries'}), 500
+
+@deliveries_bp.route('/deliveries/runs/plan', methods=['POST'])
+@jwt_required()
+def plan_delivery_runs():
+    """Group a day's scheduled deliveries by pincode zone into balanced runs per delivery person"""
+    from delivery_runs import plan_day
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            run_date = datetime.strptime(data['date'], '%Y-%m-%d').date() if data.get('date') else date.today()
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        delivery_persons = data.get('delivery_persons')
+        if delivery_persons is not None:
+            if not isinstance(delivery_persons, list) or not all(isinstance(p, str) and p.strip() for p in delivery_persons):
+                return jsonify({'error': 'delivery_persons must be an array of names'}), 400
+            delivery_persons = list(dict.fromkeys(p.strip() for p in delivery_persons))
+        
+        capacity = data.get('capacity')
+        if capacity is not None and (not isinstance(capacity, int) or capacity < 1):
+            return jsonify({'error': 'capacity must be a positive integer'}), 400
+        
+        result = plan_day(run_date, delivery_persons, capacity, dry_run=bool(data.get('dry_run', False)))
+        result['message'] = f"{len(result['runs'])} delivery runs planned"
+        
+        return jsonify(result), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to plan delivery runs'}), 500
+
+@deliveries_bp.route('/deliveries/runs', methods=['GET'])
+@jwt_required()
+def get_delivery_runs():
+    """Saved runs of a day (default today) with their ordered stops"""
+    from delivery_runs import runs_with_stops
+    try:
+        run_date = request.args.get('date')
+        run_date = datetime.strptime(run_date, '%Y-%m-%d').date() if run_date else date.today()
+        
+        return jsonify({
+            'date': run_date.isoformat(),
+            'runs': runs_with_stops(run_date=run_date, delivery_person=request.args.get('delivery_person'))
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch delivery runs'}), 500
+
+@deliveries_bp.route('/deliveries/runs/<int:run_id>/status', methods=['PUT'])
+@jwt_required()
+def update_delivery_run_status(run_id):
+    """Courier app: mark a run dispatched when it leaves and completed when it is back"""
+    from delivery_runs import set_run_status
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if 'status' not in data:
+            return jsonify({'error': 'Status is required'}), 400
+        
+        try:
+            run = set_run_status(run_id, data['status'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if not run:
+            return jsonify({'error': 'Delivery run not found'}), 404
+        
+        return jsonify({
+            'run': run.to_dict(),
+            'message': 'Delivery run status updated successfully'
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update delivery run status'}), 500
+
+@deliveries_bp.route('/deliveries/runs/<int:run_id>', methods=['GET'])
+@jwt_required()
+def get_delivery_run(run_id):
+    from delivery_runs import runs_with_stops
+    try:
+        runs = runs_with_stops(run_id=run_id)
+        
+        if not runs:
+            return jsonify({'error': 'Delivery run not found'}), 404
+        
+        return jsonify({'run': runs[0]}), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch delivery run'}), 500
@@ -0,0 +1,325 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from models import Customer, Order, InventoryItem, db
+from cache import mark_changed
+from routes.orders import generate_order_number
+from datetime import datetime
+import csv
+import io
+import json
+import re
+
+imports_bp = Blueprint('imports', __name__)
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+VALID_ORDER_STATUSES = ['pending', 'in_progress', 'completed', 'cancelled']
+
+def normalize_phone(phone):
+    """Compare phones on their last 10 digits (drops +91, spaces, dashes)"""
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-10:] if digits else ''
+
+def normalize_email(email):
+    return (email or '').strip().lower()
+
+def read_rows(stream, fmt):
+    """Yield (row_number, dict) from a CSV or NDJSON request body without buffering it"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+    else:
+        for number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield number, None
+                continue
+            yield number, row if isinstance(row, dict) else None
+
+def chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class CustomerMap:
+    """In-memory phone/email -> customer lookup, loaded with one query"""
+
+    def __init__(self):
+        self.by_phone = {}
+        self.by_email = {}
+        self.by_id = {}
+        for customer_id, name, phone, email in db.session.query(
+            Customer.id, Customer.name, Customer.phone, Customer.email
+        ):
+            self.add(customer_id, name, phone, email)
+
+    def add(self, customer_id, name, phone, email):
+        self.by_id[customer_id] = name
+        if normalize_phone(phone):
+            self.by_phone.setdefault(normalize_phone(phone), (customer_id, name))
+        if normalize_email(email):
+            self.by_email.setdefault(normalize_email(email), (customer_id, name))
+
+    def resolve(self, row):
+        if row.get('customer_id'):
+            try:
+                customer_id = int(row['customer_id'])
+            except (TypeError, ValueError):
+                return None
+            if customer_id in self.by_id:
+                return customer_id, self.by_id[customer_id]
+            return None
+        phone = normalize_phone(row.get('customer_phone') or row.get('phone'))
+        if phone and phone in self.by_phone:
+            return self.by_phone[phone]
+        email = normalize_email(row.get('customer_email') or row.get('email'))
+        if email and email in self.by_email:
+            return self.by_email[email]
+        return None
+
+def validate_customer(row, context):
+    errors = []
+    name = (row.get('name') or '').strip()
+    if not name:
+        errors.append('name is required')
+
+    email = normalize_email(row.get('email'))
+    if email:
+        if email in context['customers'].by_email:
+            errors.append('Customer with this email already exists')
+        elif email in context['seen_emails']:
+            errors.append('Duplicate email in import file')
+
+    if errors:
+        return None, errors
+
+    if email:
+        context['seen_emails'].add(email)
+    return {
+        'name': name,
+        'email': email,
+        'phone': (row.get('phone') or '').strip(),
+        'address': row.get('address') or '',
+        'city': row.get('city') or '',
+        'state': row.get('state') or '',
+        'pincode': str(row.get('pincode') or ''),
+        'gst_number': row.get('gst_number') or ''
+    }, []
+
+def validate_order(row, context):
+    errors = []
+
+    customer = context['customers'].resolve(row)
+    if not customer:
+        errors.append('Customer not found (give customer_id, customer_phone or customer_email)')
+
+    if not row.get('order_type'):
+        errors.append('order_type is required')
+
+    order_value = advance_payment = quantity = None
+    try:
+        order_value = float(row.get('order_value'))
+    except (TypeError, ValueError):
+        errors.append('order_value must be a number')
+    try:
+        advance_payment = float(row.get('advance_payment') or 0)
+    except (TypeError, ValueError):
+        errors.append('advance_payment must be a number')
+    try:
+        quantity = int(row.get('quantity') or 1)
+    except (TypeError, ValueError):
+        errors.append('quantity must be an integer')
+
+    delivery_date = None
+    if row.get('delivery_date'):
+        try:
+            delivery_date = datetime.strptime(str(row['delivery_date']), '%Y-%m-%d').date()
+        except ValueError:
+            errors.append('Invalid date format. Use YYYY-MM-DD')
+
+    status = row.get('status') or 'pending'
+    if status not in VALID_ORDER_STATUSES:
+        errors.append(f'Invalid status. Must be one of: {", ".join(VALID_ORDER_STATUSES)}')
+
+    if errors:
+        return None, errors
+
+    measurements = row.get('measurements') or ''
+    if not isinstance(measurements, str):
+        measurements = json.dumps(measurements)
+
+    return {
+        'order_number': generate_order_number(),
+        'customer_id': customer[0],
+        'customer_name': row.get('customer_name') or customer[1],
+        'order_type': row['order_type'],
+        'fabric': row.get('fabric') or '',
+        'color': row.get('color') or '',
+        'quantity': quantity,
+        'measurements': measurements,
+        'order_value': order_value,
+        'advance_payment': advance_payment,
+        'delivery_date': delivery_date,
+        'status': status,
+        'notes': row.get('notes') or ''
+    }, []
+
+def validate_inventory(row, context):
+    errors = []
+    for field in ['item_name', 'type']:
+        if not row.get(field):
+            errors.append(f'{field} is required')
+
+    current_stock = min_stock = cost_per_unit = None
+    try:
+        current_stock = int(row.get('current_stock') or 0)
+        min_stock = int(row.get('min_stock') or 0)
+        cost_per_unit = float(row.get('cost_per_unit') or 0.0)
+    except (TypeError, ValueError):
+        errors.append('Invalid numeric value')
+
+    if errors:
+        return None, errors
+
+    # Same derivation as InventoryItem.refresh_stock_state(); core INSERTs skip ORM events
+    is_low_stock = current_stock <= min_stock
+    if current_stock <= 0:
+        status = 'out_of_stock'
+    elif is_low_stock:
+        status = 'low_stock'
+    else:
+        status = 'in_stock'
+
+    return {
+        'item_name': row['item_name'],
+        'type': row['type'],
+        'color': row.get('color') or '',
+        'current_stock': current_stock,
+        'min_stock': min_stock,
+        'cost_per_unit': cost_per_unit,
+        'supplier': row.get('supplier') or '',
+        'status': status,
+        'is_low_stock': is_low_stock
+    }, []
+
+IMPORTERS = {
+    'customers': (Customer, validate_customer),
+    'orders': (Order, validate_order),
+    'inventory': (InventoryItem, validate_inventory)
+}
+
+def fill_defaults(table, rows):
+    """Apply Python-side column defaults (timestamps etc.) that COPY would skip"""
+    for column in table.columns:
+        if column.default is None or column.primary_key:
+            continue
+        for row in rows:
+            if row.get(column.key) is None:
+                arg = column.default.arg
+                row[column.key] = arg(None) if callable(arg) else arg
+
+def copy_rows(table, rows):
+    """Bulk load a chunk on PostgreSQL with COPY, inside the session's transaction"""
+    fill_defaults(table, rows)
+    columns = list(rows[0].keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if row[c] is None else row[c] for c in columns])
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+def insert_rows(table, rows):
+    """Insert a validated chunk in one round trip"""
+    if db.engine.dialect.name == 'postgresql':
+        copy_rows(table, rows)
+        # COPY bypasses the session, so cached responses must be told explicitly
+        mark_changed(db.session, table.name)
+    else:
+        # executemany over a single prepared INSERT
+        db.session.execute(table.insert(), rows)
+
+@imports_bp.route('/import/<string:entity>', methods=['POST'])
+@jwt_required()
+def import_entity(entity):
+    """Bulk import customers, orders or inventory from a streamed CSV/NDJSON body"""
+    if entity not in IMPORTERS:
+        return jsonify({'error': f'Invalid entity. Must be one of: {", ".join(IMPORTERS)}'}), 400
+
+    fmt = (request.args.get('format') or '').lower()
+    if not fmt:
+        fmt = 'csv' if 'csv' in (request.content_type or '') else 'ndjson'
+    if fmt not in ['csv', 'ndjson']:
+        return jsonify({'error': 'Invalid format. Must be csv or ndjson'}), 400
+
+    dry_run = request.args.get('dry_run', 'false').lower() in ['true', '1', 'yes']
+    chunk_size = current_app.config.get('IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+    model, validate = IMPORTERS[entity]
+    table = model.__table__
+
+    context = {'customers': CustomerMap(), 'seen_emails': set()}
+    total_rows = valid_rows = inserted_rows = error_count = 0
+    errors = []
+
+    try:
+        for chunk in chunked(read_rows(request.stream, fmt), chunk_size):
+            valid = []
+            for number, row in chunk:
+                total_rows += 1
+                if row is None:
+                    cleaned, row_errors = None, ['Malformed row']
+                else:
+                    cleaned, row_errors = validate(row, context)
+                if row_errors:
+                    error_count += 1
+                    if len(errors) < MAX_REPORTED_ERRORS:
+                        errors.append({'row': number, 'errors': row_errors})
+                    continue
+                valid.append(cleaned)
+
+            valid_rows += len(valid)
+            if valid and not dry_run:
+                insert_rows(table, valid)
+                db.session.commit()
+                inserted_rows += len(valid)
+
+        return jsonify({
+            'entity': entity,
+            'dry_run': dry_run,
+            'total_rows': total_rows,
+            'valid_rows': valid_rows,
+            'inserted_rows': inserted_rows,
+            'error_count': error_count,
+            'errors': errors,
+            'message': 'Import validated successfully' if dry_run else 'Import completed'
+        }), 200
+
+    except UnicodeDecodeError:
+        db.session.rollback()
+        return jsonify({'error': 'Import file must be UTF-8 encoded'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'error': f'Failed to import {entity}',
+            'inserted_rows': inserted_rows,
+            'processed_rows': total_rows
+        }), 500
@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from models import InventoryItem, db
+from models import InventoryItem, StockMovement, StockSnapshot, FabricReservation, ReorderSuggestion, db
+from cache import cached_response
+from serializers import parse_fields, list_response
+from stock_ledger import StockError, apply_movements, normalize_movements, stock_at, take_snapshot
+from stats import inventory_stats
+from user_cache import current_user_id
 from sqlalchemy import func
+from datetime import datetime
 
 inventory_bp = Blueprint('inventory', __name__)
 
 @inventory_bp.route('/inventory', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('inventory_items')
 def get_inventory():
     try:
         # Get query parameters
@@ -16,6 +23,7 @@ def get_inventory():
         low_stock = request.args.get('low_stock', 'false').lower() == 'true'
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        fields = parse_fields(InventoryItem, request.args.get('fields'))
         
         # Build query
         query = InventoryItem.query
@@ -27,7 +35,7 @@ def get_inventory():
             query = query.filter(InventoryItem.status == status)
         
         if low_stock:
-            query = query.filter(InventoryItem.current_stock <= InventoryItem.min_stock)
+            query = query.filter(InventoryItem.is_low_stock)
         
         if search:
             search_term = f"%{search}%"
@@ -42,25 +50,11 @@ def get_inventory():
         # Order by item name
         query = query.order_by(InventoryItem.item_name)
         
-        # Paginate results
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        items = pagination.items
-        
-        return jsonify({
-            'inventory': [item.to_dict() for item in items],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
-        }), 200
+        # Paginate and serialize (streamed for very large pages)
+        return list_response('inventory', query, InventoryItem, fields, page, per_page), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to fetch inventory'}), 500
 
@@ -104,11 +98,22 @@ def create_inventory_item():
             current_stock=int(data.get('current_stock', 0)),
             min_stock=int(data.get('min_stock', 0)),
             cost_per_unit=float(data.get('cost_per_unit', 0.0)),
-            supplier=data.get('supplier', ''),
-            status=data.get('status', 'in_stock')
+            supplier=data.get('supplier', '')
         )
         
         db.session.add(item)
+        db.session.flush()
+        
+        # Opening balance goes into the ledger so point-in-time stock can replay it
+        if item.current_stock:
+            db.session.add(StockMovement(
+                item_id=item.id,
+                delta=item.current_stock,
+                balance_after=item.current_stock,
+                reason='initial',
+                user_id=current_user_id()
+            ))
+        
         db.session.commit()
         
         return jsonify({
@@ -146,21 +151,27 @@ def update_inventory_item(item_id):
         if 'color' in data:
             item.color = data['color']
         
-        if 'current_stock' in data:
-            item.current_stock = int(data['current_stock'])
-        
         if 'min_stock' in data:
             item.min_stock = int(data['min_stock'])
         
+        # Stock changes go through the ledger as an adjustment
+        if 'current_stock' in data:
+            delta = int(data['current_stock']) - (item.current_stock or 0)
+            if delta:
+                apply_movements(
+                    [{'item_id': item.id, 'delta': delta, 'reason': 'adjustment', 'order_id': None, 'note': 'Edited item'}],
+                    user_id=current_user_id(),
+                    allow_negative=True
+                )
+                # The UPDATE ran in SQL; reload the stock columns before the item is flushed again
+                db.session.expire(item, ['current_stock', 'status', 'is_low_stock'])
+        
         if 'cost_per_unit' in data:
             item.cost_per_unit = float(data['cost_per_unit'])
         
         if 'supplier' in data:
             item.supplier = data['supplier']
         
-        if 'status' in data:
-            item.status = data['status']
-        
         db.session.commit()
         
         return jsonify({
@@ -183,6 +194,10 @@ def delete_inventory_item(item_id):
         if not item:
             return jsonify({'error': 'Inventory item not found'}), 404
         
+        # The item's ledger, snapshots and reservations go with it
+        FabricReservation.query.filter_by(item_id=item_id).delete(synchronize_session=False)
+        StockMovement.query.filter_by(item_id=item_id).delete(synchronize_session=False)
+        StockSnapshot.query.filter_by(item_id=item_id).delete(synchronize_session=False)
         db.session.delete(item)
         db.session.commit()
         
@@ -196,11 +211,6 @@ def delete_inventory_item(item_id):
 @jwt_required(optional=True)
 def update_stock(item_id):
     try:
-        item = InventoryItem.query.get(item_id)
-        
-        if not item:
-            return jsonify({'error': 'Inventory item not found'}), 404
-        
         data = request.get_json()
         
         if not data or 'quantity' not in data:
@@ -209,98 +219,227 @@ def update_stock(item_id):
         operation = data.get('operation', 'add')  # add, subtract, set
         quantity = int(data['quantity'])
         
-        if operation == 'add':
-            item.current_stock += quantity
-        elif operation == 'subtract':
-            item.current_stock = max(0, item.current_stock - quantity)
-        elif operation == 'set':
-            item.current_stock = max(0, quantity)
-        else:
+        if operation not in ['add', 'subtract', 'set']:
             return jsonify({'error': 'Invalid operation. Must be add, subtract, or set'}), 400
         
-        # Update status based on stock level
-        if item.current_stock <= 0:
-            item.status = 'out_of_stock'
-        elif item.current_stock <= item.min_stock:
-            item.status = 'low_stock'
-        else:
-            item.status = 'in_stock'
+        current_stock = db.session.query(InventoryItem.current_stock).filter(
+            InventoryItem.id == item_id
+        ).with_for_update().scalar()
         
+        if current_stock is None and not InventoryItem.query.get(item_id):
+            return jsonify({'error': 'Inventory item not found'}), 404
+        current_stock = current_stock or 0
+        
+        # Translate the operation into a ledger delta; subtract and set never go below zero
+        if operation == 'add':
+            delta = quantity
+        elif operation == 'subtract':
+            delta = -min(max(quantity, 0), current_stock)
+        else:
+            delta = max(0, quantity) - current_stock
+        
+        if delta:
+            # Same reason whitelist and integer checks as /inventory/movements
+            apply_movements(
+                normalize_movements([{'item_id': item_id, 'delta': delta, 'reason': data.get('reason'),
+                                      'order_id': data.get('order_id'), 'note': data.get('note')}]),
+                user_id=current_user_id()
+            )
         db.session.commit()
         
         return jsonify({
-            'item': item.to_dict(),
+            'item': InventoryItem.query.get(item_id).to_dict(),
             'message': 'Stock updated successfully'
         }), 200
         
+    except StockError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'details': e.details}), e.status_code
     except ValueError as e:
         return jsonify({'error': 'Invalid quantity value'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to update stock'}), 500
 
+@inventory_bp.route('/inventory/movements', methods=['POST'])
+@jwt_required(optional=True)
+def create_stock_movements():
+    """Apply a batch of stock movements in one transaction (all or nothing)"""
+    try:
+        data = request.get_json()
+        
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
+        
+        movements = normalize_movements(data.get('movements'))
+        balances = apply_movements(
+            movements,
+            user_id=current_user_id(),
+            allow_negative=bool(data.get('allow_negative', False))
+        )
+        db.session.commit()
+        
+        return jsonify({
+            'items': list(balances.values()),
+            'movements_recorded': len(movements),
+            'message': 'Stock movements applied successfully'
+        }), 201
+        
+    except StockError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'details': e.details}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to apply stock movements'}), 500
+
+@inventory_bp.route('/inventory/<int:item_id>/movements', methods=['GET'])
+@jwt_required(optional=True)
+def get_stock_movements(item_id):
+    """Ledger of one item, newest first"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
+        
+        if not InventoryItem.query.get(item_id):
+            return jsonify({'error': 'Inventory item not found'}), 404
+        
+        movements = StockMovement.query.filter_by(item_id=item_id).order_by(
+            StockMovement.created_at.desc(), StockMovement.id.desc()
+        ).paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'movements': [movement.to_dict() for movement in movements.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': movements.total,
+                'pages': movements.pages,
+                'has_next': movements.has_next,
+                'has_prev': movements.has_prev
+            }
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch stock movements'}), 500
+
+@inventory_bp.route('/inventory/stock-at', methods=['GET'])
+@jwt_required(optional=True)
+def get_stock_at():
+    """Point-in-time stock from the latest snapshot before `at` plus ledger replay"""
+    try:
+        at = request.args.get('at')
+        if not at:
+            return jsonify({'error': 'at is required (ISO date or datetime)'}), 400
+        at = datetime.fromisoformat(at)
+        if len(request.args['at']) == 10:
+            # A bare date means the end of that day
+            at = at.replace(hour=23, minute=59, second=59, microsecond=999999)
+        
+        item_ids = [int(i) for i in request.args.get('item_ids', '').split(',') if i.strip()]
+        
+        return jsonify({
+            'at': at.isoformat(),
+            'items': stock_at(at, item_ids or None)
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': 'Invalid at or item_ids value'}), 400
+    except Exception as e:
+        return jsonify({'error': 'Failed to compute stock'}), 500
+
+@inventory_bp.route('/inventory/snapshots', methods=['POST'])
+@jwt_required()
+def create_stock_snapshot():
+    """Snapshot every item's stock now (also taken periodically in the background)"""
+    try:
+        count = take_snapshot()
+        
+        return jsonify({
+            'items_snapshotted': count,
+            'message': 'Stock snapshot taken successfully'
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to take stock snapshot'}), 500
+
+@inventory_bp.route('/inventory/reorder-suggestions', methods=['GET'])
+@jwt_required(optional=True)
+@cached_response('reorder_suggestions', 'inventory_items')
+def get_reorder_suggestions():
+    """Precomputed reorder points and quantities, grouped by supplier"""
+    try:
+        supplier = request.args.get('supplier')
+        include_all = request.args.get('all', 'false').lower() == 'true'
+        
+        query = db.session.query(
+            ReorderSuggestion, InventoryItem.item_name, InventoryItem.type, InventoryItem.color
+        ).join(InventoryItem, InventoryItem.id == ReorderSuggestion.item_id)
+        
+        if not include_all:
+            query = query.filter(ReorderSuggestion.needs_reorder)
+        
+        if supplier:
+            query = query.filter(ReorderSuggestion.supplier == supplier)
+        
+        suppliers = {}
+        computed_at = None
+        for suggestion, item_name, item_type, color in query.order_by(
+            ReorderSuggestion.supplier, ReorderSuggestion.days_of_cover.asc().nulls_last(), InventoryItem.item_name
+        ):
+            entry = suppliers.setdefault(suggestion.supplier, {
+                'supplier': suggestion.supplier,
+                'items': [],
+                'total_quantity': 0,
+                'estimated_cost': 0.0
+            })
+            entry['items'].append(dict(suggestion.to_dict(), item_name=item_name, type=item_type, color=color))
+            entry['total_quantity'] += suggestion.reorder_quantity
+            entry['estimated_cost'] = round(entry['estimated_cost'] + suggestion.estimated_cost, 2)
+            computed_at = max(computed_at or suggestion.computed_at, suggestion.computed_at)
+        
+        return jsonify({
+            'suppliers': list(suppliers.values()),
+            'total_items': sum(len(entry['items']) for entry in suppliers.values()),
+            'estimated_cost': round(sum(entry['estimated_cost'] for entry in suppliers.values()), 2),
+            'computed_at': computed_at.isoformat() if computed_at else None
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch reorder suggestions'}), 500
+
+@inventory_bp.route('/inventory/reorder-suggestions/refresh', methods=['POST'])
+@jwt_required()
+def refresh_reorder_suggestions():
+    """Recompute reorder suggestions now (also done periodically in the background)"""
+    from reorder_forecast import refresh_suggestions
+    try:
+        count = refresh_suggestions()
+        
+        return jsonify({
+            'items_forecast': count,
+            'message': 'Reorder suggestions refreshed successfully'
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to refresh reorder suggestions'}), 500
+
 @inventory_bp.route('/inventory/stats', methods=['GET'])
 @jwt_required(optional=True)
 def get_inventory_stats():
     try:
-        # Get total items count
-        total_items = InventoryItem.query.count()
-        
-        # Get low stock items
-        low_stock_items = InventoryItem.query.filter(
-            InventoryItem.current_stock <= InventoryItem.min_stock
-        ).count()
-        
-        # Get out of stock items
-        out_of_stock_items = InventoryItem.query.filter(
-            InventoryItem.current_stock == 0
-        ).count()
-        
-        # Get total inventory value
-        total_value = db.session.query(func.sum(
-            InventoryItem.current_stock * InventoryItem.cost_per_unit
-        )).scalar() or 0
-        
-        # Get items by type
-        items_by_type = db.session.query(
-            InventoryItem.type,
-            func.count(InventoryItem.id).label('count'),
-            func.sum(InventoryItem.current_stock * InventoryItem.cost_per_unit).label('value')
-        ).group_by(InventoryItem.type).all()
-        
-        # Get items by status
-        items_by_status = db.session.query(
-            InventoryItem.status,
-            func.count(InventoryItem.id).label('count')
-        ).group_by(InventoryItem.status).all()
-        
-        # Get low stock items details
-        low_stock_details = InventoryItem.query.filter(
-            InventoryItem.current_stock <= InventoryItem.min_stock
-        ).all()
+        stats = inventory_stats()
         
-        return jsonify({
-            'totalItems': total_items,
-            'lowStockItems': low_stock_items,
-            'outOfStockItems': out_of_stock_items,
-            'totalValue': float(total_value),
-            'itemsByType': [
-                {
-                    'type': item[0],
-                    'count': item[1],
-                    'value': float(item[2]) if item[2] else 0
-                }
-                for item in items_by_type
-            ],
-            'itemsByStatus': [
-                {
-                    'status': status[0],
-                    'count': status[1]
-                }
-                for status in items_by_status
+        return jsonify(dict(
+            stats['summary'],
+            itemsByType=[
+                {'type': entry['type'], 'count': entry['count'], 'value': entry['totalValue']}
+                for entry in stats['itemsByType']
             ],
-            'lowStockDetails': [item.to_dict() for item in low_stock_details]
-        }), 200
+            itemsByStatus=stats['itemsByStatus'],
+            lowStockDetails=stats['lowStockDetails']
+        )), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to fetch inventory stats'}), 500
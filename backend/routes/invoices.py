@@ -1,31 +1,36 @@
 from flask import Blueprint, request, jsonify, send_file, make_response
 from flask_jwt_extended import jwt_required
 from models import Invoice, Order, Customer, db
+from cache import cached_response
+from settings_store import settings_store
+from serializers import parse_fields, list_response
 from sqlalchemy import or_, and_
 from datetime import datetime, date
 import uuid
 import io
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-
-# Import AI invoice generator for integration
-try:
-    from ai_invoice_generator import generate_ai_invoice, get_invoice_suggestions
-    AI_AVAILABLE = True
-except ImportError:
-    AI_AVAILABLE = False
 
 invoices_bp = Blueprint('invoices', __name__)
 
+_ai_available = None
+
+def ai_available():
+    """Whether the AI invoice generator imports, checked on first use (it pulls in NumPy)"""
+    global _ai_available
+    if _ai_available is None:
+        try:
+            import ai_invoice_generator  # noqa: F401
+            _ai_available = True
+        except ImportError:
+            _ai_available = False
+    return _ai_available
+
 def generate_invoice_number():
     """Generate unique invoice number"""
-    return f"INV-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+    return f"{settings_store.prefix('invoice')}-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
 
 @invoices_bp.route('/invoices', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('invoices')
 def get_invoices():
     try:
         # Get query parameters
@@ -34,6 +39,7 @@ def get_invoices():
         search = request.args.get('search')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        fields = parse_fields(Invoice, request.args.get('fields'))
         
         # Build query
         query = Invoice.query
@@ -56,25 +62,11 @@ def get_invoices():
         # Order by creation date (newest first)
         query = query.order_by(Invoice.created_at.desc())
         
-        # Paginate results
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        invoices = pagination.items
-        
-        return jsonify({
-            'invoices': [invoice.to_dict() for invoice in invoices],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
-        }), 200
+        # Paginate and serialize (streamed for very large pages)
+        return list_response('invoices', query, Invoice, fields, page, per_page), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to fetch invoices'}), 500
 
@@ -122,7 +114,7 @@ def create_invoice():
         
         # Calculate invoice details
         amount = float(data['amount'])
-        tax_rate = float(data.get('tax_rate', 0.18))  # Default 18% GST
+        tax_rate = float(data.get('tax_rate', settings_store.tax_rate()))
         tax_amount = amount * tax_rate
         total_amount = amount + tax_amount
         
@@ -179,7 +171,7 @@ def create_invoice_by_order_number():
         amount = float((order.order_value or 0) - (order.advance_payment or 0))
         if amount < 0:
             amount = 0.0
-        tax_rate = float(payload.get('tax_rate', 0.18))
+        tax_rate = float(payload.get('tax_rate', settings_store.tax_rate()))
         tax_amount = amount * tax_rate
         total_amount = amount + tax_amount
 
@@ -227,7 +219,7 @@ def update_invoice(invoice_id):
         # Update allowed fields
         if 'amount' in data:
             amount = float(data['amount'])
-            tax_rate = float(data.get('tax_rate', 0.18))
+            tax_rate = float(data.get('tax_rate', settings_store.tax_rate()))
             invoice.amount = amount
             invoice.tax_amount = amount * tax_rate
             invoice.total_amount = amount + invoice.tax_amount
@@ -266,9 +258,10 @@ def update_invoice(invoice_id):
 @jwt_required()
 def check_ai_availability():
     """Check if AI invoice generation is available"""
+    available = ai_available()
     return jsonify({
-        'ai_available': AI_AVAILABLE,
-        'message': 'AI invoice generation is available' if AI_AVAILABLE else 'AI invoice generation is not available'
+        'ai_available': available,
+        'message': 'AI invoice generation is available' if available else 'AI invoice generation is not available'
     }), 200
 
 @invoices_bp.route('/invoices/<int:invoice_id>/pay', methods=['PUT'])
@@ -409,8 +402,15 @@ def view_invoice(invoice_id):
 
 @invoices_bp.route('/invoices/<int:invoice_id>/download', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('invoices', 'orders', 'customers')
 def download_invoice_pdf(invoice_id):
     """Download invoice as PDF"""
+    # ReportLab is only loaded by the first PDF a worker renders
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
     try:
         invoice = Invoice.query.get(invoice_id)
         
@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from models import Order, Customer, db
+from models import Order, Customer, FabricReservation, db
+from cache import cached_response
+from settings_store import settings_store
+from serializers import parse_fields, list_response
 from sqlalchemy import or_
+from bulk_transitions import apply_transition, ORDER_TRANSITIONS
 from datetime import datetime, date
 import uuid
 
@@ -9,10 +13,11 @@ orders_bp = Blueprint('orders', __name__)
 
 def generate_order_number():
     """Generate unique order number"""
-    return f"ORD-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+    return f"{settings_store.prefix('order')}-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
 
 @orders_bp.route('/orders', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('orders')
 def get_orders():
     try:
         # Get query parameters
@@ -20,6 +25,7 @@ def get_orders():
         search = request.args.get('search')
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        fields = parse_fields(Order, request.args.get('fields'))
         
         # Build query
         query = Order.query
@@ -41,25 +47,11 @@ def get_orders():
         # Order by creation date (newest first)
         query = query.order_by(Order.created_at.desc())
         
-        # Paginate results
-        pagination = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        orders = pagination.items
-        
-        return jsonify({
-            'orders': [order.to_dict() for order in orders],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': pagination.total,
-                'pages': pagination.pages,
-                'has_next': pagination.has_next,
-                'has_prev': pagination.has_prev
-            }
-        }), 200
+        # Paginate and serialize (streamed for very large pages)
+        return list_response('orders', query, Order, fields, page, per_page), 200
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': 'Failed to fetch orders'}), 500
 
@@ -215,6 +207,7 @@ def delete_order(order_id):
         if order.invoices:
             return jsonify({'error': 'Cannot delete order with invoices'}), 400
         
+        FabricReservation.query.filter_by(order_id=order_id).delete(synchronize_session=False)
         db.session.delete(order)
         db.session.commit()
         
@@ -254,6 +247,56 @@ def update_order_status(order_id):
         db.session.rollback()
         return jsonify({'error': 'Failed to update order status'}), 500
 
+@orders_bp.route('/orders/bulk-status', methods=['PUT'])
+@jwt_required(optional=True)
+def bulk_update_order_status():
+    """Move many orders (by ids or filter) to a new status in set-based chunks"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        if 'status' not in data:
+            return jsonify({'error': 'Status is required'}), 400
+        
+        if data['status'] not in ORDER_TRANSITIONS:
+            return jsonify({'error': f'Invalid status. Must be one of: {", ".join(ORDER_TRANSITIONS)}'}), 400
+        
+        ids = data.get('ids')
+        filters = None
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                return jsonify({'error': 'ids must be an array of integers'}), 400
+        elif isinstance(data.get('filter'), dict) and data['filter']:
+            criteria = data['filter']
+            filters = []
+            if criteria.get('status'):
+                filters.append(Order.status == criteria['status'])
+            if criteria.get('customer_id'):
+                filters.append(Order.customer_id == criteria['customer_id'])
+            if criteria.get('order_type'):
+                filters.append(Order.order_type == criteria['order_type'])
+            if criteria.get('delivery_date'):
+                filters.append(Order.delivery_date == datetime.strptime(criteria['delivery_date'], '%Y-%m-%d').date())
+            if not filters:
+                return jsonify({'error': 'filter must include status, customer_id, order_type or delivery_date'}), 400
+        else:
+            return jsonify({'error': 'ids or filter is required'}), 400
+        
+        outcome = apply_transition(Order, ORDER_TRANSITIONS, data['status'], ids=ids, filters=filters)
+        db.session.commit()
+        
+        return jsonify({
+            'status': data['status'],
+            'summary': outcome['summary'],
+            'results': outcome['results'],
+            'message': f"{len(outcome['updated_ids'])} orders updated"
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to update order statuses'}), 500
+
 @orders_bp.route('/orders/<int:order_id>/invoice', methods=['POST'])
 @jwt_required(optional=True)
 def create_order_invoice(order_id):
@@ -268,12 +311,12 @@ def create_order_invoice(order_id):
         
         # Calculate invoice details
         amount = float(data.get('amount', (order.order_value or 0) - (order.advance_payment or 0)))
-        tax_rate = float(data.get('tax_rate', 0.18))  # Default 18% GST
+        tax_rate = float(data.get('tax_rate', settings_store.tax_rate()))
         tax_amount = amount * tax_rate
         total_amount = amount + tax_amount
         
         # Generate invoice number
-        invoice_number = f"INV-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+        invoice_number = f"{settings_store.prefix('invoice')}-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
         
         # Create invoice
         from models import Invoice
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from models import Order, Invoice, Delivery, Customer, InventoryItem, db
+from models import Order, Invoice, Delivery, Customer, db
+from cache import cached_response
+from stats import inventory_stats
 from sqlalchemy import func, and_, extract
 from datetime import datetime, date, timedelta
 
@@ -8,6 +10,7 @@ reports_bp = Blueprint('reports', __name__)
 
 @reports_bp.route('/reports/sales', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('orders')
 def get_sales_report():
     try:
         # Get query parameters
@@ -204,72 +207,17 @@ def get_sales_report():
 
 @reports_bp.route('/reports/inventory', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('inventory_items')
 def get_inventory_report():
     try:
-        # Get inventory summary
-        total_items = InventoryItem.query.count()
-        low_stock_items = InventoryItem.query.filter(
-            InventoryItem.current_stock <= InventoryItem.min_stock
-        ).count()
-        out_of_stock_items = InventoryItem.query.filter(
-            InventoryItem.current_stock == 0
-        ).count()
-        
-        # Get total inventory value
-        total_value = db.session.query(func.sum(
-            InventoryItem.current_stock * InventoryItem.cost_per_unit
-        )).scalar() or 0
-        
-        # Get items by type
-        items_by_type = db.session.query(
-            InventoryItem.type,
-            func.count(InventoryItem.id).label('count'),
-            func.sum(InventoryItem.current_stock).label('total_stock'),
-            func.sum(InventoryItem.current_stock * InventoryItem.cost_per_unit).label('total_value')
-        ).group_by(InventoryItem.type).all()
-        
-        # Get low stock items details
-        low_stock_details = InventoryItem.query.filter(
-            InventoryItem.current_stock <= InventoryItem.min_stock
-        ).order_by(InventoryItem.current_stock).all()
-        
-        # Get items by status
-        items_by_status = db.session.query(
-            InventoryItem.status,
-            func.count(InventoryItem.id).label('count')
-        ).group_by(InventoryItem.status).all()
-        
-        return jsonify({
-            'summary': {
-                'totalItems': total_items,
-                'lowStockItems': low_stock_items,
-                'outOfStockItems': out_of_stock_items,
-                'totalValue': float(total_value)
-            },
-            'itemsByType': [
-                {
-                    'type': item[0],
-                    'count': item[1],
-                    'totalStock': item[2],
-                    'totalValue': float(item[3]) if item[3] else 0
-                }
-                for item in items_by_type
-            ],
-            'itemsByStatus': [
-                {
-                    'status': status[0],
-                    'count': status[1]
-                }
-                for status in items_by_status
-            ],
-            'lowStockDetails': [item.to_dict() for item in low_stock_details]
-        }), 200
+        return jsonify(inventory_stats()), 200
         
     except Exception as e:
         return jsonify({'error': 'Failed to generate inventory report'}), 500
 
 @reports_bp.route('/reports/customers', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('customers', 'orders')
 def get_customers_report():
     try:
         # Get customer summary
@@ -343,6 +291,7 @@ def get_customers_report():
 
 @reports_bp.route('/reports/financial', methods=['GET'])
 @jwt_required(optional=True)
+@cached_response('orders', 'invoices')
 def get_financial_report():
     try:
         # Get query parameters
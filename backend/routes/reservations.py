@@ -0,0 +1,127 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import IntegrityError
+from models import FabricReservation, db
+from fabric_reservations import allocate_reservations, availability, release_reservations, run_reservations
+from stock_ledger import StockError
+from user_cache import current_user_id
+
+reservations_bp = Blueprint('reservations', __name__)
+
+def parse_order_ids(data, required=True):
+    """order_ids from a JSON body; None when optional and absent"""
+    order_ids = data.get('order_ids')
+    if order_ids is None and not required:
+        return None
+    if not isinstance(order_ids, list) or not order_ids or not all(isinstance(i, int) for i in order_ids):
+        raise ValueError('order_ids must be a non-empty array of integers')
+    return order_ids
+
+@reservations_bp.route('/reservations', methods=['GET'])
+@jwt_required(optional=True)
+def get_reservations():
+    try:
+        status = request.args.get('status')
+        order_id = request.args.get('order_id', type=int)
+        item_id = request.args.get('item_id', type=int)
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 50, type=int)
+
+        query = FabricReservation.query
+        if status:
+            query = query.filter(FabricReservation.status == status)
+        if order_id:
+            query = query.filter(FabricReservation.order_id == order_id)
+        if item_id:
+            query = query.filter(FabricReservation.item_id == item_id)
+
+        reservations = query.order_by(FabricReservation.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+
+        return jsonify({
+            'reservations': [reservation.to_dict() for reservation in reservations.items],
+            'pagination': {
+                'page': page,
+                'per_page': per_page,
+                'total': reservations.total,
+                'pages': reservations.pages,
+                'has_next': reservations.has_next,
+                'has_prev': reservations.has_prev
+            }
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch reservations'}), 500
+
+@reservations_bp.route('/reservations/availability', methods=['GET'])
+@jwt_required(optional=True)
+def get_fabric_availability():
+    """Stock, reserved and free metres per fabric item"""
+    try:
+        return jsonify({'items': list(availability().values())}), 200
+
+    except Exception as e:
+        return jsonify({'error': 'Failed to fetch fabric availability'}), 500
+
+@reservations_bp.route('/reservations/run', methods=['POST'])
+@jwt_required()
+def run_fabric_reservations():
+    """Reserve fabric for all (or the given) open orders and report shortages"""
+    try:
+        data = request.get_json(silent=True) or {}
+        order_ids = parse_order_ids(data, required=False)
+        dry_run = bool(data.get('dry_run', False))
+
+        result = run_reservations(order_ids=order_ids, dry_run=dry_run)
+        result['message'] = f"{result['reserved_orders']} orders reserved"
+
+        return jsonify(result), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except IntegrityError:
+        # Another run reserved some of these orders first
+        db.session.rollback()
+        return jsonify({'error': 'Another reservation run reserved these orders; run again'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to reserve fabric'}), 500
+
+@reservations_bp.route('/reservations/allocate', methods=['POST'])
+@jwt_required()
+def allocate_fabric():
+    """Consume the reserved fabric of orders going to cutting"""
+    try:
+        data = request.get_json(silent=True) or {}
+        result = allocate_reservations(parse_order_ids(data), user_id=current_user_id())
+        result['message'] = f"{result['allocated']} reservations allocated"
+
+        return jsonify(result), 200
+
+    except StockError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e), 'details': e.details}), e.status_code
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to allocate fabric'}), 500
+
+@reservations_bp.route('/reservations/release', methods=['POST'])
+@jwt_required()
+def release_fabric():
+    try:
+        data = request.get_json(silent=True) or {}
+        released = release_reservations(parse_order_ids(data))
+
+        return jsonify({
+            'released': released,
+            'message': f'{released} reservations released'
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': 'Failed to release reservations'}), 500
@@ -1,48 +1,17 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
 from models import Settings, db
+from settings_store import DEFAULT_SETTINGS, settings_store, validate_values
+from datetime import datetime
 
 settings_bp = Blueprint('settings', __name__)
 
-# Default settings
-DEFAULT_SETTINGS = {
-    'company_name': 'TEX-SARTHI',
-    'company_address': '',
-    'company_phone': '',
-    'company_email': '',
-    'company_gst': '',
-    'tax_rate': '18',
-    'currency': 'INR',
-    'invoice_prefix': 'INV',
-    'order_prefix': 'ORD',
-    'delivery_prefix': 'DEL',
-    'low_stock_threshold': '10',
-    'auto_generate_invoice': 'true',
-    'auto_generate_delivery': 'false',
-    'backup_frequency': 'daily',
-    'email_notifications': 'true',
-    'sms_notifications': 'false'
-}
-
 @settings_bp.route('/settings', methods=['GET'])
 @jwt_required()
 def get_settings():
     try:
-        # Get all settings
-        settings = Settings.query.all()
-        
-        # Convert to dictionary
-        settings_dict = {}
-        for setting in settings:
-            settings_dict[setting.key] = setting.value
-        
-        # Add default settings if not present
-        for key, value in DEFAULT_SETTINGS.items():
-            if key not in settings_dict:
-                settings_dict[key] = value
-        
         return jsonify({
-            'settings': settings_dict,
+            'settings': settings_store.all(),
             'message': 'Settings retrieved successfully'
         }), 200
         
@@ -58,20 +27,13 @@ def update_settings():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        # Update or create settings
-        for key, value in data.items():
-            setting = Settings.query.filter_by(key=key).first()
-            
-            if setting:
-                setting.value = str(value)
-            else:
-                setting = Settings(
-                    key=key,
-                    value=str(value),
-                    description=f'Setting for {key}'
-                )
-                db.session.add(setting)
+        try:
+            validate_values(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
+        # Update or create every key in one statement
+        settings_store.upsert(data)
         db.session.commit()
         
         return jsonify({
@@ -116,23 +78,18 @@ def update_setting(key):
         if not data or 'value' not in data:
             return jsonify({'error': 'Value is required'}), 400
         
-        setting = Settings.query.filter_by(key=key).first()
-        
-        if setting:
-            setting.value = str(data['value'])
-        else:
-            setting = Settings(
-                key=key,
-                value=str(data['value']),
-                description=data.get('description', f'Setting for {key}')
-            )
-            db.session.add(setting)
+        try:
+            validate_values({key: data['value']})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
+        descriptions = {key: data['description']} if data.get('description') else None
+        settings_store.upsert({key: data['value']}, descriptions)
         db.session.commit()
         
         return jsonify({
-            'key': setting.key,
-            'value': setting.value,
+            'key': key,
+            'value': str(data['value']),
             'message': 'Setting updated successfully'
         }), 200
         
@@ -155,6 +112,7 @@ def delete_setting(key):
         
         db.session.delete(setting)
         db.session.commit()
+        settings_store.invalidate()
         
         return jsonify({'message': 'Setting deleted successfully'}), 200
         
@@ -166,27 +124,11 @@ def delete_setting(key):
 @jwt_required()
 def reset_settings():
     try:
-        # Delete all custom settings (keep only default ones)
-        custom_settings = Settings.query.filter(
-            ~Settings.key.in_(DEFAULT_SETTINGS.keys())
-        ).all()
-        
-        for setting in custom_settings:
-            db.session.delete(setting)
-        
-        # Reset default settings to their default values
-        for key, value in DEFAULT_SETTINGS.items():
-            setting = Settings.query.filter_by(key=key).first()
-            if setting:
-                setting.value = value
-            else:
-                setting = Settings(
-                    key=key,
-                    value=value,
-                    description=f'Default setting for {key}'
-                )
-                db.session.add(setting)
-        
+        # Drop custom settings and write every default back
+        settings_store.replace(
+            DEFAULT_SETTINGS,
+            {key: f'Default setting for {key}' for key in DEFAULT_SETTINGS}
+        )
         db.session.commit()
         
         return jsonify({'message': 'Settings reset to defaults successfully'}), 200
@@ -238,18 +180,17 @@ def restore_settings():
         if 'settings' not in backup_data:
             return jsonify({'error': 'Invalid backup format'}), 400
         
-        # Clear existing settings
-        Settings.query.delete()
-        
-        # Restore settings from backup
-        for key, setting_data in backup_data['settings'].items():
-            setting = Settings(
-                key=key,
-                value=setting_data['value'],
-                description=setting_data.get('description', f'Setting for {key}')
-            )
-            db.session.add(setting)
-        
+        try:
+            validate_values({key: setting_data['value'] for key, setting_data in backup_data['settings'].items()})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Replace existing settings with the backup
+        settings_store.replace(
+            {key: setting_data['value'] for key, setting_data in backup_data['settings'].items()},
+            {key: setting_data.get('description') or f'Setting for {key}'
+             for key, setting_data in backup_data['settings'].items()}
+        )
         db.session.commit()
         
         return jsonify({'message': 'Settings restored successfully'}), 200
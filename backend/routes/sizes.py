@@ -0,0 +1,93 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+import logging
+
+logger = logging.getLogger(__name__)
+
+sizes_bp = Blueprint('sizes', __name__)
+
+MAX_SIZES = 12
+
+def requested_sizes(value):
+    """Number of sizes from the request; None keeps the cached chart's (or SIZE_CHART_SIZES)"""
+    if value in (None, ''):
+        return None
+    k = int(value)
+    if not 2 <= k <= MAX_SIZES:
+        raise ValueError(f'sizes must be between 2 and {MAX_SIZES}')
+    return k
+
+@sizes_bp.route('/sizes', methods=['GET'])
+@jwt_required(optional=True)
+def get_size_charts():
+    """Size charts currently cached, per order type"""
+    from size_clusters import size_clusters
+    try:
+        return jsonify({'charts': size_clusters.stats()}), 200
+        
+    except Exception as e:
+        logger.error(f"Error reading size charts: {str(e)}")
+        return jsonify({'error': 'Failed to fetch size charts'}), 500
+
+@sizes_bp.route('/sizes/<order_type>', methods=['GET'])
+@jwt_required(optional=True)
+def get_size_chart(order_type):
+    """Standard sizes of an order type, refreshed with orders changed since the last pass"""
+    from size_clusters import MIN_ORDERS, size_clusters
+    try:
+        chart = size_clusters.chart(
+            order_type,
+            requested_sizes(request.args.get('sizes')),
+            include_orders=request.args.get('include_orders', 'false').lower() == 'true'
+        )
+        if chart is None:
+            return jsonify({'error': f'At least {MIN_ORDERS} measured orders are needed for a size chart'}), 404
+        
+        return jsonify({'chart': chart}), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error building size chart: {str(e)}")
+        return jsonify({'error': 'Failed to build size chart'}), 500
+
+@sizes_bp.route('/sizes/<order_type>/rebuild', methods=['POST'])
+@jwt_required()
+def rebuild_size_chart(order_type):
+    """Re-cluster all orders of a type from scratch"""
+    from size_clusters import MIN_ORDERS, size_clusters
+    try:
+        data = request.get_json(silent=True) or {}
+        model = size_clusters.build(order_type, requested_sizes(data.get('sizes')))
+        if model is None:
+            return jsonify({'error': f'At least {MIN_ORDERS} measured orders are needed for a size chart'}), 404
+        
+        return jsonify({
+            'chart': size_clusters.chart(order_type, model.k),
+            'message': 'Size chart rebuilt successfully'
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error rebuilding size chart: {str(e)}")
+        return jsonify({'error': 'Failed to rebuild size chart'}), 500
+
+@sizes_bp.route('/sizes/<order_type>/suggest', methods=['POST'])
+@jwt_required(optional=True)
+def suggest_size(order_type):
+    """Nearest standard size for the given measurements"""
+    from size_clusters import MIN_ORDERS, size_clusters
+    try:
+        data = request.get_json(silent=True) or {}
+        suggestion = size_clusters.suggest(order_type, data.get('measurements'), requested_sizes(data.get('sizes')))
+        if suggestion is None:
+            return jsonify({'error': f'At least {MIN_ORDERS} measured orders are needed for a size chart'}), 404
+        
+        return jsonify(suggestion), 200
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error suggesting size: {str(e)}")
+        return jsonify({'error': 'Failed to suggest size'}), 500
@@ -0,0 +1,264 @@
+"""
+TEX-SARTHI Serializers
+Sparse fieldsets and precompiled row-to-dict functions for list endpoints,
+plus an optional orjson-backed JSON provider
+"""
+
+import math
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import current_app, jsonify
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import Date, DateTime
+from sqlalchemy.orm import load_only, selectinload
+
+from models import Customer, Delivery, InventoryItem, Invoice, Order
+from streaming import stream_json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _customer_total_orders(customer):
+    return len(customer.orders)
+
+
+def _customer_total_spent(customer):
+    return sum(order.order_value for order in customer.orders if order.status == 'completed')
+
+
+def _customer_outstanding(customer):
+    return sum(order.order_value for order in customer.orders if order.status in ['pending', 'in_progress'])
+
+
+def _customer_last_order_date(customer):
+    last = max([order.created_at for order in customer.orders]) if customer.orders else None
+    return last.isoformat() if last else None
+
+
+def _item_total_value(item):
+    # Same as InventoryItem.total_value, but also works on Row tuples
+    return item.current_stock * item.cost_per_unit
+
+
+# Derived keys of to_dict(): how to compute them, which columns they need and
+# whether they can be computed from a plain Row (no relationship access)
+COMPUTED_FIELDS = {
+    Customer: {
+        'total_orders': (_customer_total_orders, [], False),
+        'total_spent': (_customer_total_spent, [], False),
+        'outstanding_amount': (_customer_outstanding, [], False),
+        'last_order_date': (_customer_last_order_date, [], False)
+    },
+    InventoryItem: {
+        'total_value': (_item_total_value, ['current_stock', 'cost_per_unit'], True)
+    }
+}
+
+# Rows fetched per round trip when a page is streamed
+STREAM_BATCH_SIZE = 500
+
+# Order columns that customer statistics read
+CUSTOMER_ORDER_COLUMNS = (Order.order_value, Order.status, Order.created_at)
+
+# Named presets for table views; "all" is the full to_dict()
+PRESETS = {
+    Order: {
+        'summary': ['id', 'order_number', 'customer_id', 'customer_name', 'order_type', 'quantity',
+                    'order_value', 'advance_payment', 'delivery_date', 'status', 'created_at']
+    },
+    Customer: {
+        'summary': ['id', 'name', 'email', 'phone', 'city'],
+        'stats': ['id', 'name', 'phone', 'city', 'total_orders', 'total_spent', 'outstanding_amount']
+    },
+    Invoice: {
+        'summary': ['id', 'invoice_number', 'order_id', 'customer_id', 'total_amount', 'status',
+                    'due_date', 'created_at']
+    },
+    Delivery: {
+        'summary': ['id', 'delivery_number', 'order_id', 'customer_id', 'delivery_date', 'status',
+                    'delivery_person']
+    },
+    InventoryItem: {
+        'summary': ['id', 'item_name', 'type', 'color', 'current_stock', 'min_stock', 'status']
+    }
+}
+
+
+def available_fields(model) -> List[str]:
+    """Keys a model can serialize, in to_dict() order"""
+    return [c.key for c in model.__table__.columns] + list(COMPUTED_FIELDS.get(model, {}))
+
+
+def parse_fields(model, raw: Optional[str]) -> Optional[List[str]]:
+    """Parse a fields= argument (names and/or preset names); None means the full to_dict()"""
+    if not raw:
+        return None
+
+    allowed = available_fields(model)
+    presets = PRESETS.get(model, {})
+    fields = []
+    for name in (part.strip() for part in raw.split(',')):
+        if not name:
+            continue
+        if name == 'all':
+            return None
+        if name in presets:
+            fields.extend(presets[name])
+        elif name in allowed:
+            fields.append(name)
+        else:
+            raise ValueError(f'Unknown field: {name}')
+
+    # id is always returned so rows stay addressable
+    return list(dict.fromkeys(['id'] + fields))
+
+
+def apply_fieldset(query, model, fields: Optional[List[str]]):
+    """Restrict the SELECT to the columns the requested fields need"""
+    if fields is None:
+        if model is Customer:
+            # to_dict() walks every customer's orders; load them in one IN query
+            query = query.options(selectinload(Customer.orders).load_only(*CUSTOMER_ORDER_COLUMNS))
+        return query
+
+    computed = COMPUTED_FIELDS.get(model, {})
+    columns = set()
+    for name in fields:
+        if name in computed:
+            columns.update(computed[name][1])
+        else:
+            columns.add(name)
+    query = query.options(load_only(*[getattr(model, name) for name in columns]))
+
+    if model is Customer and any(name in computed for name in fields):
+        # One IN query for all orders on the page, only the columns the stats use
+        query = query.options(selectinload(Customer.orders).load_only(*CUSTOMER_ORDER_COLUMNS))
+
+    return query
+
+
+def required_columns(model, fields: Tuple[str, ...]) -> List[str]:
+    """Columns to SELECT for a fieldset, in a stable order"""
+    computed = COMPUTED_FIELDS.get(model, {})
+    columns = []
+    for name in fields:
+        for column in (computed[name][1] if name in computed else [name]):
+            if column not in columns:
+                columns.append(column)
+    return columns
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(model, fields: Tuple[str, ...], from_row: bool = False) -> Callable:
+    """Generate a specialized obj/Row -> dict function once per model and fieldset"""
+    computed = COMPUTED_FIELDS.get(model, {})
+    table_columns = model.__table__.columns
+    positions = {name: i for i, name in enumerate(required_columns(model, fields))}
+
+    namespace = {}
+    body = []
+    entries = []
+    for i, name in enumerate(fields):
+        if name in computed:
+            namespace[f'_computed_{i}'] = computed[name][0]
+            entries.append(f'{name!r}: _computed_{i}(obj)')
+            continue
+        access = f'obj[{positions[name]}]' if from_row else f'obj.{name}'
+        if isinstance(table_columns[name].type, (Date, DateTime)):
+            # Only date columns pay for the isoformat() branch
+            body.append(f'    v{i} = {access}')
+            entries.append(f'{name!r}: v{i}.isoformat() if v{i} is not None else None')
+        else:
+            entries.append(f'{name!r}: {access}')
+
+    source = 'def serialize(obj):\n' + ''.join(line + '\n' for line in body)
+    source += '    return {' + ', '.join(entries) + '}\n'
+    exec(compile(source, f'<serializer {model.__name__}>', 'exec'), namespace)
+    return namespace['serialize']
+
+
+def full_fieldset(model) -> Tuple[str, ...]:
+    """Keys of to_dict() for the list models"""
+    return tuple(available_fields(model))
+
+
+def row_serializable(model, fields: Optional[List[str]]) -> bool:
+    """True when every requested key can be produced from selected columns alone"""
+    computed = COMPUTED_FIELDS.get(model, {})
+    return all(computed[name][2] for name in (fields or full_fieldset(model)) if name in computed)
+
+
+def serialize(obj, fields: Optional[List[str]]) -> Dict:
+    """Serialize only the requested keys; without a fieldset, the same keys as to_dict()"""
+    model = type(obj)
+    return compile_serializer(model, tuple(fields) if fields else full_fieldset(model))(obj)
+
+
+def paginate_serialized(query, model, fields: Optional[List[str]], page: int, per_page: int,
+                        lazy: bool = False) -> Tuple[Iterable[Dict], Dict]:
+    """Page a filtered/ordered query and serialize it, skipping ORM hydration when possible.
+    With lazy=True the items are a generator that fetches rows in batches."""
+    page = page if page and page > 0 else 1
+    per_page = per_page if per_page and per_page > 0 else 20
+    key = tuple(fields) if fields else full_fieldset(model)
+
+    if row_serializable(model, fields):
+        columns = [getattr(model, name) for name in required_columns(model, key)]
+        page_query = query.with_entities(*columns)
+        serializer = compile_serializer(model, key, from_row=True)
+    else:
+        page_query = apply_fieldset(query, model, fields)
+        serializer = compile_serializer(model, key)
+    page_query = page_query.limit(per_page).offset((page - 1) * per_page)
+
+    if lazy:
+        items = (serializer(row) for row in page_query.yield_per(STREAM_BATCH_SIZE))
+    else:
+        items = [serializer(row) for row in page_query.all()]
+
+    total = query.order_by(None).count()
+    pages = math.ceil(total / per_page) if total else 0
+    return items, {
+        'page': page,
+        'per_page': per_page,
+        'total': total,
+        'pages': pages,
+        'has_next': page < pages,
+        'has_prev': page > 1
+    }
+
+
+def list_response(key: str, query, model, fields: Optional[List[str]], page: int, per_page: int):
+    """JSON list response; pages above STREAMING_THRESHOLD rows are streamed"""
+    threshold = current_app.config.get('STREAMING_THRESHOLD', 500)
+    if per_page and per_page > threshold:
+        items, pagination = paginate_serialized(query, model, fields, page, per_page, lazy=True)
+        return stream_json({'pagination': pagination}, key, items)
+
+    items, pagination = paginate_serialized(query, model, fields, page, per_page)
+    return jsonify({key: items, 'pagination': pagination})
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; same output as the default provider"""
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def init_json_provider(app):
+    """Use orjson for request/response JSON when it is installed"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,230 @@
+"""
+TEX-SARTHI Settings Store
+Process-wide copy of the settings table with typed accessors, reloaded when the
+settings table version moves, and bulk upserts for writes
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from flask import current_app, has_app_context
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session
+
+from cache import table_versions
+from models import Settings, db
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'company_name': 'TEX-SARTHI',
+    'company_address': '',
+    'company_phone': '',
+    'company_email': '',
+    'company_gst': '',
+    'tax_rate': '18',
+    'currency': 'INR',
+    'invoice_prefix': 'INV',
+    'order_prefix': 'ORD',
+    'delivery_prefix': 'DEL',
+    'low_stock_threshold': '10',
+    'auto_generate_invoice': 'true',
+    'auto_generate_delivery': 'false',
+    'backup_frequency': 'daily',
+    'email_notifications': 'true',
+    'sms_notifications': 'false'
+}
+
+# Settings read as something other than a string; values are always stored as text
+SETTING_TYPES = {
+    'tax_rate': float,
+    'low_stock_threshold': int,
+    'auto_generate_invoice': bool,
+    'auto_generate_delivery': bool,
+    'email_notifications': bool,
+    'sms_notifications': bool
+}
+
+# Inclusive bounds checked when numeric settings are written (None: unbounded)
+SETTING_RANGES = {
+    'tax_rate': (0, 100),
+    'low_stock_threshold': (0, None)
+}
+
+# Seconds a worker trusts its copy before comparing the settings version again
+DEFAULT_CHECK_SECONDS = 2
+
+settings_table = Settings.__table__
+
+
+def parse_value(key: str, value: Optional[str]):
+    """Typed value of a stored setting, falling back to the default on bad input"""
+    kind = SETTING_TYPES.get(key, str)
+    if kind is str:
+        return value if value is not None else DEFAULT_SETTINGS.get(key, '')
+    try:
+        if kind is bool:
+            return str(value).strip().lower() in ('true', '1', 'yes', 'on')
+        return kind(str(value).strip())
+    except (TypeError, ValueError):
+        if key in DEFAULT_SETTINGS and value != DEFAULT_SETTINGS[key]:
+            return parse_value(key, DEFAULT_SETTINGS[key])
+        return None
+
+
+def validate_values(values: Dict[str, object]):
+    """Raise ValueError for a numeric setting that does not parse or is out of range"""
+    for key, value in values.items():
+        kind = SETTING_TYPES.get(key)
+        if kind not in (int, float):
+            continue
+        try:
+            number = kind(str(value).strip())
+        except (TypeError, ValueError):
+            raise ValueError(f'{key} must be a number')
+        low, high = SETTING_RANGES.get(key, (None, None))
+        if (low is not None and number < low) or (high is not None and number > high):
+            bounds = f'between {low} and {high}' if high is not None else f'at least {low}'
+            raise ValueError(f'{key} must be {bounds}')
+
+
+class SettingsStore:
+    """Raw and typed settings merged over the defaults, shared by all threads of a worker.
+    Reads are dictionary lookups; the settings version is compared at most every check_seconds,
+    and writes made through the store are visible immediately."""
+
+    def __init__(self):
+        self._raw: Dict[str, str] = dict(DEFAULT_SETTINGS)
+        self._typed: Dict[str, object] = {key: parse_value(key, value) for key, value in self._raw.items()}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def _check_seconds(self) -> float:
+        return current_app.config.get('SETTINGS_CHECK_SECONDS', DEFAULT_CHECK_SECONDS)
+
+    def _current(self):
+        """Reload from the database if the settings version moved since the last check"""
+        if not has_app_context():
+            return
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self._check_seconds():
+            return
+        with self._lock:
+            if self._version is not None and now - self._checked_at < self._check_seconds():
+                return
+            try:
+                version = table_versions(('settings',))[0]
+                if version != self._version:
+                    self._load(version)
+                self._checked_at = time.monotonic()
+            except Exception as e:
+                # Keep serving the last known values (or defaults) rather than failing the caller
+                logger.warning(f"Could not refresh settings: {str(e)}")
+
+    def _load(self, version: int):
+        rows = db.session.execute(select(Settings.key, Settings.value)).all()
+        raw = dict(DEFAULT_SETTINGS)
+        raw.update({key: value for key, value in rows})
+        self._typed = {key: parse_value(key, value) for key, value in raw.items()}
+        self._raw = raw
+        self._version = version
+        self.reloads += 1
+
+    def invalidate(self):
+        """Force the next read to compare versions"""
+        self._version = None
+
+    def all(self) -> Dict[str, str]:
+        """Every setting as stored text, defaults filled in"""
+        self._current()
+        return dict(self._raw)
+
+    def raw(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        self._current()
+        return self._raw.get(key, default)
+
+    def get(self, key: str, default=None):
+        """Typed value of a setting (see SETTING_TYPES)"""
+        self._current()
+        value = self._typed.get(key)
+        return default if value is None else value
+
+    def tax_rate(self) -> float:
+        """Default tax rate as a fraction; the setting is stored as a percentage (18 -> 0.18)"""
+        return self.get('tax_rate', 18.0) / 100
+
+    def prefix(self, kind: str) -> str:
+        """Document number prefix for 'invoice', 'order' or 'delivery'"""
+        return self.get(f'{kind}_prefix') or DEFAULT_SETTINGS[f'{kind}_prefix']
+
+    def upsert(self, values: Dict[str, object], descriptions: Optional[Dict[str, str]] = None):
+        """Write many settings in one statement (caller commits)"""
+        if not values:
+            return
+        descriptions = descriptions or {}
+        now = datetime.utcnow()
+        rows = [
+            {
+                'key': key,
+                'value': str(value),
+                'description': descriptions.get(key, f'Setting for {key}'),
+                'created_at': now,
+                'updated_at': now
+            }
+            for key, value in values.items()
+        ]
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect in ('postgresql', 'sqlite'):
+            if dialect == 'postgresql':
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            statement = insert(Settings).values(rows)
+            set_ = {'value': statement.excluded.value, 'updated_at': statement.excluded.updated_at}
+            if descriptions:
+                set_['description'] = statement.excluded.description
+            db.session.execute(statement.on_conflict_do_update(index_elements=[Settings.key], set_=set_))
+        else:
+            existing = set(db.session.execute(
+                select(Settings.key).where(Settings.key.in_(list(values)))
+            ).scalars())
+            for row in rows:
+                if row['key'] in existing:
+                    changes = {'value': row['value'], 'updated_at': now}
+                    if row['key'] in descriptions:
+                        changes['description'] = row['description']
+                    db.session.execute(update(Settings).where(Settings.key == row['key']).values(**changes))
+            missing = [row for row in rows if row['key'] not in existing]
+            if missing:
+                db.session.execute(settings_table.insert(), missing)
+        db.session.info['settings_written'] = True
+
+    def replace(self, values: Dict[str, object], descriptions: Optional[Dict[str, str]] = None):
+        """Drop every stored setting, then write `values` (caller commits)"""
+        db.session.execute(delete(Settings))
+        db.session.info['settings_written'] = True
+        self.upsert(values, descriptions)
+
+    def stats(self) -> Dict:
+        return {'version': self._version, 'keys': len(self._raw), 'reloads': self.reloads}
+
+
+settings_store = SettingsStore()
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    # Only once committed: a rolled-back write must not be cached under the old version
+    if session.info.pop('settings_written', False):
+        settings_store.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('settings_written', None)
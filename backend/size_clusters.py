@@ -0,0 +1,369 @@
+"""
+TEX-SARTHI Size Clustering
+Standard size charts per order type from customer measurements (vectorized
+k-means), with every order assigned to its nearest size
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, select
+
+from cutting_plan import INCH, body_measurements
+from models import Order, db
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ('chest', 'waist', 'length', 'sleeve', 'shoulder')
+
+SIZE_LABELS = ('XS', 'S', 'M', 'L', 'XL', 'XXL', '3XL', '4XL')
+
+# An order needs this many of FEATURES measured to be clustered; the rest are imputed
+MIN_FEATURES = 3
+
+# Orders of a type needed before a size chart is proposed
+MIN_ORDERS = 10
+
+# Refit from scratch once this share of a model's orders changed since the last fit
+REFIT_FRACTION = 0.25
+
+EXCLUDED_STATUSES = ('cancelled',)
+
+
+def normalize_type(order_type: Optional[str]) -> str:
+    return (order_type or '').strip().lower()
+
+
+def default_sizes() -> int:
+    return current_app.config.get('SIZE_CHART_SIZES', 5)
+
+
+def measurement_vector(raw) -> Optional[np.ndarray]:
+    """FEATURES in inches (NaN where missing), or None with fewer than MIN_FEATURES measured"""
+    measured = body_measurements(raw, fill_defaults=False)
+    vector = np.array([measured.get(name, np.nan) / INCH for name in FEATURES])
+    if np.count_nonzero(~np.isnan(vector)) < MIN_FEATURES:
+        return None
+    return vector
+
+
+def size_labels(k: int) -> List[str]:
+    """XS..4XL centred on M; numbered sizes beyond that"""
+    if k > len(SIZE_LABELS):
+        return [f'Size {i + 1}' for i in range(k)]
+    start = 1 if k <= len(SIZE_LABELS) - 3 else 0
+    return list(SIZE_LABELS[start:start + k])
+
+
+def _squared_distances(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """(n, k) squared Euclidean distances without materialising (n, k, features)"""
+    return np.maximum(
+        (points ** 2).sum(axis=1)[:, None] - 2 * points @ centroids.T + (centroids ** 2).sum(axis=1)[None, :],
+        0
+    )
+
+
+def kmeans(points: np.ndarray, k: int, n_init: int = 4, max_iter: int = 100, tol: float = 1e-6,
+           seed: int = 0) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Lloyd's k-means with k-means++ seeding; best (centroids, labels, inertia) of n_init runs"""
+    rng = np.random.default_rng(seed)
+    n, features = points.shape
+    best = None
+
+    for _ in range(n_init):
+        # k-means++: each next centre drawn in proportion to squared distance from the chosen ones
+        centroids = np.empty((k, features))
+        centroids[0] = points[rng.integers(n)]
+        closest = _squared_distances(points, centroids[:1])[:, 0]
+        for i in range(1, k):
+            total = closest.sum()
+            index = rng.choice(n, p=closest / total) if total > 0 else rng.integers(n)
+            centroids[i] = points[index]
+            closest = np.minimum(closest, _squared_distances(points, centroids[i:i + 1])[:, 0])
+
+        for _ in range(max_iter):
+            distances = _squared_distances(points, centroids)
+            labels = distances.argmin(axis=1)
+            counts = np.bincount(labels, minlength=k)
+            sums = np.stack([np.bincount(labels, weights=points[:, j], minlength=k) for j in range(features)], axis=1)
+
+            updated = centroids.copy()
+            filled = counts > 0
+            updated[filled] = sums[filled] / counts[filled, None]
+            # An empty cluster takes the point that is currently worst served
+            for empty in np.flatnonzero(~filled):
+                worst = distances[np.arange(n), labels].argmax()
+                updated[empty] = points[worst]
+                distances[worst] = 0
+
+            shift = ((updated - centroids) ** 2).sum()
+            centroids = updated
+            if shift <= tol:
+                break
+
+        distances = _squared_distances(points, centroids)
+        labels = distances.argmin(axis=1)
+        inertia = float(distances[np.arange(n), labels].sum())
+        if best is None or inertia < best[2]:
+            best = (centroids, labels, inertia)
+
+    return best
+
+
+class SizeModel:
+    """Size chart of one order type: centroids in standardized space plus per-order vectors and sizes"""
+
+    def __init__(self, order_type: str, k: int):
+        self.order_type = order_type
+        self.k = k
+        self.labels: List[str] = []
+        self.mean = np.zeros(len(FEATURES))
+        self.scale = np.ones(len(FEATURES))
+        self.medians = np.zeros(len(FEATURES))
+        self.centroids = np.zeros((0, len(FEATURES)))
+        self.counts = np.zeros(0, dtype=np.int64)
+        # order_id -> (raw vector with NaNs, cluster index)
+        self.rows: Dict[int, Tuple[np.ndarray, int]] = {}
+        self.changed_since_fit = 0
+        self.inertia = 0.0
+        self.watermark: Optional[datetime] = None
+        self.fitted_at: Optional[datetime] = None
+        self.refreshed_at: Optional[datetime] = None
+
+    def _impute(self, raw: np.ndarray) -> np.ndarray:
+        return np.where(np.isnan(raw), self.medians, raw)
+
+    def _standardize(self, values: np.ndarray) -> np.ndarray:
+        return (values - self.mean) / self.scale
+
+    def fit(self, vectors: Dict[int, np.ndarray]):
+        """Cluster every order from scratch; sizes are ordered by chest, then length"""
+        ids = list(vectors)
+        raw = np.vstack([vectors[i] for i in ids])
+        self.medians = np.nan_to_num(np.nanmedian(raw, axis=0), nan=0.0)
+        values = np.where(np.isnan(raw), self.medians, raw)
+        self.mean = values.mean(axis=0)
+        self.scale = values.std(axis=0)
+        self.scale[self.scale == 0] = 1.0
+
+        points = self._standardize(values)
+        k = min(self.k, len(np.unique(values, axis=0)))
+        centroids, labels, self.inertia = kmeans(points, k)
+
+        chest, length = FEATURES.index('chest'), FEATURES.index('length')
+        order = np.lexsort((centroids[:, length], centroids[:, chest]))
+        rank = np.empty(k, dtype=np.int64)
+        rank[order] = np.arange(k)
+
+        self.centroids = centroids[order]
+        self.counts = np.bincount(rank[labels], minlength=k)
+        self.labels = size_labels(k)
+        self.rows = {order_id: (raw[i], int(rank[labels[i]])) for i, order_id in enumerate(ids)}
+        self.changed_since_fit = 0
+        self.fitted_at = self.refreshed_at = datetime.utcnow()
+
+    def assign(self, raw: np.ndarray) -> Tuple[int, float]:
+        """Nearest size for a raw vector: (cluster index, distance in standardized units)"""
+        point = self._standardize(self._impute(raw))
+        distances = _squared_distances(point[None, :], self.centroids)[0]
+        cluster = int(distances.argmin())
+        return cluster, float(np.sqrt(distances[cluster]))
+
+    def remove(self, order_id: int):
+        previous = self.rows.pop(order_id, None)
+        if previous is None:
+            return
+        point = self._standardize(self._impute(previous[0]))
+        cluster = previous[1]
+        if self.counts[cluster] > 1:
+            self.centroids[cluster] = (self.centroids[cluster] * self.counts[cluster] - point) / (self.counts[cluster] - 1)
+        self.counts[cluster] -= 1
+        self.changed_since_fit += 1
+
+    def add(self, order_id: int, raw: np.ndarray):
+        """Assign to the nearest size and move that centroid towards the order (online k-means)"""
+        cluster, _ = self.assign(raw)
+        self.counts[cluster] += 1
+        point = self._standardize(self._impute(raw))
+        self.centroids[cluster] += (point - self.centroids[cluster]) / self.counts[cluster]
+        self.rows[order_id] = (raw, cluster)
+        self.changed_since_fit += 1
+
+    def needs_refit(self) -> bool:
+        return self.changed_since_fit > REFIT_FRACTION * max(len(self.rows), 1)
+
+    def chart(self, include_orders: bool = False) -> Dict:
+        ids = list(self.rows)
+        values = np.vstack([self._impute(self.rows[i][0]) for i in ids])
+        clusters = np.fromiter((self.rows[i][1] for i in ids), dtype=np.int64, count=len(ids))
+        centres = self.centroids * self.scale + self.mean
+
+        sizes = []
+        for cluster, label in enumerate(self.labels):
+            members = values[clusters == cluster]
+            size = {'size': label, 'orders': int(len(members)), 'measurements': {}}
+            for j, name in enumerate(FEATURES):
+                entry = {'centre': round(float(centres[cluster, j]) * 2) / 2}
+                if len(members):
+                    entry['min'] = round(float(members[:, j].min()), 1)
+                    entry['max'] = round(float(members[:, j].max()), 1)
+                size['measurements'][name] = entry
+            sizes.append(size)
+
+        result = {
+            'order_type': self.order_type,
+            'unit': 'in',
+            'features': list(FEATURES),
+            'orders': len(ids),
+            'sizes': sizes,
+            'inertia': round(self.inertia, 3),
+            'fitted_at': self.fitted_at.isoformat() if self.fitted_at else None,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
+        if include_orders:
+            result['assignments'] = [
+                {'order_id': order_id, 'size': self.labels[cluster]}
+                for order_id, cluster in zip(ids, clusters.tolist())
+            ]
+        return result
+
+
+class SizeClusters:
+    """Size models cached per order type and refreshed from orders changed since the last pass"""
+
+    def __init__(self):
+        self._models: Dict[str, SizeModel] = {}
+        self._lock = threading.Lock()
+
+    def _fetch(self, order_type: str, since: Optional[datetime] = None):
+        query = select(Order.id, Order.measurements, Order.status, Order.updated_at) \
+            .where(func.lower(func.trim(Order.order_type)) == order_type)
+        if since is not None:
+            query = query.where(Order.updated_at > since)
+        return db.session.execute(query).all()
+
+    def build(self, order_type: str, k: Optional[int] = None) -> Optional[SizeModel]:
+        """Fit a model from all orders of the type; None when too few are measured"""
+        order_type = normalize_type(order_type)
+        k = k or default_sizes()
+        rows = self._fetch(order_type)
+        vectors = {}
+        for order_id, measurements, status, _ in rows:
+            if status in EXCLUDED_STATUSES:
+                continue
+            vector = measurement_vector(measurements)
+            if vector is not None:
+                vectors[order_id] = vector
+
+        if len(vectors) < max(MIN_ORDERS, k):
+            with self._lock:
+                self._models.pop(order_type, None)
+            return None
+
+        model = SizeModel(order_type, k)
+        model.fit(vectors)
+        model.watermark = max((r.updated_at for r in rows if r.updated_at), default=None)
+        with self._lock:
+            self._models[order_type] = model
+
+        logger.info(f"Size chart for {order_type} fitted from {len(vectors)} orders ({len(model.labels)} sizes)")
+        return model
+
+    def refresh(self, order_type: str, k: Optional[int] = None) -> Optional[SizeModel]:
+        """Fold changed orders into a cached model, refitting when the model is stale or k changed.
+        Without k a cached model keeps its number of sizes."""
+        order_type = normalize_type(order_type)
+        model = self._models.get(order_type)
+        if model is None or (k and model.k != k):
+            return self.build(order_type, k)
+
+        changed = self._fetch(order_type, since=model.watermark)
+        live = set(db.session.execute(
+            select(Order.id).where(func.lower(func.trim(Order.order_type)) == order_type)
+        ).scalars())
+
+        with self._lock:
+            for order_id in [i for i in model.rows if i not in live]:
+                model.remove(order_id)  # deleted or moved to another order type
+            for order_id, measurements, status, updated_at in changed:
+                model.remove(order_id)
+                vector = None if status in EXCLUDED_STATUSES else measurement_vector(measurements)
+                if vector is not None:
+                    model.add(order_id, vector)
+                if updated_at and (model.watermark is None or updated_at > model.watermark):
+                    model.watermark = updated_at
+            model.refreshed_at = datetime.utcnow()
+            stale = model.needs_refit() or len(model.rows) < MIN_ORDERS
+
+        return self.build(order_type, model.k) if stale else model
+
+    def refresh_all(self) -> int:
+        """Batch pass: refresh or build a chart for every order type; returns the number of charts"""
+        order_types = db.session.execute(
+            select(func.lower(func.trim(Order.order_type))).distinct()
+        ).scalars().all()
+        charts = 0
+        for order_type in order_types:
+            if order_type and self.refresh(order_type) is not None:
+                charts += 1
+        return charts
+
+    def chart(self, order_type: str, k: Optional[int] = None, include_orders: bool = False) -> Optional[Dict]:
+        model = self.refresh(order_type, k)
+        if model is None:
+            return None
+        with self._lock:
+            return model.chart(include_orders)
+
+    def suggest(self, order_type: str, measurements, k: Optional[int] = None) -> Optional[Dict]:
+        """Nearest standard size for a set of measurements"""
+        vector = measurement_vector(measurements)
+        if vector is None:
+            raise ValueError(f'At least {MIN_FEATURES} of {", ".join(FEATURES)} are required')
+        model = self.refresh(order_type, k)
+        if model is None:
+            return None
+        with self._lock:
+            cluster, distance = model.assign(vector)
+            return {'size': model.labels[cluster], 'distance': round(distance, 3)}
+
+    def stats(self) -> List[Dict]:
+        return [
+            {
+                'order_type': model.order_type,
+                'orders': len(model.rows),
+                'sizes': model.labels,
+                'changed_since_fit': model.changed_since_fit,
+                'fitted_at': model.fitted_at.isoformat() if model.fitted_at else None,
+                'refreshed_at': model.refreshed_at.isoformat() if model.refreshed_at else None
+            }
+            for model in list(self._models.values())
+        ]
+
+
+size_clusters = SizeClusters()
+
+
+def init_size_clusters(app):
+    """Recompute size charts for all order types in a daemon thread"""
+    interval = app.config.get('SIZE_CLUSTER_REFRESH_SECONDS', 900)
+    if not interval:
+        return
+
+    def worker():
+        while True:
+            try:
+                with app.app_context():
+                    size_clusters.refresh_all()
+                    db.session.remove()
+            except Exception as e:
+                logger.error(f"Size clustering failed: {str(e)}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=worker, name='size-clusters-refresh', daemon=True)
+    thread.start()
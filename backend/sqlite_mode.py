@@ -0,0 +1,222 @@
+"""
+TEX-SARTHI SQLite Production Mode
+WAL and tuning pragmas on every connection, reads on a pool of read-only
+connections, writes through one queued writer connection per process with
+BEGIN IMMEDIATE transactions, and periodic ANALYZE / WAL checkpoints
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import quote
+
+from flask import current_app, has_app_context
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+EXTENSION = 'sqlite_mode'
+
+
+class RoutingSession(FlaskSession):
+    """db.session class: statements go to the read-only pool until the transaction writes;
+    its flushes, DML and everything after them go to the writer until commit or rollback,
+    so the write lock is only held from the first write to the end of the transaction.
+    SELECT ... FOR UPDATE (or execution_options(writer=True)) counts as a write: the value
+    it reads is taken under the write lock, not from a snapshot that may already be stale"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            mode = current_app.extensions.get(EXTENSION)
+            if mode is not None:
+                if self._flushing or (clause is not None and _writes(clause)):
+                    self.info['sqlite_wrote'] = True
+                elif (clause is not None and getattr(clause, 'is_select', False)
+                      and not self.info.get('sqlite_wrote')):
+                    return mode.reader
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _writes(clause) -> bool:
+    """DML, a locking read, or a statement explicitly pinned to the writer"""
+    if getattr(clause, 'is_dml', False) or getattr(clause, '_for_update_arg', None) is not None:
+        return True
+    options = getattr(clause, 'get_execution_options', None)
+    return bool(options and options().get('writer'))
+
+
+@event.listens_for(Session, 'after_commit')
+def _reset_after_commit(session):
+    # The next transaction may read from the pool again, and sees this commit there
+    session.info.pop('sqlite_wrote', None)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_after_rollback(session):
+    session.info.pop('sqlite_wrote', None)
+
+
+# ---------------------------------------------------------------------------
+# Engines
+# ---------------------------------------------------------------------------
+
+def is_file_database(uri: str) -> bool:
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.split('?', 1)[0] not in ('sqlite://', 'sqlite:///')
+
+
+def _pragmas(config: Dict, read_only: bool) -> list:
+    pragmas = [
+        f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE', 268435456))}",
+        # Negative: size in KiB rather than pages
+        f"PRAGMA cache_size=-{int(config.get('SQLITE_CACHE_SIZE_KB', 16384))}",
+    ]
+    if read_only:
+        pragmas.append("PRAGMA query_only=ON")
+    else:
+        # Persistent in the file; read-only connections cannot set it
+        pragmas.insert(1, "PRAGMA journal_mode=WAL")
+    return pragmas
+
+
+def _prepare(engine, pragmas: list, begin: str):
+    """Apply pragmas on connect and let SQLAlchemy, not pysqlite, emit BEGIN"""
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _on_begin(connection):
+        connection.exec_driver_sql(begin)
+
+
+class SQLiteMode:
+    """The writer (db.engine, one connection per process) and the read-only pool of one app"""
+
+    def __init__(self, writer, reader):
+        self.writer = writer
+        self.reader = reader
+
+    def stats(self) -> Dict:
+        return {'writer': self.writer.pool.status(), 'reader': self.reader.pool.status()}
+
+
+def sqlite_mode(app=None) -> Optional[SQLiteMode]:
+    return (app or current_app).extensions.get(EXTENSION)
+
+
+def configure_sqlite_mode(app):
+    """Before db.init_app: size the writer pool to a single connection, so threads queue for it"""
+    if not app.config.get('SQLITE_WAL') or not is_file_database(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': 1,
+        'max_overflow': 0,
+        'pool_timeout': app.config.get('SQLITE_WRITE_QUEUE_TIMEOUT', 30),
+    }
+
+
+def init_sqlite_mode(app):
+    """After db.init_app: pragmas and IMMEDIATE transactions on the writer, and the read-only pool"""
+    if not app.config.get('SQLITE_WAL') or not is_file_database(app.config['SQLALCHEMY_DATABASE_URI']):
+        return
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        writer = db.engine
+    # Flask-SQLAlchemy has already resolved relative paths against the instance folder
+    path = writer.url.database
+
+    # Writer transactions take the write lock up front, so they wait in busy_timeout
+    # instead of failing with "database is locked" when upgrading from a read
+    _prepare(writer, _pragmas(app.config, read_only=False), 'BEGIN IMMEDIATE')
+    # WAL has to be on before a read-only connection can open the file
+    with writer.connect():
+        pass
+
+    size = app.config.get('SQLITE_READ_POOL_SIZE', 8)
+    reader = create_engine(
+        'sqlite://',
+        creator=lambda: sqlite3.connect(f'file:{quote(path)}?mode=ro', uri=True, check_same_thread=False),
+        poolclass=QueuePool,
+        pool_size=size,
+        max_overflow=size,
+        pool_timeout=app.config.get('SQLITE_WRITE_QUEUE_TIMEOUT', 30)
+    )
+    _prepare(reader, _pragmas(app.config, read_only=True), 'BEGIN')
+    app.extensions[EXTENSION] = SQLiteMode(writer, reader)
+
+    logger.info(f"SQLite WAL mode on {path}: 1 writer, up to {size * 2} readers per process")
+
+
+def dispose_engines(app, close: bool = True):
+    """Drop pooled connections, e.g. in a forked worker (close=False keeps the parent's open)"""
+    db = app.extensions['sqlalchemy']
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
+    mode = app.extensions.get(EXTENSION)
+    if mode is not None:
+        mode.reader.dispose(close=close)
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+def run_maintenance(app) -> Dict:
+    """Refresh planner statistics and fold the WAL back into the database; goes through the writer"""
+    mode = sqlite_mode(app)
+    if mode is None:
+        return {}
+    started = time.perf_counter()
+    raw = mode.writer.raw_connection()
+    try:
+        cursor = raw.cursor()
+        # Bounded sampling keeps ANALYZE to milliseconds on large tables
+        cursor.execute(f"PRAGMA analysis_limit={int(app.config.get('SQLITE_ANALYSIS_LIMIT', 1000))}")
+        cursor.execute("ANALYZE")
+        busy, wal_pages, checkpointed = cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+        cursor.close()
+    finally:
+        raw.close()
+    result = {
+        'busy': bool(busy),
+        'wal_pages': wal_pages,
+        'checkpointed_pages': checkpointed,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+    if busy:
+        # A long reader held the WAL; the next run (or SQLite's auto-checkpoint) catches up
+        logger.warning(f"WAL checkpoint incomplete: {result}")
+    return result
+
+
+def init_sqlite_maintenance(app):
+    """Run maintenance every SQLITE_MAINTENANCE_SECONDS in a daemon thread (0 disables)"""
+    interval = app.config.get('SQLITE_MAINTENANCE_SECONDS', 900)
+    if not interval or sqlite_mode(app) is None:
+        return
+
+    def worker():
+        while True:
+            time.sleep(interval)
+            try:
+                run_maintenance(app)
+            except Exception as e:
+                logger.error(f"SQLite maintenance failed: {str(e)}")
+
+    thread = threading.Thread(target=worker, name='sqlite-maintenance', daemon=True)
+    thread.start()
@@ -0,0 +1,146 @@
+"""
+TEX-SARTHI Aggregate Stats
+One conditional-aggregate query per table, shared by the stats, report and
+calendar endpoints and memoized until the table is written
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List
+
+from sqlalchemy import func, select
+
+from cache import memoize_versions
+from models import Delivery, InventoryItem, Order, db
+from serializers import compile_serializer, full_fieldset, required_columns
+
+OPEN_DELIVERY_STATUSES = ('scheduled', 'in_transit')
+
+
+@memoize_versions('deliveries')
+def delivery_stats(today: date) -> Dict:
+    """Delivery counts by status, for today and overdue, in one scan"""
+    total, scheduled, in_transit, delivered, failed, todays, overdue = db.session.execute(select(
+        func.count(Delivery.id),
+        func.count(Delivery.id).filter(Delivery.status == 'scheduled'),
+        func.count(Delivery.id).filter(Delivery.status == 'in_transit'),
+        func.count(Delivery.id).filter(Delivery.status == 'delivered'),
+        func.count(Delivery.id).filter(Delivery.status == 'failed'),
+        func.count(Delivery.id).filter(Delivery.delivery_date == today),
+        func.count(Delivery.id).filter(
+            Delivery.delivery_date < today, Delivery.status.in_(OPEN_DELIVERY_STATUSES)
+        )
+    )).one()
+    return {
+        'totalDeliveries': total,
+        'scheduledDeliveries': scheduled,
+        'inTransitDeliveries': in_transit,
+        'deliveredDeliveries': delivered,
+        'failedDeliveries': failed,
+        'todaysDeliveries': todays,
+        'overdueDeliveries': overdue
+    }
+
+
+@memoize_versions('inventory_items')
+def inventory_stats() -> Dict:
+    """Inventory totals, per-type and per-status breakdowns and low-stock items.
+    One GROUP BY (type, status) query for the aggregates plus the low-stock rows from the partial index."""
+    value = InventoryItem.current_stock * InventoryItem.cost_per_unit
+    groups = db.session.execute(
+        select(
+            InventoryItem.type,
+            InventoryItem.status,
+            func.count(InventoryItem.id),
+            func.coalesce(func.sum(InventoryItem.current_stock), 0),
+            func.coalesce(func.sum(value), 0),
+            func.count(InventoryItem.id).filter(InventoryItem.is_low_stock),
+            func.count(InventoryItem.id).filter(InventoryItem.current_stock == 0)
+        ).group_by(InventoryItem.type, InventoryItem.status)
+    ).all()
+
+    summary = {'totalItems': 0, 'lowStockItems': 0, 'outOfStockItems': 0, 'totalValue': 0.0}
+    by_type: Dict[str, Dict] = {}
+    by_status: Dict[str, Dict] = {}
+    for item_type, status, count, stock, total_value, low, out in groups:
+        summary['totalItems'] += count
+        summary['lowStockItems'] += low
+        summary['outOfStockItems'] += out
+        summary['totalValue'] += float(total_value)
+
+        entry = by_type.setdefault(item_type, {'type': item_type, 'count': 0, 'totalStock': 0, 'totalValue': 0.0})
+        entry['count'] += count
+        entry['totalStock'] += stock
+        entry['totalValue'] += float(total_value)
+
+        by_status.setdefault(status, {'status': status, 'count': 0})['count'] += count
+
+    # Same keys as InventoryItem.to_dict(), read from plain rows
+    fields = full_fieldset(InventoryItem)
+    serialize = compile_serializer(InventoryItem, fields, from_row=True)
+    columns = [getattr(InventoryItem, name) for name in required_columns(InventoryItem, fields)]
+    low_stock = db.session.execute(
+        select(*columns).where(InventoryItem.is_low_stock).order_by(InventoryItem.current_stock)
+    ).all()
+
+    return {
+        'summary': summary,
+        'itemsByType': list(by_type.values()),
+        'itemsByStatus': list(by_status.values()),
+        'lowStockDetails': [serialize(row) for row in low_stock]
+    }
+
+
+@memoize_versions('orders')
+def orders_by_day(start: date, end: date) -> Dict[date, Dict]:
+    """Orders falling due per day and status, with order value and balance due"""
+    days: Dict[date, Dict] = {}
+    rows = db.session.execute(
+        select(
+            Order.delivery_date,
+            Order.status,
+            func.count(),
+            func.coalesce(func.sum(Order.order_value), 0),
+            func.coalesce(func.sum(Order.order_value - func.coalesce(Order.advance_payment, 0)), 0)
+        )
+        .where(Order.delivery_date >= start, Order.delivery_date <= end)
+        .group_by(Order.delivery_date, Order.status)
+    ).all()
+    for day, status, count, value, balance in rows:
+        entry = days.setdefault(day, {'total': 0, 'by_status': {}, 'order_value': 0.0, 'balance_due': 0.0})
+        entry['total'] += count
+        entry['by_status'][status] = count
+        entry['order_value'] = round(entry['order_value'] + float(value), 2)
+        entry['balance_due'] = round(entry['balance_due'] + float(balance), 2)
+    return days
+
+
+@memoize_versions('deliveries')
+def deliveries_by_day(start: date, end: date) -> Dict[date, Dict]:
+    """Deliveries booked per day and status"""
+    days: Dict[date, Dict] = {}
+    rows = db.session.execute(
+        select(Delivery.delivery_date, Delivery.status, func.count())
+        .where(Delivery.delivery_date >= start, Delivery.delivery_date <= end)
+        .group_by(Delivery.delivery_date, Delivery.status)
+    ).all()
+    for day, status, count in rows:
+        entry = days.setdefault(day, {'total': 0, 'by_status': {}})
+        entry['total'] += count
+        entry['by_status'][status] = count
+    return days
+
+
+def calendar_days(start: date, end: date) -> List[Dict]:
+    """Every day of the range with its order and delivery counts (zeros on empty days)"""
+    orders = orders_by_day(start, end)
+    deliveries = deliveries_by_day(start, end)
+    empty_orders = {'total': 0, 'by_status': {}, 'order_value': 0.0, 'balance_due': 0.0}
+    empty_deliveries = {'total': 0, 'by_status': {}}
+    return [
+        {
+            'date': day.isoformat(),
+            'orders': orders.get(day, empty_orders),
+            'deliveries': deliveries.get(day, empty_deliveries)
+        }
+        for day in (start + timedelta(days=n) for n in range((end - start).days + 1))
+    ]
@@ -0,0 +1,243 @@
+"""
+TEX-SARTHI Stock Ledger
+Atomic, batched stock movements recorded in stock_movements, plus periodic
+snapshots so stock at any past moment is a snapshot and a short ledger replay
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import case, func, insert, literal, select, update
+
+from models import InventoryItem, StockMovement, StockSnapshot, db
+
+logger = logging.getLogger(__name__)
+
+MOVEMENT_REASONS = ['purchase', 'cutting', 'sale', 'return', 'wastage', 'adjustment', 'initial']
+
+MAX_BATCH_SIZE = 5000
+
+
+class StockError(ValueError):
+    """A batch that cannot be applied; `details` lists the offending items"""
+
+    def __init__(self, message: str, status_code: int = 400, details: Optional[List[Dict]] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.details = details or []
+
+
+def stock_status(stock, min_stock):
+    """SQL twin of InventoryItem.refresh_stock_state() for status"""
+    return case(
+        (stock <= 0, 'out_of_stock'),
+        (stock <= func.coalesce(min_stock, 0), 'low_stock'),
+        else_='in_stock'
+    )
+
+
+def low_stock_flag(stock, min_stock):
+    """SQL twin of InventoryItem.refresh_stock_state() for is_low_stock"""
+    return stock <= func.coalesce(min_stock, 0)
+
+
+def normalize_movements(raw) -> List[Dict]:
+    """Validate a movements payload; raises StockError with one entry per bad movement"""
+    if not isinstance(raw, list) or not raw:
+        raise StockError('movements must be a non-empty list')
+    if len(raw) > MAX_BATCH_SIZE:
+        raise StockError(f'At most {MAX_BATCH_SIZE} movements per batch')
+
+    movements = []
+    errors = []
+    for index, entry in enumerate(raw):
+        if not isinstance(entry, dict):
+            errors.append({'index': index, 'error': 'Movement must be an object'})
+            continue
+        try:
+            item_id = int(entry['item_id'])
+            delta = int(entry['delta'])
+            order_id = int(entry['order_id']) if entry.get('order_id') else None
+        except (KeyError, TypeError, ValueError):
+            errors.append({'index': index, 'error': 'item_id, delta and order_id must be integers'})
+            continue
+        reason = entry.get('reason') or 'adjustment'
+        if reason not in MOVEMENT_REASONS:
+            errors.append({'index': index, 'error': f'Invalid reason. Must be one of: {", ".join(MOVEMENT_REASONS)}'})
+            continue
+        if delta == 0:
+            errors.append({'index': index, 'error': 'delta must not be 0'})
+            continue
+        movements.append({
+            'item_id': item_id,
+            'delta': delta,
+            'reason': reason,
+            'order_id': order_id,
+            'note': entry.get('note') or ''
+        })
+
+    if errors:
+        raise StockError('Invalid movements', details=errors)
+    return movements
+
+
+def apply_movements(movements: List[Dict], user_id: Optional[int] = None,
+                    allow_negative: bool = False) -> Dict[int, Dict]:
+    """Apply movements in the current transaction: one UPDATE for all items, one ledger INSERT.
+    The caller commits, or rolls back on StockError."""
+    net = {}
+    for movement in movements:
+        net[movement['item_id']] = net.get(movement['item_id'], 0) + movement['delta']
+
+    # current_stock = current_stock + :delta, evaluated by the database so concurrent writers never lose updates
+    new_stock = func.coalesce(InventoryItem.current_stock, 0) + case(net, value=InventoryItem.id, else_=0)
+    statement = (
+        update(InventoryItem)
+        .where(InventoryItem.id.in_(list(net)))
+        .values(
+            current_stock=new_stock,
+            status=stock_status(new_stock, InventoryItem.min_stock),
+            is_low_stock=low_stock_flag(new_stock, InventoryItem.min_stock)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    columns = (InventoryItem.id, InventoryItem.current_stock, InventoryItem.status)
+
+    if db.engine.dialect.update_returning:
+        rows = db.session.execute(statement.returning(*columns)).all()
+    else:
+        db.session.execute(statement)
+        rows = db.session.execute(select(*columns).where(InventoryItem.id.in_(list(net)))).all()
+    balances = {row[0]: {'id': row[0], 'current_stock': row[1], 'status': row[2]} for row in rows}
+
+    missing = [item_id for item_id in net if item_id not in balances]
+    if missing:
+        raise StockError('Inventory item not found', 404, [{'item_id': item_id} for item_id in missing])
+
+    if not allow_negative:
+        short = [
+            {'item_id': item_id, 'requested': net[item_id], 'available': balance['current_stock'] - net[item_id]}
+            for item_id, balance in balances.items() if balance['current_stock'] < 0
+        ]
+        if short:
+            raise StockError('Insufficient stock', 409, short)
+
+    # Walk each item's movements forward from its pre-batch stock to fill balance_after
+    running = {item_id: balances[item_id]['current_stock'] - delta for item_id, delta in net.items()}
+    now = datetime.utcnow()
+    ledger = []
+    for movement in movements:
+        running[movement['item_id']] += movement['delta']
+        ledger.append(dict(
+            movement,
+            balance_after=running[movement['item_id']],
+            user_id=user_id,
+            created_at=now
+        ))
+    db.session.execute(insert(StockMovement), ledger)
+
+    return balances
+
+
+def take_snapshot() -> int:
+    """Record every item's stock with the current ledger high-water mark, in one INSERT ... SELECT.
+    The mark is a subquery of the same statement, so it and the balances come from one snapshot
+    of the database: a movement committed meanwhile is either in both or in neither"""
+    last_movement_id = select(func.coalesce(func.max(StockMovement.id), 0)).scalar_subquery()
+    result = db.session.execute(
+        insert(StockSnapshot).from_select(
+            ['item_id', 'quantity', 'last_movement_id', 'taken_at'],
+            select(
+                InventoryItem.id,
+                func.coalesce(InventoryItem.current_stock, 0),
+                last_movement_id,
+                literal(datetime.utcnow())
+            )
+        )
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def stock_at(at: datetime, item_ids: Optional[List[int]] = None) -> List[Dict]:
+    """Stock per item at a past moment: nearest earlier snapshot plus the ledger since it,
+    or, for items without one, current stock minus the ledger after `at`"""
+    items_query = select(InventoryItem.id, InventoryItem.item_name, InventoryItem.current_stock).where(
+        (InventoryItem.created_at <= at) | (InventoryItem.created_at.is_(None))
+    )
+    if item_ids:
+        items_query = items_query.where(InventoryItem.id.in_(item_ids))
+    items = db.session.execute(items_query.order_by(InventoryItem.id)).all()
+    if not items:
+        return []
+    ids = [row.id for row in items]
+
+    latest = (
+        select(StockSnapshot.item_id, func.max(StockSnapshot.taken_at).label('taken_at'))
+        .where(StockSnapshot.taken_at <= at, StockSnapshot.item_id.in_(ids))
+        .group_by(StockSnapshot.item_id)
+        .subquery()
+    )
+    snapshots = (
+        select(StockSnapshot.item_id, StockSnapshot.quantity, StockSnapshot.last_movement_id, StockSnapshot.taken_at)
+        .join(latest, (StockSnapshot.item_id == latest.c.item_id) & (StockSnapshot.taken_at == latest.c.taken_at))
+        .subquery()
+    )
+    snapshot_rows = {row.item_id: row for row in db.session.execute(select(snapshots))}
+
+    # Replay forward from each snapshot, up to and including `at`
+    forward = dict(db.session.execute(
+        select(StockMovement.item_id, func.sum(StockMovement.delta))
+        .join(snapshots, StockMovement.item_id == snapshots.c.item_id)
+        .where(StockMovement.id > snapshots.c.last_movement_id, StockMovement.created_at <= at)
+        .group_by(StockMovement.item_id)
+    ).all())
+
+    # Items without a snapshot: undo everything after `at`
+    without = [item_id for item_id in ids if item_id not in snapshot_rows]
+    backward = {}
+    if without:
+        backward = dict(db.session.execute(
+            select(StockMovement.item_id, func.sum(StockMovement.delta))
+            .where(StockMovement.item_id.in_(without), StockMovement.created_at > at)
+            .group_by(StockMovement.item_id)
+        ).all())
+
+    result = []
+    for row in items:
+        snapshot = snapshot_rows.get(row.id)
+        if snapshot:
+            quantity = snapshot.quantity + (forward.get(row.id) or 0)
+            source = {'source': 'snapshot', 'snapshot_at': snapshot.taken_at.isoformat()}
+        else:
+            quantity = (row.current_stock or 0) - (backward.get(row.id) or 0)
+            source = {'source': 'ledger', 'snapshot_at': None}
+        result.append(dict({'item_id': row.id, 'item_name': row.item_name, 'quantity': int(quantity)}, **source))
+    return result
+
+
+def init_stock_snapshots(app):
+    """Take a snapshot every STOCK_SNAPSHOT_INTERVAL_HOURS in a daemon thread (0 disables)"""
+    interval_hours = app.config.get('STOCK_SNAPSHOT_INTERVAL_HOURS', 24)
+    if not interval_hours:
+        return
+    interval = timedelta(hours=interval_hours)
+
+    def worker():
+        while True:
+            try:
+                with app.app_context():
+                    # Several workers may run this loop; only snapshot when the last one is due
+                    last = db.session.query(func.max(StockSnapshot.taken_at)).scalar()
+                    if last is None or datetime.utcnow() - last >= interval:
+                        take_snapshot()
+                    db.session.remove()
+            except Exception as e:
+                logger.error(f"Stock snapshot failed: {str(e)}")
+            time.sleep(min(interval.total_seconds(), 3600))
+
+    thread = threading.Thread(target=worker, name='stock-snapshots', daemon=True)
+    thread.start()
@@ -0,0 +1,55 @@
+"""
+TEX-SARTHI Streaming Responses
+Encode a header object and then a JSON array element by element, so large pages
+never hold the whole list and the whole string in memory at once
+"""
+
+import logging
+from typing import Dict, Iterable
+
+from flask import Response, current_app, stream_with_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_ITEMS = 100
+
+
+def internal_error_payload() -> Dict:
+    """Body used for unhandled errors, both by app.py and by failed streams"""
+    return {'error': 'Internal server error'}
+
+
+def _generate(header: Dict, key: str, items: Iterable, chunk_items: int):
+    dumps = current_app.json.dumps
+
+    # {"pagination": {...}, "orders": [ ... ]} with the array written last
+    opening = dumps(header)[:-1]
+    yield (opening + ', ' if header else opening) + dumps(key) + ': ['
+
+    buffer = []
+    first = True
+    try:
+        for item in items:
+            buffer.append(dumps(item))
+            if len(buffer) >= chunk_items:
+                yield ('' if first else ',') + ','.join(buffer)
+                first = False
+                buffer = []
+        if buffer:
+            yield ('' if first else ',') + ','.join(buffer)
+        yield ']}'
+    except Exception as e:
+        # Headers are already sent, so close the array and report the error in-band
+        logger.error(f"Streaming '{key}' failed: {str(e)}")
+        if buffer:
+            yield ('' if first else ',') + ','.join(buffer)
+        trailer = dict(internal_error_payload(), partial=True)
+        yield '], ' + dumps(trailer)[1:]
+
+
+def stream_json(header: Dict, key: str, items: Iterable, chunk_items: int = DEFAULT_CHUNK_ITEMS) -> Response:
+    """Stream {**header, key: [items...]} as chunked JSON"""
+    return Response(
+        stream_with_context(_generate(header, key, items, chunk_items)),
+        mimetype='application/json'
+    )
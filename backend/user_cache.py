@@ -0,0 +1,168 @@
+"""
+TEX-SARTHI User Cache
+Per-worker LRU of user records keyed by JWT identity, with a short TTL and
+invalidation when users are written, behind a current_user() helper
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import User, db
+
+DEFAULT_TTL = 30
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class CachedUser:
+    """Read-only copy of a user row, safe to share between requests and threads"""
+
+    __slots__ = ('id', 'name', 'email', 'role', '_data')
+
+    def __init__(self, user: User):
+        self.id = user.id
+        self.name = user.name
+        self.email = user.email
+        self.role = user.role
+        self._data = user.to_dict()
+
+    def to_dict(self) -> Dict:
+        return dict(self._data)
+
+    def has_role(self, *roles: str) -> bool:
+        return self.role in roles
+
+
+class UserCache:
+    """Thread-safe LRU of CachedUser entries that expire after `ttl` seconds"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[int, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation so a row read before it is not cached after it
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[CachedUser]:
+        """Cached user, loading it on a miss (unknown ids are not cached)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        cached = CachedUser(user)
+        with self._lock:
+            if generation != self._generation:
+                return cached
+            self._entries[user_id] = (now + self.ttl, cached)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, *user_ids: int):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+user_cache = UserCache()
+
+
+def current_user_id() -> Optional[int]:
+    """Numeric id of the caller, or None for anonymous requests"""
+    identity = get_jwt_identity()
+    try:
+        return int(identity) if identity is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def current_user() -> Optional[CachedUser]:
+    """The authenticated user (after @jwt_required), from the cache; None if anonymous or deleted"""
+    user_id = current_user_id()
+    if user_id is None:
+        return None
+    # Memoized for the rest of the request alongside the decoded token
+    memo = g.get('_current_user') if has_request_context() else None
+    if memo is not None and memo[0] == user_id:
+        return memo[1]
+    user = user_cache.get(user_id)
+    if has_request_context():
+        g._current_user = (user_id, user)
+    return user
+
+
+# ---------------------------------------------------------------------------
+# Invalidation: users written in this worker drop out once the commit lands;
+# other workers see the change within the TTL
+# ---------------------------------------------------------------------------
+
+def _changed_users(session) -> set:
+    return session.info.setdefault('changed_users', set())
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_users(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            _changed_users(session).add(obj.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_user_statements(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        if table is not None and table.name == User.__tablename__:
+            orm_execute_state.session.info['users_bulk_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_on_commit(session):
+    if session.info.pop('users_bulk_changed', False):
+        session.info.pop('changed_users', None)
+        user_cache.clear()
+        return
+    changed = session.info.pop('changed_users', None)
+    if changed:
+        user_cache.invalidate(*changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_on_rollback(session):
+    session.info.pop('changed_users', None)
+    session.info.pop('users_bulk_changed', None)
+
+
+def init_user_cache(app):
+    """Apply USER_CACHE_TTL and USER_CACHE_MAX_ENTRIES"""
+    user_cache.ttl = app.config.get('USER_CACHE_TTL', DEFAULT_TTL)
+    user_cache.max_entries = app.config.get('USER_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+    user_cache.clear()
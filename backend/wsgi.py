@@ -0,0 +1,10 @@
+"""
+TEX-SARTHI WSGI Entry Point
+gunicorn -c gunicorn.conf.py wsgi:app (FLASK_CONFIG defaults to production here)
+"""
+
+import os
+
+from app import create_app
+
+app = create_app(os.environ.get('FLASK_CONFIG', 'production'))